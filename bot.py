@@ -122,9 +122,16 @@ async def on_ready(_):
         from utils.state import state
         await state.initialize()
 
+        from utils.plugin_profiler import plugin_profiler
+        plugin_profiler.start("boot")
+
         commands_dir = os.path.join(SCRIPT_DIR, "commands")
         found_cmds = 0
-        if os.path.exists(commands_dir):
+        if config.LAZY_PLUGINS:
+            from utils.plugin_utils import load_plugins_lazily
+            found_cmds = load_plugins_lazily(client)
+            asyncio.create_task(warm_up_plugins())
+        elif os.path.exists(commands_dir):
             from utils.plugin_utils import load_plugin
             for f in os.listdir(commands_dir):
                 if f.endswith(".py") and not f.startswith("_"):
@@ -132,15 +139,37 @@ async def on_ready(_):
                         found_cmds += 1
 
         print(f"Loaded {found_cmds} plugins")
+        boot_profile = await plugin_profiler.finish()
+
+        # Baseline for incremental `.reload` and the optional file watcher.
+        from utils.reloader import reloader
+        reloader.snapshot()
+        if config.HOT_RELOAD:
+            reloader.start_watcher(client)
+
+        if config.YTDLP_PREWARM:
+            from utils.ytdlp_pool import ytdlp_pool
+            asyncio.create_task(ytdlp_pool.warm_up())
 
         from utils.error_reporter import ErrorReporter
         await ErrorReporter.initialize(client)
-        await ErrorReporter.boot_message(client, found_cmds)
+        await ErrorReporter.boot_message(client, found_cmds, boot_profile)
 
     except Exception as e:
         print(f"boot failed: {e}")
 
 
+async def warm_up_plugins():
+    """Imports configured and popular lazy plugins once the bot is answering."""
+    try:
+        from utils.plugin_utils import popular_plugins, warm_up_plugins as warm_up
+        plugins = [p if p.startswith("commands.") else f"commands.{p}" for p in config.PLUGIN_WARMUP]
+        plugins += await popular_plugins(config.PLUGIN_WARMUP_TOP)
+        await warm_up(client, plugins)
+    except Exception as e:
+        logger.warning(f"Plugin warm-up failed: {e}")
+
+
 # PM Protection
 from utils.pm_permit_manager import enforce_pm_protection
 
@@ -160,6 +189,15 @@ async def pm_protection_listener(msg: Message):
 async def shutdown(sig: Optional[signal.Signals] = None):
     if sig:
         logger.info(f"Received {sig.name}, shutting down...")
+    try:
+        from utils.counters import counters
+        from utils.database import db
+        await counters.flush()
+        await db.close()
+    except Exception as e:
+        logger.error(f"Failed to flush pending database writes: {e}")
+    from utils.ytdlp_pool import ytdlp_pool
+    ytdlp_pool.shutdown()
     try:
         if client.is_connected:
             await client.stop()
@@ -2,8 +2,6 @@ import time
 import re
 from config import config
 
-from utils.plugin_utils import PLUGIN_HANDLES, load_plugin, unload_plugin
-
 from . import *
 from utils.helpers import edit_or_reply
 from utils.ui_templates import UI
@@ -159,77 +157,3 @@ async def admin_handler(client: Client, message: Message):
 
     else:
         await edit_or_reply(message, f"{UI.mono('error')} Invalid operation: {UI.mono(action)}")
-
-
-@astra_command(
-    name="reload",
-    description="Reload a plugin without restarting.",
-    category="System",
-    aliases=["re"],
-    usage="<plugin_name> (e.g. meme)",
-    owner_only=True,
-)
-async def reload_handler(client: Client, message: Message):
-    """Reload a plugin dynamically."""
-    import os
-
-    args = extract_args(message)
-    if not args:
-        return await edit_or_reply(message, f"{UI.mono('error')} Target plugin required (or 'all').")
-
-    target = args[0].lower()
-
-    if target == "all":
-        status_msg = await edit_or_reply(message, f"{UI.mono('processing')} Re-indexing registry...")
-        count = 0
-        failed = []
-
-        # Snapshot keys to avoid runtime dict change errors
-        current_plugins = list(PLUGIN_HANDLES.keys())
-
-        # Also scan directory to pick up NEW files
-        commands_dir = os.path.dirname(os.path.abspath(__file__))
-        if os.path.exists(commands_dir):
-            for f in os.listdir(commands_dir):
-                if f.endswith(".py") and not f.startswith("_"):
-                    p_name = f"commands.{f[:-3]}"
-                    if p_name not in current_plugins:
-                        current_plugins.append(p_name)
-
-        for plugin in current_plugins:
-            unload_plugin(client, plugin)
-            if load_plugin(client, plugin):
-                count += 1
-            else:
-                failed.append(plugin.split(".")[-1])
-
-        if failed:
-            time.sleep(0.5)
-            await status_msg.edit(f"{UI.mono('warning')} Registry updated: {UI.mono(count)} loaded.\n{UI.bold('Failed:')} {UI.mono(', '.join(failed))}")
-        else:
-            time.sleep(0.5)
-            await status_msg.edit(f"{UI.mono('done')} Registry fully synced: {UI.mono(count)} plugins.")
-        return
-
-    # Single Plugin Logic
-    # 1. Normalize name (e.g. 'meme' -> 'commands.meme')
-    plugin_name = f"commands.{target}"
-
-    # 2. Check if exists
-    commands_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(commands_dir, f"{target}.py")
-
-    if not os.path.exists(file_path) and plugin_name not in PLUGIN_HANDLES:
-        return await edit_or_reply(message, f"{UI.mono('error')} Plugin {UI.mono(target)} not found.")
-
-    status_msg = await edit_or_reply(message, f"{UI.mono('processing')} Reloading {UI.mono(target)}...")
-
-    # 3. specific unload/load
-    unload_plugin(client, plugin_name)
-    time.sleep(0.5)
-    if load_plugin(client, plugin_name):
-        time.sleep(0.5)
-        await status_msg.edit(f"{UI.mono('done')} Plugin {UI.mono(target)} reloaded.")
-    else:
-        time.sleep(0.5)
-        await status_msg.edit(f"{UI.mono('[ ERR ]')} Synchronize failed for {UI.mono(target)}.")
@@ -41,16 +41,16 @@ async def afk_mention_responder(client: Client, message: Message):
         if not afk_state["is_afk"]:
             return
 
-        is_tagged = False
-        me = await client.get_me()
-        my_num = str(me.id).split("@")[0]
+        # DMs always get a reply; groups only when the owner is tagged.
+        if str(message.chat_id).endswith("@g.us"):
+            from utils.context import get_my_number
 
-        if f"@{my_num}" in (message.body or ""):
-            is_tagged = True
+            my_num = await get_my_number(client)
+            if f"@{my_num}" not in (message.body or ""):
+                return
 
-        if not str(message.chat_id).endswith("@g.us") or is_tagged:
-            await edit_or_reply(
-                message, f"🌙 **Astra User is AFK**\n━━━━━━━━━━━━━━━━━━━━\n💬 **Reason:** `{afk_state['reason']}`"
-            )
+        await edit_or_reply(
+            message, f"🌙 **Astra User is AFK**\n━━━━━━━━━━━━━━━━━━━━\n💬 **Reason:** `{afk_state['reason']}`"
+        )
     except Exception:
         pass
@@ -1,46 +1,55 @@
-import json
 import time
 
-from utils.database import db
+from utils.counters import counters
 
 from . import *
 from utils.helpers import edit_or_reply
 
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+def _sparkline(values) -> str:
+    """Renders hourly counts as a compact unicode sparkline."""
+    peak = max(values) if values else 0
+    if not peak:
+        return SPARK_CHARS[0] * len(values)
+    return "".join(SPARK_CHARS[min(len(SPARK_CHARS) - 1, v * len(SPARK_CHARS) // (peak + 1))] for v in values)
+
 
 @astra_command(
     name="analytics",
     description="Detailed command usage and bot engagement report.",
     category="System",
+    usage="[command] (optional; show the 24h trend for one command)",
     owner_only=True,
 )
 async def analytics_handler(client: Client, message: Message):
     """Owner-only analytics dashboard."""
+    args = extract_args(message)
+    target = args[0].lower().lstrip(".!/") if args else None
     status_msg = await edit_or_reply(message, "📊 **Generating Astra Intelligence Report...**")
 
-    # 1. Fetch Total Stats
-    total_cmds = await db.get("total_commands_v1", 0)
-
-    # 2. Fetch Full Usage List
-    cursor = await db.sqlite_conn.execute(
-        "SELECT key, value FROM state WHERE key LIKE 'cmd_usage:%' ORDER BY CAST(json_extract(value, '$') AS INTEGER) DESC"
-    )
-    rows = await cursor.fetchall()
+    # 1. Fetch Totals & Top Commands (served from the cmd_totals index)
+    used_cmds, total_cmds = await counters.summary()
+    rows = await counters.top(20)
 
-    usage_lines = []
-    for i, row in enumerate(rows):
-        cmd = row[0].split(":")[-1]
-        count = json.loads(row[1])
-        usage_lines.append(f"{i + 1}. `{cmd}`: **{count}**")
+    usage_lines = [f"{i + 1}. `{cmd}`: **{count}**" for i, (cmd, count) in enumerate(rows)]
+    usage_text = "\n".join(usage_lines) if usage_lines else "_No data recorded yet._"
+    if used_cmds > len(rows):
+        usage_text += f"\n\n_...and {used_cmds - len(rows)} more commands._"
 
-    usage_text = "\n".join(usage_lines[:20]) if usage_lines else "_No data recorded yet._"
-    if len(usage_lines) > 20:
-        usage_text += f"\n\n_...and {len(usage_lines) - 20} more commands._"
+    # 2. Hourly Trend
+    trend = await counters.trend(24, command=target)
+    trend_label = f"`{target}`" if target else "all commands"
 
     report = (
         f"📈 **ASTRA ANALYTICS DASHBOARD**\n"
         f"━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
         f"🚀 **Total Commands:** `{total_cmds}`\n"
         f"🕒 **Snapshot at:** `{time.strftime('%H:%M:%S')}`\n\n"
+        f"📉 **LAST 24H ({trend_label})**\n"
+        f"`{_sparkline(trend)}`\n"
+        f"_{sum(trend)} runs, peak {max(trend)}/h_\n\n"
         f"🔥 **COMMAND ATTRIBUTIONS (Top 20)**\n"
         f"━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
         f"{usage_text}\n"
@@ -19,13 +19,9 @@ async def apply_audio_effect(client: Client, message: Message, effect: str):
     temp_out = f"/tmp/astra_audio_out_{int(time.time())}.mp3"
     
     try:
-        media_data = await bridge_downloader.download_media(client, message)
-        if not media_data:
+        if not await bridge_downloader.download_media_to_file(client, message, temp_in):
             return await status_msg.edit(f"{UI.mono('error')} Source download failed.")
         
-        with open(temp_in, "wb") as f:
-            f.write(media_data)
-        
         media_path = temp_in
 
         # Build FFmpeg command based on effect
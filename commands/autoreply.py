@@ -1,8 +1,76 @@
+"""
+Auto-Reply
+----------
+Keyword triggered replies. Triggers are stored as `autoreply:<keyword>`
+state keys and compiled into an in-memory token trie, so matching an
+incoming message costs one walk over its words no matter how many
+triggers exist, and never touches the database.
+"""
+
 from utils.database import db
+from utils.plugin_utils import startup_filter
 
 from . import *
 from utils.helpers import edit_or_reply
 
+_END = object()  # trie marker: the path so far spells a complete trigger
+
+
+class TriggerIndex:
+    """
+    Word-boundary trigger matcher. A keyword matches when its words appear
+    as consecutive space-separated words of the message (case-insensitive).
+    """
+
+    def __init__(self):
+        self.replies = {}
+        self._trie = {}
+        self.loaded = False
+
+    async def load(self):
+        if self.loaded:
+            return
+        rows = await db.get_all_with_prefix("autoreply:")
+        self.replies = {key[len("autoreply:") :]: response for key, response in rows.items()}
+        self._compile()
+        self.loaded = True
+
+    def _compile(self):
+        trie = {}
+        for keyword in self.replies:
+            node = trie
+            for word in keyword.split(" "):
+                node = node.setdefault(word, {})
+            node[_END] = keyword
+        self._trie = trie
+
+    def set(self, keyword: str, response: str):
+        self.replies[keyword] = response
+        self._compile()
+
+    def remove(self, keyword: str) -> bool:
+        if self.replies.pop(keyword, None) is None:
+            return False
+        self._compile()
+        return True
+
+    def match(self, text: str):
+        """Returns the reply for the earliest (then longest) trigger in `text`."""
+        words = text.lower().split(" ")
+        for start in range(len(words)):
+            node, found = self._trie, None
+            for word in words[start:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                found = node.get(_END, found)
+            if found is not None:
+                return self.replies[found]
+        return None
+
+
+triggers = TriggerIndex()
+
 
 @astra_command(
     name="setreply",
@@ -24,7 +92,9 @@ async def setreply_handler(client: Client, message: Message):
     if not keyword or not response:
         return await edit_or_reply(message, "❌ Invalid keyword or response.")
 
+    await triggers.load()
     await db.set(f"autoreply:{keyword}", response)
+    triggers.set(keyword, response)
     await edit_or_reply(
         message, f"✅ **Auto-Reply Set**\n━━━━━━━━━━━━━━━━━━━━\nTrigger: `{keyword}`\nResponse: `{response}`"
     )
@@ -43,7 +113,10 @@ async def delreply_handler(client: Client, message: Message):
     if not args:
         return await edit_or_reply(message, "❌ **Usage:** `.delreply keyword`")
 
-    keyword = args[0].lower()
+    keyword = " ".join(args).lower()
+    await triggers.load()
+    if not triggers.remove(keyword):
+        return await edit_or_reply(message, f"❌ **No Auto-Reply For:** `{keyword}`")
     await db.delete(f"autoreply:{keyword}")
     await edit_or_reply(message, f"✅ **Auto-Reply Deleted:** `{keyword}`")
 
@@ -53,34 +126,32 @@ async def delreply_handler(client: Client, message: Message):
 )
 async def listreply_handler(client: Client, message: Message):
     """Lists all triggers."""
-    replies = await db.get_all_with_prefix("autoreply:")
+    await triggers.load()
+    replies = triggers.replies
 
     if not replies:
         return await edit_or_reply(message, "📝 **Auto-Reply Registry**\n━━━━━━━━━━━━━━━━━━━━\n*No triggers found.*")
 
     text = "📝 **Auto-Reply Registry**\n━━━━━━━━━━━━━━━━━━━━\n"
-    for key, val in replies.items():
-        kw = key.replace("autoreply:", "")
+    for kw, val in sorted(replies.items()):
         text += f"• `{kw}` → {val[:50]}...\n"
 
     await edit_or_reply(message, text)
 
 
 # --- WATCHER ---
-# Note: In Astra Userbot, global listeners are often registered in bot.py
-# or via a specific 'watcher' pattern. If the bot.py handles message events,
-# we would hook into it here or via plugin_utils logic.
-# For now, we define the logic; registration happens in the framework's core loop.
+
+
+@Client.on_message(Filters.all & ~Filters.me & startup_filter)
 async def autoreply_watcher(client: Client, message: Message):
     """Scans incoming messages for auto-reply triggers."""
-    if message.chat_id.serialized.endswith("@broadcast"):
-        return  # Ignore status
-
-    text = message.body.lower()
-    replies = await db.get_all_with_prefix("autoreply:")
+    try:
+        if not message.body or message.chat_id.serialized.endswith("@broadcast"):
+            return  # Ignore status
 
-    for key, response in replies.items():
-        keyword = key.replace("autoreply:", "")
-        if f" {keyword} " in f" {text} " or text == keyword:
+        await triggers.load()
+        response = triggers.match(message.body)
+        if response is not None:
             await client.send_message(message.chat_id, response, reply_to=message.id)
-            break
+    except Exception:
+        pass
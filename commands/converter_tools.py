@@ -401,12 +401,9 @@ async def img2pdf_handler(client: Client, message: Message):
                 if source_id and source_id in source_ids:
                     continue
 
-                media_data = await bridge_downloader.download_media(client, src_msg)
-                if not media_data:
-                    continue
                 queue_file = f"/tmp/astra_img2pdf_queue_{int(time.time() * 1000)}_{added}.bin"
-                with open(queue_file, "wb") as f:
-                    f.write(media_data)
+                if not await bridge_downloader.download_media_to_file(client, src_msg, queue_file):
+                    continue
                 files.append(queue_file)
                 if source_id:
                     source_ids.add(source_id)
@@ -426,12 +423,9 @@ async def img2pdf_handler(client: Client, message: Message):
 
         frames = []
         for idx, src_msg in enumerate(source_messages):
-            media_data = await bridge_downloader.download_media(client, src_msg)
-            if not media_data:
-                continue
             temp_input = f"/tmp/astra_img2pdf_in_{int(time.time() * 1000)}_{idx}.bin"
-            with open(temp_input, "wb") as f:
-                f.write(media_data)
+            if not await bridge_downloader.download_media_to_file(client, src_msg, temp_input):
+                continue
             temp_inputs.append(temp_input)
             frames.extend(_pdf_frames_from_image(temp_input))
 
@@ -472,11 +466,8 @@ async def todoc_handler(client: Client, message: Message):
         ext = "mp4" if message.quoted_type == MessageType.VIDEO else "jpg"
         temp_file = f"/tmp/astra_doc_conv_{int(time.time())}.{ext}"
         
-        media_data = await bridge_downloader.download_media(client, message)
-        if not media_data:
+        if not await bridge_downloader.download_media_to_file(client, message, temp_file):
             return await status_msg.edit(f"{UI.mono('error')} Source download failed.")
-        with open(temp_file, "wb") as f:
-            f.write(media_data)
         media_path = temp_file
 
         mimetype = "video/mp4" if ext == "mp4" else "image/jpeg"
@@ -509,11 +500,8 @@ async def toimg_handler(client: Client, message: Message):
         # Standard file path handling
         temp_file = f"/tmp/astra_img_conv_{int(time.time())}.jpg"
         
-        media_data = await bridge_downloader.download_media(client, message)
-        if not media_data:
+        if not await bridge_downloader.download_media_to_file(client, message, temp_file):
             return await status_msg.edit("❌ Failed to download document.")
-        with open(temp_file, "wb") as f:
-            f.write(media_data)
         media_path = temp_file
 
         # Ensure we send it explicitly without the document flag
@@ -542,11 +530,8 @@ async def pdf2img_handler(client: Client, message: Message):
     temp_pdf = f"/tmp/astra_pdf_in_{int(time.time())}.pdf"
     
     try:
-        media_data = await bridge_downloader.download_media(client, message)
-        if not media_data:
+        if not await bridge_downloader.download_media_to_file(client, message, temp_pdf):
             return await status_msg.edit("❌ Failed to download PDF document.")
-        with open(temp_pdf, "wb") as f:
-            f.write(media_data)
         media_path = temp_pdf
 
         import fitz  # PyMuPDF
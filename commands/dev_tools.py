@@ -1,5 +1,4 @@
 import json
-import asyncio
 
 from utils.state import state
 
@@ -59,11 +58,7 @@ async def db_tool_handler(client: Client, message: Message):
     # 4. DB DELETE
     elif sub in ["del", "delete", "rm"] and len(args) >= 2:
         key = args[1]
-        if key in state.state["configs"]:
-            del state.state["configs"][key]
-            from utils.database import db as db_core
-
-            asyncio.create_task(db_core.set("configs", state.state["configs"]))
+        if state.delete_config(key):
             return await edit_or_reply(message, f"🗑️ **DB:** Deleted override `{key}`.")
         return await edit_or_reply(message, f"❌ **DB:** Override `{key}` not found.")
 
@@ -133,13 +128,7 @@ async def delcfg_handler(client: Client, message: Message):
 
     key = args[0].upper()
 
-    if key in state.state.get("configs", {}):
-        del state.state["configs"][key]
-        import asyncio
-
-        from utils.database import db as db_core
-
-        asyncio.create_task(db_core.set("configs", state.state["configs"]))
+    if state.delete_config(key):
         await edit_or_reply(message, f"🗑️ **Config Deleted:** `{key}`")
     else:
         await edit_or_reply(message, f"❌ **Config Not Found:** `{key}`")
@@ -140,10 +140,22 @@ def _mark_help_seen(message_id: str) -> bool:
     return True
 
 
+def _manifest_commands():
+    """Static metadata of the active plugins (loaded or lazily registered)."""
+    try:
+        from utils.manifest import manifest_commands
+
+        return manifest_commands(PLUGIN_HANDLES.keys())
+    except Exception as e:
+        logger.debug(f"Plugin manifest unavailable for help: {e}")
+        return []
+
+
 def _unique_commands_by_name():
     """Return deduplicated command entries keyed by command name."""
     unique = {}
-    for cmd in COMMANDS_METADATA:
+    # Runtime registrations come last so they override the static manifest.
+    for cmd in _manifest_commands() + COMMANDS_METADATA:
         name = str(cmd.get("name", "")).strip().lower()
         if not name:
             continue
@@ -241,9 +253,9 @@ async def help_handler(client: Client, message: Message):
         total_cmds = len(unique_commands)
         total_usage = "N/A"
         try:
-            from utils.database import db
+            from utils.counters import counters
 
-            total_usage = str(await db.get("total_commands_v2", 0))
+            total_usage = str((await counters.summary())[1])
         except Exception:
             pass
 
@@ -12,6 +12,7 @@ import aiohttp
 from PIL import Image, ImageDraw, ImageFont
 from utils.bridge_downloader import bridge_downloader
 from utils.database import db
+from utils.seen_memes import seen_memes
 from utils.helpers import safe_edit, edit_or_reply
 from utils.error_reporter import handle_command_error
 from utils.ui_templates import UI
@@ -45,49 +46,6 @@ ALL_MEMES = INDIAN_MEMES + GLOBAL_MEMES
 ALL_NSFW_MEMES = list(set(INDIAN_NSFW_MEMES + GLOBAL_NSFW_MEMES))
 
 
-# ── Database Helpers ────────────────────────
-
-async def _db_ok() -> bool:
-    try:
-        return db.sqlite_conn is not None
-    except:
-        return False
-
-
-async def cleanup_old_seen(hours: int = 24):
-    try:
-        if not await _db_ok():
-            return
-        cutoff = int(time.time()) - (hours * 3600)
-        await db.sqlite_conn.execute("DELETE FROM seen_memes WHERE fetched_at < ?", (cutoff,))
-        await db.sqlite_conn.commit()
-    except Exception:
-        pass
-
-
-async def is_meme_seen(post_id: str) -> bool:
-    try:
-        if not await _db_ok():
-            return False
-        cur = await db.sqlite_conn.execute("SELECT 1 FROM seen_memes WHERE post_id = ?", (post_id,))
-        return await cur.fetchone() is not None
-    except:
-        return False
-
-
-async def mark_meme_seen(post_id: str, subreddit: str):
-    try:
-        if not await _db_ok():
-            return
-        await db.sqlite_conn.execute(
-            "INSERT OR IGNORE INTO seen_memes (post_id, subreddit, fetched_at) VALUES (?, ?, ?)",
-            (post_id, subreddit, int(time.time())),
-        )
-        await db.sqlite_conn.commit()
-    except Exception:
-        pass
-
-
 # ── Helpers ─────────────────────────────────
 
 def _is_video_post(pdata: dict, url: str) -> bool:
@@ -133,9 +91,10 @@ async def _fetch_via_meme_api(subreddits: List[str], nsfw: bool = False) -> Opti
                         if not memes and data.get("url"):
                             memes = [data]
                         random.shuffle(memes)
+                        unseen = set(await seen_memes.filter_unseen(m.get("postLink", "") for m in memes))
                         for meme in memes:
                             pid = meme.get("postLink", "")
-                            if await is_meme_seen(pid):
+                            if pid not in unseen:
                                 continue
                             if not nsfw and meme.get("nsfw"):
                                 continue
@@ -180,12 +139,13 @@ async def _fetch_via_reddit(subreddits: List[str], nsfw: bool = False) -> Option
                         if not posts:
                             continue
                         random.shuffle(posts)
+                        unseen = set(await seen_memes.filter_unseen(post.get("data", {}).get("name", "") for post in posts))
                         for post in posts:
                             p = post.get("data", {})
                             if not p or p.get("stickied"):
                                 continue
                             pid = p.get("name", "")
-                            if not pid or await is_meme_seen(pid):
+                            if not pid or pid not in unseen:
                                 continue
                             if not nsfw and p.get("over_18"):
                                 continue
@@ -272,12 +232,13 @@ async def _fetch_via_reddit_oauth(subreddits: List[str], nsfw: bool = False) ->
                         if not posts:
                             continue
                         random.shuffle(posts)
+                        unseen = set(await seen_memes.filter_unseen(post.get("data", {}).get("name", "") for post in posts))
                         for post in posts:
                             p = post.get("data", {})
                             if not p or p.get("stickied"):
                                 continue
                             pid = p.get("name", "")
-                            if not pid or await is_meme_seen(pid):
+                            if not pid or pid not in unseen:
                                 continue
                             if not nsfw and p.get("over_18"):
                                 continue
@@ -437,8 +398,14 @@ async def _fetch_via_reddit_rss(subreddits: List[str], nsfw: bool = False) -> Op
                     if not entries:
                         continue
                     random.shuffle(entries)
-                    for entry in entries:
-                        entry_id = entry.findtext("atom:id", "", ns) or entry.findtext("id", "") or entry.findtext("link", "")
+                    entry_ids = [
+                        entry.findtext("atom:id", "", ns) or entry.findtext("id", "") or entry.findtext("link", "")
+                        for entry in entries
+                    ]
+                    unseen = set(
+                        await seen_memes.filter_unseen(f"rss_{eid.split('/')[-1] or eid[-16:]}" for eid in entry_ids)
+                    )
+                    for entry, entry_id in zip(entries, entry_ids):
                         title = entry.findtext("atom:title", "", ns) or entry.findtext("title", "Meme")
                         content = (entry.findtext("atom:content", "", ns) or entry.findtext("content", "")
                                    or entry.findtext("atom:summary", "", ns) or entry.findtext("description", ""))
@@ -446,7 +413,7 @@ async def _fetch_via_reddit_rss(subreddits: List[str], nsfw: bool = False) -> Op
                         if not nsfw and is_nsfw_post:
                             continue
                         post_id = f"rss_{entry_id.split('/')[-1] or entry_id[-16:]}"
-                        if await is_meme_seen(post_id):
+                        if post_id not in unseen:
                             continue
                         img_match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', content, re.IGNORECASE)
                         img_url = img_match.group(1) if img_match else None
@@ -507,12 +474,13 @@ async def _fetch_via_redlib(subreddits: List[str], nsfw: bool = False) -> Option
                         if not posts:
                             continue
                         random.shuffle(posts)
+                        unseen = set(await seen_memes.filter_unseen(post.get("data", {}).get("name", "") for post in posts))
                         for post in posts:
                             p = post.get("data", {})
                             if not p or p.get("stickied"):
                                 continue
                             pid = p.get("name", "")
-                            if not pid or await is_meme_seen(pid):
+                            if not pid or pid not in unseen:
                                 continue
                             if not nsfw and p.get("over_18"):
                                 continue
@@ -546,8 +514,6 @@ async def fetch_meme(subreddits: List[str], nsfw: bool = False) -> Optional[Dict
     """Multi-source meme fetcher — 8 independent sources (image only).
     Order: meme-api → reddit-rss → redlib-proxy → reddit-oauth → reddit-direct → imgflip → 9gag → giphy
     """
-    await cleanup_old_seen(24)
-
     result = await _fetch_via_meme_api(subreddits, nsfw=nsfw)
     if result:
         return result
@@ -619,7 +585,7 @@ async def _meme_handler(client, message, subs, label, fallback_subs=None, **kwar
         if meme:
             ok = await send_meme_media(client, message.chat_id, meme, message.id)
             if ok:
-                await mark_meme_seen(meme["id"], meme["subreddit"])
+                await seen_memes.mark(meme["id"], meme["subreddit"])
                 await status_msg.delete()
             else:
                 await safe_edit(status_msg, f"❌ Media download failed.\n📎 URL: `{meme.get('url', '?')[:80]}`")
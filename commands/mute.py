@@ -26,12 +26,6 @@ async def mute_handler(client: Client, message: Message):
 
     # Store in state
     gid = message.chat_id
-    if "group_configs" not in state.state:
-        state.state["group_configs"] = {}
-    if gid not in state.state["group_configs"]:
-        state.state["group_configs"][gid] = {}
-
-    state.state["group_configs"][gid]["muted"] = is_muted
-    await state.save()
+    state.set_group_config(gid, "muted", is_muted)
 
     await edit_or_reply(message, f" 🤫 Group commands are now *{'MUTED' if is_muted else 'UNMUTED'}* for this group.")
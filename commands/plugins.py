@@ -1,5 +1,5 @@
 from astra import Client, Message
-from utils.plugin_utils import astra_command, COMMANDS_METADATA
+from utils.plugin_utils import astra_command, extract_args, COMMANDS_METADATA
 from utils.helpers import edit_or_reply
 from commands.help import normalize_category, get_label, CATEGORY_ORDER
 
@@ -8,11 +8,15 @@ from commands.help import normalize_category, get_label, CATEGORY_ORDER
     description="List all loaded plugin modules and command counts.",
     category="System & Bot",
     aliases=["pl", "modules"],
+    usage="[--timings]",
     is_public=True,
 )
 async def plugins_list_handler(client: Client, message: Message):
     """Displays a list of all loaded plugins and their command density."""
-    
+    args = extract_args(message)
+    if args and args[0].lower() in ("--timings", "-t", "timings"):
+        return await edit_or_reply(message, await _timings_report())
+
     # Organize by category
     categories = {}
     for cmd in COMMANDS_METADATA:
@@ -48,3 +52,51 @@ async def plugins_list_handler(client: Client, message: Message):
 
     output += f"{line}\nusage: `.help <command>`"
     await edit_or_reply(message, output)
+
+
+def _fmt_plugin(name: str, rec: dict) -> str:
+    mark = "" if rec.get("ok", True) else " ✗"
+    heavy = f" [{', '.join(rec['packages'][:3])}]" if rec.get("packages") else ""
+    return (
+        f"`{name.split('.')[-1]}`{mark} {rec.get('wall_ms', 0):.0f}ms "
+        f"cpu {rec.get('cpu_ms', 0):.0f}ms +{rec.get('rss_kb', 0) // 1024}MB{heavy}"
+    )
+
+
+async def _timings_report() -> str:
+    """Slowest plugin imports of the last boot plus the recent boot history."""
+    import time
+    from utils.plugin_profiler import plugin_profiler
+
+    history = await plugin_profiler.history()
+    profile = plugin_profiler.last or (history[-1] if history else None)
+    line = "───"
+    if not profile:
+        return f"**plugin timings**\n{line}\nno boot profile recorded yet"
+
+    output = (
+        f"**plugin timings** ({profile['mode']})\n"
+        f"{line}\n"
+        f"plugins: `{len(profile['plugins'])}`\n"
+        f"wall: `{profile['wall_ms'] / 1000:.2f}s` cpu: `{profile['cpu_ms'] / 1000:.2f}s`\n"
+        f"rss: `+{profile['rss_kb'] // 1024}MB` (total `{profile['rss_total_kb'] // 1024}MB`)\n"
+        f"{line}\n"
+    )
+    for name, rec in plugin_profiler.slowest(profile, 15):
+        output += _fmt_plugin(name, rec) + "\n"
+
+    if plugin_profiler.on_demand:
+        output += f"{line}\nloaded on demand\n"
+        for name, rec in sorted(plugin_profiler.on_demand.items(), key=lambda i: -i[1].get("wall_ms", 0))[:10]:
+            output += _fmt_plugin(name, rec) + "\n"
+
+    if len(history) > 1:
+        output += f"{line}\nrecent runs\n"
+        for past in reversed(history[-5:]):
+            stamp = time.strftime("%m-%d %H:%M", time.localtime(past.get("started_at", 0)))
+            output += (
+                f"{stamp} {past['mode']}: {past['wall_ms'] / 1000:.2f}s, "
+                f"{len(past['plugins'])} plugins, +{past['rss_kb'] // 1024}MB\n"
+            )
+    return output.rstrip()
+
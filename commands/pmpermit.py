@@ -94,7 +94,7 @@ async def pmpermit_handler(client: Client, message: Message):
         name = await get_contact_name(client, target_str)
         await edit_or_reply(message, f"{UI.mono('done')} {UI.mono(name)} access revoked.")
     elif action == "list":
-        permitted = state.state.get("pm_permits", [])
+        permitted = state.get_permitted_users()
         if not permitted:
             return await edit_or_reply(message, f"{UI.mono('empty')} No trusted nodes identified.")
 
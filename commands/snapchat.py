@@ -5,6 +5,7 @@ import cv2
 import numpy as np
 from PIL import Image
 from . import *
+from utils.bridge_downloader import bridge_downloader
 from utils.helpers import edit_or_reply
 import tempfile
 
@@ -46,13 +47,15 @@ async def snapchat_handler(client, message: Message):
 
     status = await edit_or_reply(message, f"🪄 Applying `{filter_type}` filter...")
     
-    file_path = await target.download()
-    if not file_path:
-        return await status.edit("❌ Failed to download media.")
-
+    fd, file_path = tempfile.mkstemp(prefix="snap_", suffix=".jpg")
+    os.close(fd)
     output_path = f"filtered_{os.path.basename(file_path)}"
     
     try:
+        # `target` is already the message holding the image; don't follow its reply.
+        if not await bridge_downloader.download_media_to_file(client, target, file_path, follow_quote=False):
+            return await status.edit("❌ Failed to download media.")
+
         # Run processing in thread to avoid blocking
         loop = asyncio.get_event_loop()
         result = await loop.run_in_executor(None, apply_ar_filter, file_path, output_path, filter_type)
@@ -1,6 +1,7 @@
 from . import *
 from utils.helpers import edit_or_reply
 from utils.ui_templates import UI
+from utils.yt_search import yt_search
 import time
 
 
@@ -30,31 +31,18 @@ async def song_handler(client: Client, message: Message):
         message, f"{UI.header('MEDIA TRACKING')}\n{UI.mono('processing')} Resolving: {UI.mono(query[:30])}..."
     )
 
-    import yt_dlp
-
-    ydl_opts = {
-        "quiet": True,
-        "extract_flat": True,
-        "force_generic_extractor": False,
-    }
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        if is_url:
-            result = ydl.extract_info(query, download=False)
-            res = result["entries"][0] if "entries" in result else result
-        else:
-            # Search YouTube for the best match
-            result = ydl.extract_info(f"ytsearch1:{query}", download=False)
-            results = result.get("entries", [])
-            if not results:
-                return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(query)}.")
-            res = results[0]
-
-    target_url = res.get("webpage_url") or f"https://www.youtube.com/watch?v={res.get('id')}"
-    title = res.get("title", "Unknown")
-    duration = res.get("duration_string") or (
-        f"{int(res['duration']) // 60}:{int(res['duration']) % 60:02d}" if res.get("duration") else "N/A"
-    )
+    if is_url:
+        res = await yt_search.lookup(query)
+    else:
+        # Search YouTube for the best match
+        results = await yt_search.search(query, limit=1)
+        res = results[0] if results else None
+    if not res:
+        return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(query)}.")
+
+    target_url = res["url"]
+    title = res["title"]
+    duration = res["duration_string"]
 
     await status_msg.edit(
         f"{UI.header('MEDIA TRACKING')}\n"
@@ -98,31 +86,18 @@ async def vsong_handler(client: Client, message: Message):
         message, f"{UI.header('MEDIA TRACKING')}\n{UI.mono('processing')} Resolving: {UI.mono(query[:30])}..."
     )
 
-    import yt_dlp
-
-    ydl_opts = {
-        "quiet": True,
-        "extract_flat": True,
-        "force_generic_extractor": False,
-    }
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        if is_url:
-            result = ydl.extract_info(query, download=False)
-            res = result["entries"][0] if "entries" in result else result
-        else:
-            # Search YouTube for the best match
-            result = ydl.extract_info(f"ytsearch1:{query}", download=False)
-            results = result.get("entries", [])
-            if not results:
-                return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(query)}.")
-            res = results[0]
-
-    target_url = res.get("webpage_url") or f"https://www.youtube.com/watch?v={res.get('id')}"
-    title = res.get("title", "Unknown")
-    duration = res.get("duration_string") or (
-        f"{int(res['duration']) // 60}:{int(res['duration']) % 60:02d}" if res.get("duration") else "N/A"
-    )
+    if is_url:
+        res = await yt_search.lookup(query)
+    else:
+        # Search YouTube for the best match
+        results = await yt_search.search(query, limit=1)
+        res = results[0] if results else None
+    if not res:
+        return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(query)}.")
+
+    target_url = res["url"]
+    title = res["title"]
+    duration = res["duration_string"]
 
     await status_msg.edit(
         f"{UI.header('MEDIA TRACKING')}\n"
@@ -27,23 +27,36 @@ async def stats_handler(client: Client, message: Message):
     uptime_str = f"{hours}h {minutes}m {seconds}s"
 
     # Analytics: Fetch usage data
-    from utils.database import db
-
-    total_cmds = await db.get("total_commands_v1", 0)
+    from utils.counters import counters
 
+    total_cmds = 0
     # Fetch Top 3 Commands
     top_cmds_text = "None"
     try:
-        cursor = await db.sqlite_conn.execute(
-            "SELECT key, value FROM state WHERE key LIKE 'cmd_usage:%' ORDER BY CAST(json_extract(value, '$') AS INTEGER) DESC LIMIT 3"
-        )
-        rows = await cursor.fetchall()
+        _, total_cmds = await counters.summary()
+        rows = await counters.top(3)
         if rows:
-            import json
-            top_cmds_text = ", ".join([f"`{r[0].split(':')[-1]}` ({json.loads(r[1])})" for r in rows])
+            top_cmds_text = ", ".join([f"`{cmd}` ({count})" for cmd, count in rows])
     except:
         pass
 
+    # Scheduler: running/limit (+queued) per workload class
+    from utils.scheduler import scheduler
+
+    queue_text = " · ".join(
+        f"{name} {d['running']}/{d['limit']}" + (f" (+{d['queued']})" if d["queued"] else "")
+        for name, d in scheduler.depths().items()
+    )
+
+    # Message media cache: reuse of replied media across commands
+    from utils.message_media_cache import message_media_cache
+
+    mc = message_media_cache.stats()
+    media_cache_text = (
+        f"{mc['hits']} hits · {mc['misses']} misses · "
+        f"{round(mc['memory'] / 1024 / 1024, 1)} MB RAM + {round(mc['disk'] / 1024 / 1024, 1)} MB disk"
+    )
+
     # Professional Premium Formatting
     stats_text = (
         "📊 **ASTRA RUNTIME ANALYTICS** 📊\n"
@@ -53,6 +66,8 @@ async def stats_handler(client: Client, message: Message):
         f"⚡ **CPU Load:** `{psutil.cpu_percent()}%`\n"
         f"🛰️ **Commands:** `{total_cmds}` processed\n"
         f"🏆 **Top Hooks:** {top_cmds_text}\n"
+        f"🧵 **Queues:** `{queue_text}`\n"
+        f"🗂️ **Media Cache:** `{media_cache_text}`\n"
         "━━━━━━━━━━━━━━━━━━━━━━\n"
         "✨ *System is running optimally.*"
     )
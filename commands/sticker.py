@@ -52,6 +52,11 @@ async def sticker_handler(client: Client, message: Message):
 )
 async def kang_handler(client: Client, message: Message):
     """Advanced sticker cloning/creation."""
+    await _kang(client, message)
+
+
+async def _kang(client: Client, message: Message):
+    """Shared body of .kang and .tiny (not a command, so it is not scheduled or counted twice)."""
     if not message.has_quoted_msg and not message.is_media:
         return await edit_or_reply(message, f"{UI.mono('error')} Target media required (sticker/image/video).")
 
@@ -191,4 +196,4 @@ async def getstkr_handler(client: Client, message: Message):
 )
 async def tiny_handler(client: Client, message: Message):
     """Tiny sticker plugin - centered on 512x512 canvas."""
-    await kang_handler(client, message)
+    await _kang(client, message)
@@ -5,8 +5,6 @@ Commands for the bot owner to manage sudo (authorized) users.
 Sudo users can execute most bot commands but cannot manage other sudo users.
 """
 
-import asyncio
-
 from config import config
 from utils.state import state
 
@@ -74,10 +72,7 @@ async def sudo_handler(client: Client, message: Message):
         if not state.is_sudo(target_uid):
             return await edit_or_reply(message, f" ❌ `{target_uid}` is not a registered sudo user.")
 
-        # Update state memory
-        state.state["sudo_users"].remove(target_uid)
-        # Persist change
-        await asyncio.to_thread(state.save)
+        state.remove_sudo(target_uid)
 
         await edit_or_reply(
             message, f" 🗑️ **Privileges Revoked.**\nUser `{target_uid}` removed from the sudo registry."
@@ -17,6 +17,7 @@ LINE = "---"
 
 # Utility for uptime calculation
 from utils.state import BOOT_TIME
+from utils.counters import counters
 from utils.database import db
 
 def get_uptime_str():
@@ -64,6 +65,8 @@ async def restart_cmd(client: Client, message: Message):
         "bot process will restart now"
     )
 
+    await counters.flush()
+    await db.flush()
     await asyncio.sleep(1.0)
     os.execv(sys.executable, [sys.executable] + sys.argv)
 
@@ -85,6 +88,8 @@ async def shutdown_cmd(client: Client, message: Message):
         "manual start required from host"
     )
 
+    await counters.flush()
+    await db.flush()
     await asyncio.sleep(1.0)
     sys.exit(0)
 
@@ -345,6 +350,8 @@ async def update_cmd(client: Client, message: Message):
         final_report += "status: restarting to apply update"
         
         await status_msg.edit(final_report)
+        await counters.flush()
+        await db.flush()
         await asyncio.sleep(1.0)
         os.execv(sys.executable, [sys.executable] + sys.argv)
 
@@ -354,24 +361,73 @@ async def update_cmd(client: Client, message: Message):
 
 @astra_command(
     name="reload",
-    description="Hot-reloads all Astra modules and plugins.",
+    description="Hot-reloads changed Astra modules and the plugins that depend on them.",
     category="System",
+    aliases=["re"],
+    usage="[changed | full | <plugin_name>] (e.g. .reload meme)",
     owner_only=True
 )
 async def reload_cmd(client: Client, message: Message):
-    """Hot-reloads all plugins and project modules."""
-    status_msg = await edit_or_reply(message, "reload\nstatus: reloading plugins")
-    
+    """Hot-reloads changed project modules, everything ('full'/'all') or one plugin."""
+    args = [a.lower() for a in extract_args(message)]
+    target = args[0] if args else "changed"
+
     try:
-        from utils.plugin_utils import reload_all_plugins
-        count = reload_all_plugins(client)
-        
-        await status_msg.edit(
+        if target not in ("changed", "full", "all"):
+            from utils.plugin_utils import PLUGIN_HANDLES, load_plugin, unload_plugin
+
+            plugin_name = f"commands.{target}"
+            file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{target}.py")
+            if not os.path.exists(file_path) and plugin_name not in PLUGIN_HANDLES:
+                return await edit_or_reply(message, f"reload\nerror: plugin {target} not found")
+
+            status_msg = await edit_or_reply(message, f"reload\nstatus: reloading {target}")
+            unload_plugin(client, plugin_name)
+            if load_plugin(client, plugin_name):
+                await status_msg.edit(f"reload complete\n{LINE}\nplugin: {target}")
+            else:
+                await status_msg.edit(f"reload failed\n{LINE}\nplugin: {target}")
+            return
+
+        if target in ("full", "all"):
+            status_msg = await edit_or_reply(message, "reload\nstatus: reloading plugins")
+            from utils.plugin_utils import reload_all_plugins
+            from utils.reloader import reloader
+            count = reload_all_plugins(client)
+            # Stateful modules were left alone; say which edits still need a restart.
+            pending = await reloader.resync()
+
+            text = (
+                "reload complete\n"
+                f"{LINE}\n"
+                f"plugins: {count}\n"
+                f"time: {time.strftime('%H:%M:%S')}"
+            )
+            if pending:
+                text += f"\nrestart needed: {', '.join(pending)}"
+            await status_msg.edit(text)
+            return
+
+        from utils.reloader import reloader
+        started = time.perf_counter()
+        result = await reloader.reload_changed(client)
+        elapsed = (time.perf_counter() - started) * 1000
+
+        changed = result["reloaded"] + result["plugins"]
+        text = (
             "reload complete\n"
             f"{LINE}\n"
-            f"plugins: {count}\n"
-            f"time: {time.strftime('%H:%M:%S')}"
+            f"modules: {len(result['reloaded'])}\n"
+            f"plugins: {len(result['plugins'])}\n"
+            f"took: {elapsed:.0f} ms\n"
         )
+        if not changed and not result["skipped"] and not result["failed"]:
+            text += "no changes detected\n"
+        if result["skipped"]:
+            text += f"restart needed: {', '.join(result['skipped'])}\n"
+        if result["failed"]:
+            text += f"failed: {', '.join(m.split('.')[-1] for m in result['failed'])}\n"
+        await edit_or_reply(message, text.rstrip())
     except Exception as e:
         from utils.error_reporter import ErrorReporter
         await ErrorReporter.report(client, message, e, context="Module Reload Failure")
@@ -498,13 +554,15 @@ async def clearcache_cmd(client: Client, message: Message):
     status_msg = await edit_or_reply(message, "cache\nstatus: clearing media cache")
     try:
         from utils.cache_manager import cache
-        result = cache.clear_cache()
+        result = await cache.clear_cache()
         if result["success"]:
             await status_msg.edit(
                 "cache cleared\n"
                 f"{LINE}\n"
                 f"files_deleted: {result['files_deleted']}\n"
-                f"freed: {result['freed_mb']} MB"
+                f"freed: {result['freed_mb']} MB\n"
+                f"entries: {result['entries']} urls -> {result['blobs']} files\n"
+                f"dedup_saved: {result['dedup_saved_mb']} MB"
             )
         else:
             await status_msg.edit(f"error: cache clear failed\n{result.get('error')}")
@@ -19,6 +19,7 @@ except ImportError:
     remove_bg = None
 
 from . import *
+from utils.bridge_downloader import bridge_downloader
 from utils.helpers import edit_or_reply, edit_or_reply
 
 @astra_command(
@@ -80,15 +81,13 @@ async def qrread_handler(client: Client, message: Message):
 
     status = await edit_or_reply(message, "Scanning QR code...")
     try:
-        media_path = await message.quoted.download()
-        if not media_path:
+        media_data = await bridge_downloader.download_media(client, message)
+        if not media_data:
             return await status.edit("Failed to download image.")
 
-        img = Image.open(media_path)
+        img = Image.open(io.BytesIO(media_data))
         decoded = decode_qr(img)
         
-        os.remove(media_path)
-        
         if not decoded:
             return await status.edit("No QR code found in the image.")
             
@@ -115,12 +114,9 @@ async def rmbg_handler(client: Client, message: Message):
 
     status = await edit_or_reply(message, "Removing background... (This may take a moment)")
     try:
-        media_path = await message.quoted.download()
-        if not media_path:
+        input_data = await bridge_downloader.download_media(client, message)
+        if not input_data:
             return await status.edit("Failed to download image.")
-
-        with open(media_path, "rb") as i:
-            input_data = i.read()
             
         # Run background removal
         output_data = remove_bg(input_data)
@@ -133,8 +129,6 @@ async def rmbg_handler(client: Client, message: Message):
         await status.delete()
         
         # Cleanup
-        if os.path.exists(media_path):
-            os.remove(media_path)
         if os.path.exists(temp_out):
             os.remove(temp_out)
             
@@ -40,11 +40,8 @@ async def apply_video_edit(client: Client, message: Message, edit_type: str):
     temp_out = f"/tmp/astra_media_out_{int(time.time())}.{'gif' if edit_type == 'togif' else 'mp3' if edit_type == 'audio' else 'mp4'}"
     
     try:
-        media_data = await bridge_downloader.download_media(client, message)
-        if not media_data:
+        if not await bridge_downloader.download_media_to_file(client, message, temp_in):
             return await status_msg.edit("❌ Failed to download video.")
-        with open(temp_in, "wb") as f:
-            f.write(media_data)
         media_path = temp_in
 
         def process_video():
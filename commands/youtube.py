@@ -1,6 +1,7 @@
 from . import *
 from utils.helpers import edit_or_reply
 from utils.ui_templates import UI
+from utils.yt_search import yt_search
 
 
 @astra_command(
@@ -42,29 +43,20 @@ async def youtube_handler(client: Client, message: Message):
         )
 
         try:
-            import yt_dlp
-
-            ydl_opts = {"quiet": True, "extract_flat": True}
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                search_result = ydl.extract_info(f"ytsearch1:{search_query}", download=False)
-                if search_result.get("entries"):
-                    entry = search_result["entries"][0]
-                    url = f"https://www.youtube.com/watch?v={entry['id']}"
-                    duration = entry.get("duration_string") or (
-                        f"{int(entry['duration']) // 60}:{int(entry['duration']) % 60:02d}"
-                        if entry.get("duration")
-                        else "N/A"
-                    )
-                    await status_msg.edit(
-                        f"{UI.header('MEDIA TRACKING')}\n"
-                        f"Title    : {UI.mono(entry['title'][:40])}\n"
-                        f"Duration : {UI.mono(duration)}\n\n"
-                        f"{UI.mono('processing')} Routing to local gateway..."
-                    )
-                else:
-                    return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(search_query)}.")
+            results = await yt_search.search(search_query, limit=1)
         except Exception as e:
             return await status_msg.edit(f"{UI.mono('error')} Network failure: {UI.mono(str(e))}")
+        if not results:
+            return await status_msg.edit(f"{UI.mono('error')} No matches found for {UI.mono(search_query)}.")
+
+        entry = results[0]
+        url = entry["url"]
+        await status_msg.edit(
+            f"{UI.header('MEDIA TRACKING')}\n"
+            f"Title    : {UI.mono(entry['title'][:40])}\n"
+            f"Duration : {UI.mono(entry['duration_string'])}\n\n"
+            f"{UI.mono('processing')} Routing to local gateway..."
+        )
 
     # Use MediaChannel for a "real-time" experience
     from utils.media_channel import MediaChannel
@@ -1,5 +1,6 @@
 from . import *
 from utils.helpers import edit_or_reply
+from utils.yt_search import yt_search
 
 
 @astra_command(
@@ -20,18 +21,7 @@ async def ytsearch_handler(client: Client, message: Message):
     status_msg = await edit_or_reply(message, f"📺 Searching YouTube for `{query}`...")
 
     try:
-        import yt_dlp
-
-        ydl_opts = {
-            "quiet": True,
-            "extract_flat": True,
-            "force_generic_extractor": False,
-        }
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            # yt-dlp search is very reliable
-            result = ydl.extract_info(f"ytsearch5:{query}", download=False)
-            results = result.get("entries", [])
+        results = await yt_search.search(query, limit=5)
 
         if not results:
             return await status_msg.edit(f"❌ No results found on YouTube for `{query}`.")
@@ -39,10 +29,10 @@ async def ytsearch_handler(client: Client, message: Message):
         text = f"📺 **YOUTUBE SEARCH**\n━━━━━━━━━━━━━━━━━━━━\n🔍 **Query:** `{query}`\n\n"
 
         for i, res in enumerate(results, 1):
-            title = res.get("title", "No Title")
-            link = f"https://www.youtube.com/watch?v={res.get('id')}"
-            duration = res.get("duration_string", "N/A")
-            views = res.get("view_count", "N/A")
+            title = res["title"]
+            link = res["url"]
+            duration = res["duration_string"]
+            views = res["views"] if res["views"] is not None else "N/A"
 
             text += f"{i}. **{title}**\n   🕒 `{duration}` | 👁️ `{views}`\n   🔗 {link}\n\n"
 
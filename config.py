@@ -129,6 +129,80 @@ class Config:
     # Interval for background database sync (in seconds)
     DATABASE_SYNC_INTERVAL = int(os.getenv("DATABASE_SYNC_INTERVAL", "300"))
 
+    # Group-commit window for SQLite writes: pending writes are flushed in one
+    # transaction after this many milliseconds or once the batch size is reached.
+    DB_FLUSH_INTERVAL_MS = int(os.getenv("DB_FLUSH_INTERVAL_MS", "25"))
+    DB_FLUSH_BATCH_SIZE = int(os.getenv("DB_FLUSH_BATCH_SIZE", "200"))
+    # Read-only WAL connections serving lookups and reports, so long reads
+    # never queue behind writes on the single writer connection.
+    SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "2"))
+
+    # MongoDB mirror writes go through a persisted outbox and one background
+    # writer: at most MONGO_WRITE_QUEUE_MAX documents are buffered in memory,
+    # sent MONGO_WRITE_BATCH_SIZE at a time; failures back off exponentially.
+    MONGO_WRITE_QUEUE_MAX = int(os.getenv("MONGO_WRITE_QUEUE_MAX", "10000"))
+    MONGO_WRITE_BATCH_SIZE = int(os.getenv("MONGO_WRITE_BATCH_SIZE", "500"))
+    MONGO_WRITE_INTERVAL_MS = int(os.getenv("MONGO_WRITE_INTERVAL_MS", "100"))
+    MONGO_RETRY_MAX_DELAY = int(os.getenv("MONGO_RETRY_MAX_DELAY", "60"))
+
+    # Command analytics are buffered in memory and flushed every N seconds;
+    # hourly buckets older than the retention window are pruned.
+    ANALYTICS_FLUSH_INTERVAL = int(os.getenv("ANALYTICS_FLUSH_INTERVAL", "30"))
+    ANALYTICS_RETENTION_DAYS = int(os.getenv("ANALYTICS_RETENTION_DAYS", "30"))
+
+    # Plugin Loading
+    # --------------
+    # With LAZY_PLUGINS, command-only plugins are registered from the plugin
+    # manifest and imported on first use. PLUGIN_WARMUP names plugins (e.g.
+    # "youtube,sticker") to import in the background after boot, followed by
+    # the plugins behind the PLUGIN_WARMUP_TOP most used commands.
+    LAZY_PLUGINS = os.getenv("LAZY_PLUGINS", "false").lower() == "true"
+    PLUGIN_WARMUP = [p.strip() for p in os.getenv("PLUGIN_WARMUP", "").split(",") if p.strip()]
+    PLUGIN_WARMUP_TOP = int(os.getenv("PLUGIN_WARMUP_TOP", "5"))
+    # Number of boot/reload import profiles kept for `.plugins --timings`.
+    PLUGIN_PROFILE_HISTORY = int(os.getenv("PLUGIN_PROFILE_HISTORY", "10"))
+    # Watch utils/ and commands/ and hot-reload changed modules (plus the
+    # modules importing them) every HOT_RELOAD_INTERVAL seconds.
+    HOT_RELOAD = os.getenv("HOT_RELOAD", "false").lower() == "true"
+    HOT_RELOAD_INTERVAL = float(os.getenv("HOT_RELOAD_INTERVAL", "2"))
+
+    # Command Scheduling
+    # ------------------
+    # Concurrency limits per command workload class; waiting commands queue
+    # per chat. SCHED_CPU_LIMIT=0 uses the number of CPU cores.
+    SCHED_LIGHT_LIMIT = int(os.getenv("SCHED_LIGHT_LIMIT", "32"))
+    SCHED_NETWORK_LIMIT = int(os.getenv("SCHED_NETWORK_LIMIT", "16"))
+    SCHED_CPU_LIMIT = int(os.getenv("SCHED_CPU_LIMIT", "0"))
+    SCHED_MEDIA_LIMIT = int(os.getenv("SCHED_MEDIA_LIMIT", "3"))
+
+    # Media Cache
+    # -----------
+    # Byte budget of the downloaded-media cache (least recently used entries
+    # are evicted beyond it), entry lifetime while CACHE_AUTO_DELETE is on,
+    # and how often the background janitor runs.
+    MEDIA_CACHE_MAX_MB = int(os.getenv("MEDIA_CACHE_MAX_MB", "2048"))
+    MEDIA_CACHE_TTL_HOURS = float(os.getenv("MEDIA_CACHE_TTL_HOURS", "2"))
+    MEDIA_CACHE_JANITOR_INTERVAL = int(os.getenv("MEDIA_CACHE_JANITOR_INTERVAL", "300"))
+
+    # Media Downloads
+    # ---------------
+    # Long-lived yt-dlp worker processes; each is replaced after
+    # YTDLP_WORKER_MAX_JOBS downloads. YTDLP_PREWARM starts one at boot.
+    # Replied-message media is pulled from the browser page in chunks of
+    # MEDIA_DOWNLOAD_CHUNK_KB; larger than MEDIA_DOWNLOAD_MAX_MB is refused.
+    MEDIA_DOWNLOAD_MAX_MB = int(os.getenv("MEDIA_DOWNLOAD_MAX_MB", "200"))
+    MEDIA_DOWNLOAD_CHUNK_KB = int(os.getenv("MEDIA_DOWNLOAD_CHUNK_KB", "1024"))
+    # Downloaded replied-message media is kept for reuse: in memory up to
+    # MESSAGE_MEDIA_CACHE_MB, colder entries spilled to disk up to the second budget.
+    MESSAGE_MEDIA_CACHE_MB = int(os.getenv("MESSAGE_MEDIA_CACHE_MB", "64"))
+    MESSAGE_MEDIA_CACHE_DISK_MB = int(os.getenv("MESSAGE_MEDIA_CACHE_DISK_MB", "512"))
+    YTDLP_WORKERS = int(os.getenv("YTDLP_WORKERS", "3"))
+    YTDLP_WORKER_MAX_JOBS = int(os.getenv("YTDLP_WORKER_MAX_JOBS", "25"))
+    YTDLP_PREWARM = os.getenv("YTDLP_PREWARM", "true").lower() == "true"
+    # YouTube search results are cached per normalized query.
+    YT_SEARCH_TTL = int(os.getenv("YT_SEARCH_TTL", "3600"))
+    YT_SEARCH_CACHE_SIZE = int(os.getenv("YT_SEARCH_CACHE_SIZE", "512"))
+
     # Third-party API Orchestration
     # -----------------------------
     @property
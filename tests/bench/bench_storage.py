@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Storage benchmark for Database and StateManager.
+
+Measures throughput and p50/p99 latency of the storage API under
+concurrent asyncio load, against SQLite alone and SQLite mirrored to an
+in-memory MongoDB stand-in (tests/bench/fake_mongo.py).
+
+Run:
+    python3 tests/bench/bench_storage.py
+    python3 tests/bench/bench_storage.py --mongo --mongo-latency-ms 2 --json bench.json
+    python3 tests/bench/bench_storage.py --json new.json --compare bench.json
+
+With --compare the script exits with status 1 when any scenario's
+throughput drops (or p99 latency grows) by more than --threshold.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def _measure(name, ops, concurrency, op, settle=None):
+    """Runs `op(i)` `ops` times across `concurrency` workers and summarizes latencies."""
+    latencies = []
+    counter = iter(range(ops))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            await op(i)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    if settle is not None:
+        await settle()
+    wall = time.perf_counter() - started
+
+    return {
+        "name": name,
+        "ops": ops,
+        "concurrency": concurrency,
+        "wall_s": round(wall, 4),
+        "ops_per_sec": round(ops / wall, 1) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 4),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 4),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 4),
+        "max_ms": round(max(latencies) * 1000, 4),
+    }
+
+
+async def run_suite(args):
+    from config import config
+    from utils import database as database_module
+    from utils.database import db
+    from utils.state import state
+
+    if args.mongo:
+        import fake_mongo
+
+        fake_mongo.FakeMotorClient.latency = args.mongo_latency_ms / 1000
+        database_module.AsyncIOMotorClient = fake_mongo.FakeMotorClient
+        config.MONGO_URI = "mongodb://localhost:27017/astra_bench"
+    else:
+        config.MONGO_URI = None
+
+    await state.initialize()
+    ops, conc = args.ops, args.concurrency
+    results = []
+
+    async def drain():
+        # Let background persistence tasks queue their writes, then commit them.
+        for _ in range(3):
+            await asyncio.sleep(0)
+        await db.flush()
+
+    # --- Database primitives ---
+    results.append(await _measure("db.set", ops, conc, lambda i: db.set(f"bench:set:{i % 1000}", {"n": i}), drain))
+    results.append(await _measure("db.get", ops, conc, lambda i: db.get(f"bench:set:{i % 1000}")))
+    results.append(await _measure("db.increment", ops, conc, lambda i: db.increment(f"bench:ctr:{i % 10}"), drain))
+    results.append(await _measure("db.delete", ops, conc, lambda i: db.delete(f"bench:set:{i % 1000}"), drain))
+
+    for i in range(200):
+        await db.set(f"bench:scan:{i}", i)
+    await drain()
+    scans = max(1, ops // 20)
+    results.append(
+        await _measure("db.get_all_with_prefix[200]", scans, conc, lambda i: db.get_all_with_prefix("bench:scan:"))
+    )
+
+    async def mixed(i):
+        roll = random.random()
+        key = f"bench:mix:{i % 500}"
+        if roll < 0.8:
+            await db.get(key)
+        elif roll < 0.95:
+            await db.set(key, i)
+        else:
+            await db.increment("bench:mix:counter")
+
+    results.append(await _measure("db.mixed[80r/15w/5inc]", ops, conc, mixed, drain))
+
+    # --- StateManager mutators (synchronous, persisted in the background) ---
+    async def permit(i):
+        uid = f"91{i % 2000:010d}@c.us"
+        state.permit_user(uid)
+        state.is_permitted(uid)
+        await asyncio.sleep(0)
+
+    async def deny(i):
+        state.deny_user(f"91{i % 2000:010d}@c.us")
+        await asyncio.sleep(0)
+
+    async def warn(i):
+        state.increment_pm_warning(f"92{i % 100:010d}@c.us")
+        await asyncio.sleep(0)
+
+    async def note(i):
+        state.set_note(f"note{i % 300}", "x" * 64)
+        await asyncio.sleep(0)
+
+    async def config_set(i):
+        state.set_config(f"BENCH_{i % 50}", i)
+        await asyncio.sleep(0)
+
+    results.append(await _measure("state.permit_user", ops, conc, permit, drain))
+    results.append(await _measure("state.deny_user", ops, conc, deny, drain))
+    results.append(await _measure("state.increment_pm_warning", ops, conc, warn, drain))
+    results.append(await _measure("state.set_note", ops, conc, note, drain))
+    results.append(await _measure("state.set_config", ops, conc, config_set, drain))
+
+    mongo_stats = {}
+    if args.mongo:
+        import fake_mongo
+
+        await db.close()
+        mongo_stats = {"round_trips": fake_mongo.FakeMotorClient.database.round_trips}
+    else:
+        await db.close()
+
+    return results, mongo_stats
+
+
+def compare(results, baseline_path, threshold):
+    """Returns human-readable regressions against a previous JSON report."""
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        base = baseline.get(result["name"])
+        if not base:
+            continue
+        if base["ops_per_sec"] and result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(f"{result['name']}: {base['ops_per_sec']} -> {result['ops_per_sec']} ops/s")
+        if base["p99_ms"] and result["p99_ms"] > base["p99_ms"] * (1 + threshold):
+            regressions.append(f"{result['name']}: p99 {base['p99_ms']} -> {result['p99_ms']} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ops", type=int, default=5000, help="operations per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent asyncio workers")
+    parser.add_argument("--mongo", action="store_true", help="mirror writes to the in-memory MongoDB stand-in")
+    parser.add_argument("--mongo-latency-ms", type=float, default=0.0, help="simulated MongoDB round-trip time")
+    parser.add_argument("--json", help="write machine-readable results to this path ('-' for stdout)")
+    parser.add_argument("--compare", help="baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="astra_bench_")
+    os.environ["SQLITE_PATH"] = os.path.join(workdir, "bench_state.db")
+
+    random.seed(1234)
+    results, mongo_stats = asyncio.run(run_suite(args))
+
+    report = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "ops": args.ops,
+            "concurrency": args.concurrency,
+            "mongo": args.mongo,
+            "mongo_latency_ms": args.mongo_latency_ms,
+            **({"mongo_round_trips": mongo_stats["round_trips"]} if mongo_stats else {}),
+        },
+        "results": results,
+    }
+
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'scenario':<30} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}", file=out)
+    for r in results:
+        print(f"{r['name']:<30} {r['ops_per_sec']:>10} {r['p50_ms']:>9} {r['p99_ms']:>9} {r['max_ms']:>9}", file=out)
+
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+In-memory stand-in for a Motor client, used by the storage benchmarks.
+Supports the subset of the collection API the Database layer calls and
+can add a fixed latency per round-trip to mimic a remote server.
+"""
+
+import asyncio
+import copy
+import re
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = doc.get(field)
+        if isinstance(cond, dict):
+            if "$gte" in cond and (value is None or value < cond["$gte"]):
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$regex" in cond and not (isinstance(value, str) and re.search(cond["$regex"], value)):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+def _parent(doc, path):
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    return doc, leaf
+
+
+def _apply(doc, update):
+    for path, value in update.get("$set", {}).items():
+        parent, leaf = _parent(doc, path)
+        parent[leaf] = copy.deepcopy(value)
+    for path, value in update.get("$inc", {}).items():
+        parent, leaf = _parent(doc, path)
+        parent[leaf] = parent.get(leaf, 0) + value
+    for path in update.get("$unset", {}):
+        parent, leaf = _parent(doc, path)
+        parent.pop(leaf, None)
+
+
+class FakeCollection:
+    def __init__(self, latency: float):
+        self.docs = {}
+        self.latency = latency
+        self.round_trips = 0
+
+    async def _round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def create_index(self, *args, **kwargs):
+        await self._round_trip()
+
+    def find(self, query=None, projection=None):
+        self.round_trips += 1
+        return _Cursor([copy.deepcopy(d) for d in self.docs.values() if _matches(d, query or {})])
+
+    async def find_one(self, query):
+        await self._round_trip()
+        for doc in self.docs.values():
+            if _matches(doc, query):
+                return copy.deepcopy(doc)
+        return None
+
+    async def count_documents(self, query):
+        await self._round_trip()
+        return sum(1 for d in self.docs.values() if _matches(d, query))
+
+    def _update(self, query, update, upsert):
+        doc = self.docs.get(query["_id"])
+        if doc is None:
+            if not upsert:
+                return
+            doc = self.docs[query["_id"]] = {"_id": query["_id"]}
+        _apply(doc, update)
+
+    async def update_one(self, query, update, upsert=False):
+        await self._round_trip()
+        self._update(query, update, upsert)
+
+    async def delete_one(self, query):
+        await self._round_trip()
+        self.docs.pop(query["_id"], None)
+
+    async def delete_many(self, query):
+        await self._round_trip()
+        for key in [k for k, d in self.docs.items() if _matches(d, query)]:
+            del self.docs[key]
+
+    async def bulk_write(self, requests, ordered=True):
+        await self._round_trip()
+        for request in requests:
+            kind = type(request).__name__
+            query = request._filter
+            if kind == "DeleteOne":
+                self.docs.pop(query["_id"], None)
+            elif kind == "ReplaceOne":
+                self.docs[query["_id"]] = {"_id": query["_id"], **copy.deepcopy(request._doc)}
+            else:
+                self._update(query, request._doc, request._upsert)
+
+
+class FakeDatabase:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.collections = {}
+
+    def __getitem__(self, name):
+        if name not in self.collections:
+            self.collections[name] = FakeCollection(self.latency)
+        return self.collections[name]
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    @property
+    def round_trips(self) -> int:
+        return sum(c.round_trips for c in self.collections.values())
+
+
+class FakeMotorClient:
+    """Drop-in for AsyncIOMotorClient(uri); every database name maps to one FakeDatabase."""
+
+    latency = 0.0
+    database = None
+
+    def __init__(self, uri, *args, **kwargs):
+        if FakeMotorClient.database is None:
+            FakeMotorClient.database = FakeDatabase(FakeMotorClient.latency)
+
+    def __getitem__(self, name):
+        return FakeMotorClient.database
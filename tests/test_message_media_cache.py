@@ -0,0 +1,73 @@
+"""
+Tests for the replied-media cache (utils/message_media_cache.py).
+
+Run: python3 -m pytest tests/test_message_media_cache.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.message_media_cache as cache_module
+from utils.message_media_cache import MessageMediaCache
+
+MB = 1024 * 1024
+
+
+def _cache(monkeypatch, tmp_path, memory_mb, disk_mb):
+    monkeypatch.setattr(cache_module.config, "MESSAGE_MEDIA_CACHE_MB", memory_mb)
+    monkeypatch.setattr(cache_module.config, "MESSAGE_MEDIA_CACHE_DISK_MB", disk_mb)
+    return MessageMediaCache(spill_dir=str(tmp_path / "spill"))
+
+
+def test_hits_and_misses_are_counted(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, 1, 1)
+
+    async def main():
+        assert await cache.get("a") is None
+        await cache.put("a", b"image")
+        return await cache.get("a")
+
+    assert asyncio.run(main()) == b"image"
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_cold_entries_spill_to_disk_then_fall_off(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, 1, 1)
+    blobs = {key: bytes([n]) * (MB // 2) for n, key in enumerate("abcde")}
+
+    async def main():
+        for key in "abc":
+            await cache.put(key, blobs[key])
+        # a spilled to disk, b and c in memory.
+        assert cache.stats()["memory"] == MB and cache.stats()["disk"] == MB // 2
+        await cache.put("d", blobs["d"])
+        # Reading a back promotes it; the coldest in-memory entry (c) spills.
+        assert await cache.get("a") == blobs["a"]
+        await cache.put("e", blobs["e"])
+        # d spills too, and the full disk budget drops the oldest spill (b).
+        assert await cache.get("b") is None
+        assert await cache.get("c") == blobs["c"]
+        assert cache.stats()["entries"] == 4
+
+    asyncio.run(main())
+    assert len(os.listdir(tmp_path / "spill")) == 2
+
+
+def test_files_round_trip_through_disk(monkeypatch, tmp_path):
+    cache = _cache(monkeypatch, tmp_path, 0, 1)
+    source, target = tmp_path / "in.mp4", tmp_path / "out.mp4"
+    source.write_bytes(b"video" * 100)
+
+    async def main():
+        await cache.put_file("v", str(source))
+        source.unlink()
+        assert await cache.copy_to("v", str(target)) == 500
+        # Too large for either budget: not cached at all.
+        await cache.put("big", b"x" * (2 * MB))
+        assert await cache.get("big") is None
+
+    asyncio.run(main())
+    assert target.read_bytes() == b"video" * 100
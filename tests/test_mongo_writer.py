@@ -0,0 +1,174 @@
+"""
+Tests for the MongoDB write-behind pipeline (utils/mongo_writer.py).
+Uses a small in-memory stand-in for a Motor database.
+
+Run: python3 -m pytest tests/test_mongo_writer.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from config import config
+from utils.mongo_writer import MongoWriter, delete_op, merge_ops, to_request, update_op
+
+
+class FakeCollection:
+    """Applies bulk requests to dicts; can be told to fail."""
+
+    def __init__(self):
+        self.docs = {}
+        self.batches = []
+        self.down = False
+        self.reject = set()
+
+    async def bulk_write(self, requests, ordered=True):
+        if self.down:
+            raise AutoReconnect("connection refused")
+        self.batches.append(len(requests))
+        errors = []
+        for index, request in enumerate(requests):
+            _id = request._filter["_id"]
+            if _id in self.reject:
+                errors.append({"index": index, "code": 121, "errmsg": "rejected"})
+                continue
+            name = type(request).__name__
+            if name == "DeleteOne":
+                self.docs.pop(_id, None)
+            elif name == "ReplaceOne":
+                self.docs[_id] = dict(request._doc)
+            else:
+                target = self.docs.setdefault(_id, {})
+                for path, value in request._doc.get("$set", {}).items():
+                    _walk(target, path)[path.split(".")[-1]] = value
+                for path, value in request._doc.get("$inc", {}).items():
+                    parent = _walk(target, path)
+                    leaf = path.split(".")[-1]
+                    parent[leaf] = parent.get(leaf, 0) + value
+                for path in request._doc.get("$unset", {}):
+                    _walk(target, path).pop(path.split(".")[-1], None)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "writeConcernErrors": []})
+
+
+def _walk(doc, path):
+    for part in path.split(".")[:-1]:
+        doc = doc.setdefault(part, {})
+    return doc
+
+
+class FakeDatabase(dict):
+    def __missing__(self, name):
+        self[name] = FakeCollection()
+        return self[name]
+
+
+class Outbox:
+    """In-memory stand-in for the SQLite mongo_outbox table."""
+
+    def __init__(self):
+        self.rows = {}
+        self.seq = 0
+
+    def add(self, collection, doc_id, op):
+        self.seq += 1
+        self.rows[self.seq] = (collection, doc_id, op)
+        return [(self.seq, collection, doc_id, op)]
+
+    async def load(self, after_seq, limit):
+        seqs = sorted(s for s in self.rows if s > after_seq)[:limit]
+        return [(s, *self.rows[s]) for s in seqs]
+
+    async def ack(self, seqs):
+        for seq in seqs:
+            self.rows.pop(seq, None)
+
+
+def _writer():
+    mongo, outbox, writer = FakeDatabase(), Outbox(), MongoWriter()
+    writer.mongo_db, writer._load, writer._ack = mongo, outbox.load, outbox.ack
+    return mongo, outbox, writer
+
+
+def test_merge_sums_increments_and_keeps_last_set():
+    op = merge_ops(update_op(inc={"value": 2}), update_op(inc={"value": 3}, set={"updated_at": 1}))
+    op = merge_ops(op, update_op(set={"updated_at": 2}))
+    assert op["f"] == {"value": ["inc", 5], "updated_at": ["set", 2]}
+
+
+def test_merge_folds_nested_paths_into_parent_set():
+    op = merge_ops(update_op(set={"members": {"a": 1}}), update_op(set={"members.b": 2}))
+    op = merge_ops(op, update_op(unset=["members.a"]))
+    assert op["f"] == {"members": ["set", {"b": 2}]}
+
+
+def test_delete_then_update_becomes_replace():
+    op = merge_ops(delete_op(), update_op(inc={"value": 1}, set={"updated_at": 5}))
+    assert op == {"k": "replace", "doc": {"value": 1, "updated_at": 5}}
+    assert type(to_request("k", op)).__name__ == "ReplaceOne"
+
+
+def test_writes_are_coalesced_into_one_bulk_write():
+    mongo, outbox, writer = _writer()
+    for i in range(100):
+        writer.submit(outbox.add("state", "hits", update_op(inc={"value": 1})))
+    writer.submit(outbox.add("state", "name", update_op(set={"value": "a"})))
+    writer.submit(outbox.add("state", "name", update_op(set={"value": "b"})))
+
+    asyncio.run(writer.drain())
+
+    assert mongo["state"].batches == [2]
+    assert mongo["state"].docs == {"hits": {"value": 100}, "name": {"value": "b"}}
+    assert outbox.rows == {}
+
+
+def test_failed_batch_is_retried_without_losing_order():
+    mongo, outbox, writer = _writer()
+    writer.submit(outbox.add("state", "n", update_op(set={"value": 1})))
+    mongo["state"].down = True
+    try:
+        asyncio.run(writer.drain())
+    except ConnectionError:
+        pass
+    assert len(outbox.rows) == 1
+
+    writer.submit(outbox.add("state", "n", update_op(inc={"value": 4})))
+    mongo["state"].down = False
+    asyncio.run(writer.drain())
+
+    assert mongo["state"].docs == {"n": {"value": 5}}
+    assert outbox.rows == {}
+
+
+def test_rejected_documents_do_not_block_the_batch():
+    mongo, outbox, writer = _writer()
+    mongo["state"].reject = {"bad"}
+    writer.submit(outbox.add("state", "bad", update_op(set={"value": 1})))
+    writer.submit(outbox.add("state", "good", update_op(set={"value": 2})))
+
+    try:
+        asyncio.run(writer.drain())
+    except ConnectionError:
+        pass
+
+    assert mongo["state"].docs == {"good": {"value": 2}}
+    assert [row[1] for row in outbox.rows.values()] == ["bad"]
+
+
+def test_overflow_spills_to_outbox_and_replays_in_order(monkeypatch):
+    monkeypatch.setattr(config, "MONGO_WRITE_QUEUE_MAX", 2)
+    monkeypatch.setattr(config, "MONGO_WRITE_BATCH_SIZE", 2)
+    mongo, outbox, writer = _writer()
+    for i in range(5):
+        writer.submit(outbox.add("state", f"k{i}", update_op(set={"value": i})))
+    writer.submit(outbox.add("state", "k0", update_op(inc={"value": 10})))
+    assert writer.backlog == 2
+
+    asyncio.run(writer.drain())
+
+    assert mongo["state"].docs == {f"k{i}": {"value": i + (10 if i == 0 else 0)} for i in range(5)}
+    assert outbox.rows == {}
@@ -0,0 +1,120 @@
+"""
+Tests for the command scheduler (utils/scheduler.py).
+
+Run: python3 -m pytest tests/test_scheduler.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import config
+from utils.scheduler import CPU, MEDIA, CommandScheduler, workload_for
+
+
+def test_workload_defaults_per_module_and_explicit_override():
+    assert workload_for("youtube") == MEDIA
+    assert workload_for("ping") == "light"
+    assert workload_for("ping", "cpu") == "cpu"
+
+
+def test_limit_is_enforced_and_queue_position_reported(monkeypatch):
+    monkeypatch.setattr(config, "SCHED_MEDIA_LIMIT", 1)
+    scheduler = CommandScheduler()
+    order, positions = [], []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def job(name, wait=False):
+            order.append(f"start {name}")
+            if wait:
+                await gate.wait()
+            order.append(f"end {name}")
+
+        async def queued(position):
+            positions.append(position)
+
+        first = asyncio.create_task(scheduler.run(MEDIA, "a", lambda: job("a1", wait=True)))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(scheduler.run(MEDIA, "a", lambda: job("a2"), queued))
+        third = asyncio.create_task(scheduler.run(MEDIA, "b", lambda: job("b1"), queued))
+        await asyncio.sleep(0)
+
+        assert scheduler.depths()[MEDIA] == {"running": 1, "queued": 2, "limit": 1}
+        gate.set()
+        await asyncio.gather(first, second, third)
+
+    asyncio.run(main())
+    assert order == ["start a1", "end a1", "start a2", "end a2", "start b1", "end b1"]
+    assert positions == [1, 2]
+    assert scheduler.depths()[MEDIA]["running"] == 0
+
+
+def test_chats_take_turns(monkeypatch):
+    monkeypatch.setattr(config, "SCHED_MEDIA_LIMIT", 1)
+    scheduler = CommandScheduler()
+    started = []
+
+    async def main():
+        gate = asyncio.Event()
+
+        async def job(name):
+            started.append(name)
+            if name == "busy":
+                await gate.wait()
+
+        tasks = [asyncio.create_task(scheduler.run(MEDIA, "x", lambda: job("busy")))]
+        await asyncio.sleep(0)
+        for name, chat in [("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b")]:
+            tasks.append(asyncio.create_task(scheduler.run(MEDIA, chat, lambda n=name: job(n))))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert started == ["busy", "a1", "b1", "a2", "a3"]
+
+
+def test_cancelled_waiter_gives_up_its_place(monkeypatch):
+    monkeypatch.setattr(config, "SCHED_MEDIA_LIMIT", 1)
+    scheduler = CommandScheduler()
+
+    async def main():
+        gate = asyncio.Event()
+        first = asyncio.create_task(scheduler.run(MEDIA, "a", gate.wait))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(scheduler.run(MEDIA, "b", lambda: asyncio.sleep(0)))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.depths()[MEDIA]["queued"] == 0
+        gate.set()
+        await first
+
+    asyncio.run(main())
+    assert scheduler.depths()[MEDIA] == {"running": 0, "queued": 0, "limit": 1}
+
+
+def test_nested_run_reuses_the_held_slot(monkeypatch):
+    monkeypatch.setattr(config, "SCHED_CPU_LIMIT", 1)
+    scheduler = CommandScheduler()
+
+    async def main():
+        async def inner():
+            # A task spawned by the job does not inherit the slot.
+            spawned = asyncio.create_task(scheduler.run(CPU, "c", lambda: asyncio.sleep(0, "spawned")))
+            await asyncio.sleep(0)
+            assert scheduler.depths()[CPU] == {"running": 1, "queued": 1, "limit": 1}
+            return "inner", spawned
+
+        async def outer():
+            return await scheduler.run(CPU, "c", inner)
+
+        result, spawned = await asyncio.wait_for(scheduler.run(CPU, "c", outer), 1)
+        return result, await asyncio.wait_for(spawned, 1)
+
+    assert asyncio.run(main()) == ("inner", "spawned")
+    assert scheduler.depths()[CPU] == {"running": 0, "queued": 0, "limit": 1}
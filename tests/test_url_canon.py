@@ -0,0 +1,138 @@
+"""
+Tests for media cache URL canonicalization (utils/url_canon.py).
+
+Run: python3 -m pytest tests/test_url_canon.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.url_canon import canonicalize
+
+
+def _all_equal(urls, expected):
+    assert {canonicalize(url) for url in urls} == {expected}
+
+
+def test_youtube_link_shapes():
+    _all_equal(
+        [
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            "https://youtube.com/watch?v=dQw4w9WgXcQ&t=10s&si=abc",
+            "https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+            "https://music.youtube.com/watch?v=dQw4w9WgXcQ&list=RDAMVM",
+            "https://youtu.be/dQw4w9WgXcQ?si=XyZ",
+            "youtu.be/dQw4w9WgXcQ",
+            "https://www.youtube.com/shorts/dQw4w9WgXcQ?feature=share",
+            "https://www.youtube.com/embed/dQw4w9WgXcQ",
+            "https://www.youtube.com/live/dQw4w9WgXcQ",
+        ],
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+    )
+    assert (
+        canonicalize("https://youtube.com/playlist?list=PL123&si=x")
+        == "https://www.youtube.com/playlist?list=PL123"
+    )
+
+
+def test_instagram_posts_reels_and_stories():
+    _all_equal(
+        [
+            "https://www.instagram.com/p/C1a2B3c4D5e/",
+            "https://instagram.com/reel/C1a2B3c4D5e/?igsh=MTc4",
+            "https://www.instagram.com/reels/C1a2B3c4D5e",
+            "https://www.instagram.com/some.user/p/C1a2B3c4D5e/?img_index=1",
+            "https://instagr.am/p/C1a2B3c4D5e",
+        ],
+        "https://www.instagram.com/p/C1a2B3c4D5e/",
+    )
+    assert (
+        canonicalize("https://instagram.com/stories/Some.User/3301234567890123456?igshid=abc")
+        == "https://www.instagram.com/stories/some.user/3301234567890123456/"
+    )
+
+
+def test_reddit_posts():
+    _all_equal(
+        [
+            "https://www.reddit.com/r/pics/comments/1abcde/some_title/",
+            "https://old.reddit.com/r/pics/comments/1abcde/some_title/?utm_source=share",
+            "https://new.reddit.com/comments/1ABCDE",
+            "https://redd.it/1abcde",
+        ],
+        "https://www.reddit.com/comments/1abcde",
+    )
+
+
+def test_twitter_and_x_statuses():
+    _all_equal(
+        [
+            "https://twitter.com/someone/status/1790000000000000000",
+            "https://x.com/someone/status/1790000000000000000?s=20&t=abc",
+            "https://mobile.twitter.com/someone/status/1790000000000000000/video/1",
+            "https://fxtwitter.com/someone/status/1790000000000000000",
+            "https://x.com/i/web/status/1790000000000000000",
+        ],
+        "https://x.com/i/status/1790000000000000000",
+    )
+
+
+def test_facebook_videos_and_reels():
+    _all_equal(
+        [
+            "https://www.facebook.com/watch/?v=1234567890",
+            "https://m.facebook.com/watch?v=1234567890&mibextid=abc",
+            "https://www.facebook.com/somepage/videos/1234567890/",
+            "https://www.facebook.com/somepage/videos/a-title/1234567890",
+            "https://www.facebook.com/reel/1234567890?fbclid=xyz",
+            "https://web.facebook.com/video.php?v=1234567890",
+        ],
+        "https://www.facebook.com/watch/?v=1234567890",
+    )
+
+
+def test_pinterest_pins():
+    _all_equal(
+        [
+            "https://www.pinterest.com/pin/123456789012345678/",
+            "https://in.pinterest.com/pin/123456789012345678/?utm_source=app",
+            "https://pinterest.co.uk/pin/123456789012345678",
+            "https://www.pinterest.com/pin/cute-cat-pictures--123456789012345678/",
+        ],
+        "https://www.pinterest.com/pin/123456789012345678/",
+    )
+
+
+def test_soundcloud_tracks_and_sets():
+    _all_equal(
+        [
+            "https://soundcloud.com/Artist/Track-Name",
+            "https://m.soundcloud.com/artist/track-name?si=abc&utm_medium=text",
+            "https://soundcloud.com/artist/track-name/",
+        ],
+        "https://soundcloud.com/artist/track-name",
+    )
+    assert canonicalize("https://soundcloud.com/artist/sets/my-set?si=1") == "https://soundcloud.com/artist/sets/my-set"
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        # Short links need a redirect to resolve; only tracking is stripped.
+        ("https://on.soundcloud.com/AbCd?si=1", "https://on.soundcloud.com/AbCd"),
+        ("https://pin.it/abc123", "https://pin.it/abc123"),
+        # Unknown sites keep meaningful parameters in a stable order.
+        ("https://Example.com/video/?b=2&utm_source=x&a=1#top", "https://example.com/video?a=1&b=2"),
+    ],
+)
+def test_generic_cleanup(url, expected):
+    assert canonicalize(url) == expected
+
+
+def test_different_content_stays_distinct():
+    assert canonicalize("https://youtu.be/dQw4w9WgXcQ") != canonicalize("https://youtu.be/aaaaaaaaaaa")
+    assert canonicalize("https://x.com/a/status/1") != canonicalize("https://x.com/a/status/2")
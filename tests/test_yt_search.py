@@ -0,0 +1,82 @@
+"""
+Tests for the YouTube search resolver (utils/yt_search.py).
+
+Run: python3 -m pytest tests/test_yt_search.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import utils.yt_search as yt_search_module
+from utils.yt_search import YouTubeSearch, normalize_query
+
+
+def _fake_extract(calls):
+    def extract(target):
+        calls.append(target)
+        time.sleep(0.05)
+        limit = int(target[len("ytsearch") : target.index(":")]) if target.startswith("ytsearch") else 1
+        return [{"id": f"id{i}", "title": f"T{i}", "url": f"https://www.youtube.com/watch?v=id{i}"} for i in range(limit)]
+
+    return extract
+
+
+def test_normalize_query():
+    assert normalize_query("  Never   Gonna\tGive ") == "never gonna give"
+
+
+def test_concurrent_identical_searches_share_one_lookup(monkeypatch):
+    calls = []
+    monkeypatch.setattr(yt_search_module, "_extract", _fake_extract(calls))
+    search = YouTubeSearch()
+
+    async def main():
+        return await asyncio.gather(search.search("Never Gonna"), search.search("never  gonna "))
+
+    first, second = asyncio.run(main())
+    assert first == second == [{"id": "id0", "title": "T0", "url": "https://www.youtube.com/watch?v=id0"}]
+    assert calls == ["ytsearch1:never gonna"]
+
+
+def test_cache_serves_repeats_and_shorter_requests(monkeypatch):
+    calls = []
+    monkeypatch.setattr(yt_search_module, "_extract", _fake_extract(calls))
+    search = YouTubeSearch()
+
+    async def main():
+        five = await search.search("lofi", limit=5)
+        one = await search.search("LOFI", limit=1)
+        return five, one
+
+    five, one = asyncio.run(main())
+    assert len(five) == 5 and one == five[:1]
+    assert calls == ["ytsearch5:lofi"]
+
+
+def test_expired_and_failed_lookups_are_retried(monkeypatch):
+    calls = []
+    monkeypatch.setattr(yt_search_module, "_extract", _fake_extract(calls))
+    monkeypatch.setattr(yt_search_module.config, "YT_SEARCH_TTL", -1)
+    search = YouTubeSearch()
+
+    def boom(target):
+        calls.append(target)
+        raise RuntimeError("network down")
+
+    async def main():
+        await search.search("a")
+        await search.search("a")
+        monkeypatch.setattr(yt_search_module, "_extract", boom)
+        try:
+            await search.search("b")
+        except RuntimeError:
+            pass
+        monkeypatch.setattr(yt_search_module, "_extract", _fake_extract(calls))
+        return await search.search("b")
+
+    assert asyncio.run(main())[0]["id"] == "id0"
+    assert calls == ["ytsearch1:a", "ytsearch1:a", "ytsearch1:b", "ytsearch1:b"]
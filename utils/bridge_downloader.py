@@ -1,8 +1,13 @@
 import asyncio
 import base64
+import io
 import logging
 import os
-from typing import Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Optional, Tuple
+
+from config import config
+from utils.message_media_cache import message_media_cache
 
 from astra import Client
 from astra.models import Message
@@ -12,7 +17,7 @@ logger = logging.getLogger("Astra.BridgeDownloader")
 # Self-contained JS that resolves a message by short/full ID and downloads its media.
 # This bypasses the engine's retrieveMedia entirely for maximum reliability.
 INLINE_DOWNLOAD_JS = """
-(async (msgRef) => {
+(async ({ msgRef, maxBytes }) => {
     const Store = window.Astra.initializeEngine();
     const repo = Store.Msg || Store.MessageRepo || Store.MsgRepo;
     let msg = null;
@@ -163,112 +168,243 @@ INLINE_DOWNLOAD_JS = """
 
     if (!buffer) return { error: 'download_failed' };
 
-    // Convert to base64 using FileReader (fast, no char-by-char loop)
-    const b = new Blob([buffer instanceof ArrayBuffer ? new Uint8Array(buffer) : buffer]);
-    const b64 = await new Promise((resolve, reject) => {
-        const reader = new FileReader();
-        reader.onload = () => resolve(reader.result.split(',')[1]);
-        reader.onerror = reject;
-        reader.readAsDataURL(b);
-    });
+    const bytes = buffer instanceof ArrayBuffer ? new Uint8Array(buffer) : buffer;
+    if (maxBytes && bytes.byteLength > maxBytes) return { error: 'too_large', size: bytes.byteLength };
+
+    // Keep the decrypted bytes in the page; Python pulls them in chunks (READ_CHUNK_JS).
+    const stash = (window.__astraMediaStash = window.__astraMediaStash || {});
+    const now = Date.now();
+    for (const [key, entry] of Object.entries(stash)) {
+        if (now - entry.at > 300000) delete stash[key];  // abandoned transfers
+    }
+    const token = `${now.toString(36)}${Math.random().toString(36).slice(2)}`;
+    stash[token] = { bytes, at: now };
 
     return {
-        data: b64,
+        token,
         mimetype: msg.mimetype || 'application/octet-stream',
-        size: buffer.byteLength,
+        size: bytes.byteLength,
         resolvedId: msg.id && (msg.id._serialized || msg.id.id) ? (msg.id._serialized || msg.id.id) : msgId
     };
 })
 """
 
+# Returns one base64 chunk of a staged buffer (FileReader: fast, no char-by-char loop).
+READ_CHUNK_JS = """
+(async ({ token, offset, length }) => {
+    const entry = (window.__astraMediaStash || {})[token];
+    if (!entry) return null;
+    entry.at = Date.now();
+    const chunk = entry.bytes.subarray(offset, offset + length);
+    return await new Promise((resolve, reject) => {
+        const reader = new FileReader();
+        reader.onload = () => resolve(reader.result.split(',')[1] || '');
+        reader.onerror = reject;
+        reader.readAsDataURL(new Blob([chunk]));
+    });
+})
+"""
+
+RELEASE_JS = """
+(token) => { if (window.__astraMediaStash) delete window.__astraMediaStash[token]; }
+"""
+
 
 class AstraBridge:
     """High-reliability media downloader — self-contained JS, no engine dependency."""
 
     @staticmethod
-    async def download_media(client: Client, message: Message) -> Optional[bytes]:
+    def _resolve_id(message: Message, follow_quote: bool = True) -> Optional[str]:
+        """Serialized id of the quoted message (or the message itself)."""
+        target = message.quoted if follow_quote and message.has_quoted_msg else message
+
+        def _id_to_serialized(obj) -> Optional[str]:
+            if obj is None:
+                return None
+            if isinstance(obj, str):
+                return obj
+            serialized = getattr(obj, "serialized", None)
+            if isinstance(serialized, str):
+                return serialized
+            serialized = getattr(obj, "_serialized", None)
+            if isinstance(serialized, str):
+                return serialized
+            rid = getattr(obj, "id", None)
+            if isinstance(rid, str):
+                return rid
+            if rid is not None:
+                nested = getattr(rid, "serialized", None) or getattr(rid, "_serialized", None)
+                if isinstance(nested, str):
+                    return nested
+                if isinstance(rid, dict):
+                    if isinstance(rid.get("_serialized"), str):
+                        return rid["_serialized"]
+                    if isinstance(rid.get("id"), str):
+                        remote = rid.get("remote")
+                        from_me = "true" if rid.get("fromMe") else "false"
+                        return f"{from_me}_{remote}_{rid['id']}" if remote else rid["id"]
+            return str(obj)
+
+        mid = None
+        if target is not None:
+            mid = _id_to_serialized(getattr(target, "id", target))
+
+        if not mid and follow_quote:
+            mid = _id_to_serialized(
+                getattr(message, "quoted_message_id", None) or getattr(message, "quotedMessageId", None)
+            )
+
+        if not mid:
+            mid = _id_to_serialized(getattr(message, "id", None))
+        return mid
+
+    @staticmethod
+    async def _stream(client: Client, mid: str) -> Optional[Tuple[int, AsyncIterator[bytes]]]:
         """
-        Downloads media from a message using self-contained inline JS.
-        Handles quoted message resolution automatically.
+        Locates and decrypts the media of message `mid` in the page, then
+        returns its size and an iterator over MEDIA_DOWNLOAD_CHUNK_KB pieces
+        transferred one CDP call at a time. None if the media is unavailable
+        or too large.
         """
-        try:
-            target = message.quoted if message.has_quoted_msg else message
-
-            def _id_to_serialized(obj) -> Optional[str]:
-                if obj is None:
-                    return None
-                if isinstance(obj, str):
-                    return obj
-                serialized = getattr(obj, "serialized", None)
-                if isinstance(serialized, str):
-                    return serialized
-                serialized = getattr(obj, "_serialized", None)
-                if isinstance(serialized, str):
-                    return serialized
-                rid = getattr(obj, "id", None)
-                if isinstance(rid, str):
-                    return rid
-                if rid is not None:
-                    nested = getattr(rid, "serialized", None) or getattr(rid, "_serialized", None)
-                    if isinstance(nested, str):
-                        return nested
-                    if isinstance(rid, dict):
-                        if isinstance(rid.get("_serialized"), str):
-                            return rid["_serialized"]
-                        if isinstance(rid.get("id"), str):
-                            remote = rid.get("remote")
-                            from_me = "true" if rid.get("fromMe") else "false"
-                            return f"{from_me}_{remote}_{rid['id']}" if remote else rid["id"]
-                return str(obj)
-
-            mid = None
-            if target is not None:
-                mid = _id_to_serialized(getattr(target, "id", target))
-
-            if not mid:
-                mid = _id_to_serialized(
-                    getattr(message, "quoted_message_id", None) or getattr(message, "quotedMessageId", None)
+        logger.info(f"📥 Bridge Attempting Download: {mid}")
+
+        # Execute our self-contained JS directly on the browser page
+        page = client.browser.page
+        if not page:
+            logger.error("No browser page available.")
+            return None
+
+        max_bytes = config.MEDIA_DOWNLOAD_MAX_MB * 1024 * 1024
+        result = await page.evaluate(INLINE_DOWNLOAD_JS, {"msgRef": mid, "maxBytes": max_bytes})
+
+        if result and isinstance(result, dict):
+            if result.get("error") == "too_large":
+                logger.warning(
+                    f"⚠️ Media {mid} is {result.get('size', 0) // (1024 * 1024)} MB, "
+                    f"over MEDIA_DOWNLOAD_MAX_MB={config.MEDIA_DOWNLOAD_MAX_MB}"
                 )
+                return None
+            if "error" in result:
+                logger.warning(f"⚠️ Inline JS download result: {result['error']} for {mid}")
+            elif "token" in result:
+                resolved = result.get("resolvedId", mid)
+                logger.info(f"✅ Download OK (Inline JS): {resolved} ({result['size']} bytes)")
+                return result["size"], AstraBridge._read_chunks(page, result["token"], result["size"])
+
+        # Fallback: try the engine's download_media as a last resort
+        logger.warning(f"Inline JS returned nothing. Trying engine fallback for {mid}...")
+        for attempt in range(2):
+            try:
+                data_b64 = await client.download_media(mid)
+                if data_b64:
+                    logger.info(f"✅ Download OK (Engine fallback): {mid}")
+                    data = base64.b64decode(data_b64)
+                    return len(data), AstraBridge._single_chunk(data)
+            except Exception as e:
+                logger.debug(f"Engine fallback attempt {attempt + 1} failed: {e}")
+            await asyncio.sleep(1)
+        return None
 
-            if not mid:
-                mid = _id_to_serialized(getattr(message, "id", None))
+    @staticmethod
+    async def _read_chunks(page, token: str, size: int) -> AsyncIterator[bytes]:
+        chunk_size = max(64, config.MEDIA_DOWNLOAD_CHUNK_KB) * 1024
+        try:
+            for offset in range(0, size, chunk_size):
+                data_b64 = await page.evaluate(READ_CHUNK_JS, {"token": token, "offset": offset, "length": chunk_size})
+                if data_b64 is None:
+                    raise IOError(f"Staged media expired at byte {offset} of {size}")
+                yield base64.b64decode(data_b64)
+        finally:
+            try:
+                await page.evaluate(RELEASE_JS, token)
+            except Exception as e:
+                logger.debug(f"Could not release staged media {token}: {e}")
 
-            if not mid:
-                logger.debug("Download skipped: no resolvable message id.")
-                return None
+    @staticmethod
+    async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+        yield data
 
-            logger.info(f"📥 Bridge Attempting Download: {mid}")
+    @staticmethod
+    async def download_media(client: Client, message: Message, follow_quote: bool = True) -> Optional[bytes]:
+        """
+        Downloads media from a message using self-contained inline JS.
+        Handles quoted message resolution automatically. Chunks are written
+        to a BytesIO whose buffer becomes the returned `bytes` without a
+        second full copy; the immutable result is kept in the message media
+        cache so repeated edits of the same source skip the page.
+        With `follow_quote=False` the media of `message` itself is fetched
+        even when it replies to another message.
+        """
+        mid = AstraBridge._resolve_id(message, follow_quote)
+        if not mid:
+            logger.debug("Download skipped: no resolvable message id.")
+            return None
 
-            # Execute our self-contained JS directly on the browser page
-            page = client.browser.page
-            if not page:
-                logger.error("No browser page available.")
+        cached = await message_media_cache.get(mid)
+        if cached is not None:
+            logger.debug(f"Media cache hit: {mid}")
+            return cached
+
+        try:
+            stream = await AstraBridge._stream(client, mid)
+            if stream is None:
                 return None
+            size, chunks = stream
+            with io.BytesIO() as buffer:
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        buffer.write(chunk)
+                if buffer.tell() != size:
+                    raise IOError(f"Short media transfer: {buffer.tell()} of {size} bytes")
+                # Hands over the internal buffer instead of copying it.
+                data = buffer.getvalue()
+            await message_media_cache.put(mid, data)
+            return data
+        except Exception as e:
+            logger.error(f"Fatal error in BridgeDownloader: {e}")
+
+        return None
+
+    @staticmethod
+    async def download_media_to_file(
+        client: Client, message: Message, path: str, follow_quote: bool = True
+    ) -> Optional[int]:
+        """
+        Streams media straight into `path` without holding it in memory.
+        Returns the number of bytes written, or None on failure. Served from
+        (and added to) the message media cache like download_media.
+        """
+        mid = AstraBridge._resolve_id(message, follow_quote)
+        if not mid:
+            logger.debug("Download skipped: no resolvable message id.")
+            return None
 
-            result = await page.evaluate(INLINE_DOWNLOAD_JS, mid)
-
-            if result and isinstance(result, dict):
-                if "error" in result:
-                    logger.warning(f"⚠️ Inline JS download result: {result['error']} for {mid}")
-                elif "data" in result:
-                    resolved = result.get("resolvedId", mid)
-                    logger.info(f"✅ Download OK (Inline JS): {resolved} ({result.get('size', '?')} bytes)")
-                    return base64.b64decode(result["data"])
-
-            # Fallback: try the engine's download_media as a last resort
-            logger.warning(f"Inline JS returned nothing. Trying engine fallback for {mid}...")
-            for attempt in range(2):
-                try:
-                    data_b64 = await client.download_media(mid)
-                    if data_b64:
-                        logger.info(f"✅ Download OK (Engine fallback): {mid}")
-                        return base64.b64decode(data_b64)
-                except Exception as e:
-                    logger.debug(f"Engine fallback attempt {attempt + 1} failed: {e}")
-                await asyncio.sleep(1)
+        written = await message_media_cache.copy_to(mid, path)
+        if written is not None:
+            logger.debug(f"Media cache hit: {mid}")
+            return written
 
+        try:
+            stream = await AstraBridge._stream(client, mid)
+            if stream is None:
+                return None
+            size, chunks = stream
+            written = 0
+            with open(path, "wb") as f:
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        f.write(chunk)
+                        written += len(chunk)
+            if written != size:
+                raise IOError(f"Short media transfer: {written} of {size} bytes")
+            await message_media_cache.put_file(mid, path)
+            return written
         except Exception as e:
             logger.error(f"Fatal error in BridgeDownloader: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
         return None
 
@@ -1,147 +1,337 @@
+"""
+Media Cache
+-----------
+Keeps recently downloaded media so repeated requests for the same URL are
+served from disk. Files are content-addressed: each is stored once as a
+blob named by the sha256 of its bytes, hard-linked in from the download
+(no copy) under a temp name and renamed into place. URL keys in the
+`media_cache` SQLite table point at blobs in `media_blobs`, which count
+their references, so the same media fetched through different URLs takes
+disk space once. The cache is kept within MEDIA_CACHE_MAX_MB by evicting
+the least recently used keys; a blob goes when its last key does.
+
+Hits only record their access time in memory; a background janitor
+flushes those in one batch, expires entries older than
+MEDIA_CACHE_TTL_HOURS (while CACHE_AUTO_DELETE is on) and removes files
+the index no longer knows about.
+"""
+
 import asyncio
 import hashlib
 import json
 import logging
 import os
 import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from config import config
 
 logger = logging.getLogger("Astra.CacheManager")
 
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "temp", "media_cache")
+# Index of older versions, imported into SQLite once.
 CACHE_META_FILE = os.path.join(CACHE_DIR, "cache_meta.json")
+TMP_SUFFIX = ".tmp"
+# Unindexed files (crashed writes, saves still being indexed) are left
+# alone for this long before the janitor sweeps them.
+ORPHAN_GRACE_SECONDS = 3600
+EVICT_BATCH = 50
+CHUNK_SIZE = 1024 * 1024
 
 # Ensure cache directory exists
 os.makedirs(CACHE_DIR, exist_ok=True)
 
 
-class MediaCacheManager:
-    """Manages temporary caching of downloaded media files to speed up duplicate requests."""
+def _is_off(value) -> bool:
+    return str(value).lower() in ["false", "off", "0"]
 
-    def __init__(self):
-        self.metadata = self._load_metadata()
 
-    def _load_metadata(self) -> dict:
-        if os.path.exists(CACHE_META_FILE):
-            try:
-                with open(CACHE_META_FILE) as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.error(f"Failed to load cache metadata: {e}")
-        return {}
+def _remove_files(paths: List[str]) -> int:
+    """Deletes files, returning the bytes freed (missing files count as 0)."""
+    freed = 0
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            freed += size
+        except OSError:
+            continue
+    return freed
+
+
+def _stage_file(src: str) -> Tuple[str, str, int]:
+    """
+    Brings `src` into the cache directory under a temp name and hashes it
+    in the same pass: a hard link costs no data I/O, so only a read is
+    needed; across filesystems the copy and the hash share one stream.
+    Returns (temp_path, sha256, size).
+    """
+    tmp = os.path.join(CACHE_DIR, f".{uuid.uuid4().hex}{TMP_SUFFIX}")
+    digest = hashlib.sha256()
+    try:
+        try:
+            os.link(src, tmp)
+            with open(tmp, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+        except OSError:
+            with open(src, "rb") as f, open(tmp, "wb") as out:
+                while chunk := f.read(CHUNK_SIZE):
+                    digest.update(chunk)
+                    out.write(chunk)
+    except BaseException:
+        _remove_files([tmp])
+        raise
+    return tmp, digest.hexdigest(), os.path.getsize(tmp)
 
-    def _auto_cleanup(self):
-        """Deletes cache entries older than 2 hours if CACHE_AUTO_DELETE is enabled."""
-        from utils.state import state
 
-        # Default True, user can disable with `.setcfg CACHE_AUTO_DELETE off`
-        if str(state.get_config("CACHE_AUTO_DELETE")).lower() in ["false", "off", "0"]:
+class MediaCacheManager:
+    """Manages temporary caching of downloaded media files to speed up duplicate requests."""
+
+    def __init__(self):
+        # key -> last access time, flushed to SQLite by the janitor.
+        self._accessed: Dict[str, float] = {}
+        # Guards blob files against eviction while a save links them in.
+        self._lock = asyncio.Lock()
+        self._ready = False
+        self._janitor: Optional[asyncio.Task] = None
+
+    # --- Setup ---
+
+    async def _ensure_ready(self):
+        if self._janitor is None or self._janitor.done():
+            self._janitor = asyncio.create_task(self._janitor_loop())
+        if self._ready:
             return
+        self._ready = True
+        if os.path.exists(CACHE_META_FILE):
+            await self._import_legacy_metadata()
 
-        now = time.time()
-        two_hours = 2 * 60 * 60
-        to_delete = []
-
-        for key, entry in self.metadata.items():
-            timestamp = entry.get("timestamp", 0)
-            if now - timestamp > two_hours:
-                to_delete.append((key, entry.get("file_path")))
-
-        if to_delete:
-            for key, path in to_delete:
-                try:
-                    if path and os.path.exists(path):
-                        os.remove(path)
-                    del self.metadata[key]
-                except Exception as e:
-                    logger.debug(f"Failed to auto-delete {path}: {e}")
-            self._save_metadata()
-
-    def _save_metadata(self):
+    async def _import_legacy_metadata(self):
+        """Moves entries of the old JSON index into the blob store."""
         try:
-            with open(CACHE_META_FILE, "w") as f:
-                json.dump(self.metadata, f)
+            with open(CACHE_META_FILE) as f:
+                entries = json.load(f)
+            imported = 0
+            for key, entry in entries.items():
+                file_path = entry.get("file_path")
+                if not file_path or not os.path.exists(file_path):
+                    continue
+                await self._store(key, file_path, entry.get("media_meta", {}), entry.get("timestamp", time.time()))
+                await asyncio.to_thread(_remove_files, [file_path])
+                imported += 1
+            os.remove(CACHE_META_FILE)
+            logger.info(f"Imported {imported} media cache entries from {os.path.basename(CACHE_META_FILE)}")
         except Exception as e:
-            logger.error(f"Failed to save cache metadata: {e}")
+            logger.error(f"Failed to import legacy cache metadata: {e}")
+
+    # --- Lookups ---
 
     def generate_cache_key(self, url: str, mode: str) -> str:
         """Generates a unique MD5 hash based on the URL and format mode."""
         raw = f"{url}_{mode}".encode()
         return hashlib.md5(raw).hexdigest()
 
+    def _expired(self, created_at: int) -> bool:
+        from utils.state import state
+
+        if _is_off(state.get_config("CACHE_AUTO_DELETE")):
+            return False
+        return time.time() - created_at > config.MEDIA_CACHE_TTL_HOURS * 3600
+
     async def get_cached_file(self, url: str, mode: str):
         """Returns (file_path, metadata) if a valid cache exists, else (None, None)."""
+        from utils.database import db
         from utils.state import state
 
-        if str(state.get_config("ENABLE_MEDIA_CACHE")).lower() in ["false", "off", "0"]:
+        if _is_off(state.get_config("ENABLE_MEDIA_CACHE")):
             return None, None
 
-        self._auto_cleanup()
-
+        await self._ensure_ready()
         key = self.generate_cache_key(url, mode)
+        entry = await db.get_media_cache(key)
+        if entry is None:
+            return None, None
 
-        if key in self.metadata:
-            entry = self.metadata[key]
-            file_path = entry.get("file_path")
-
-            if file_path and os.path.exists(file_path):
-                # Update last accessed time for potential LRU eviction later
-                entry["last_accessed"] = time.time()
-                self._save_metadata()
-                return file_path, entry.get("media_meta", {})
-            else:
-                # File deleted manually or lost, clean up metadata
-                del self.metadata[key]
-                self._save_metadata()
+        file_path, _, media_meta, created_at = entry
+        if self._expired(created_at):
+            # The janitor deletes it; a new download replaces it meanwhile.
+            return None, None
+        if not os.path.exists(file_path):
+            # File deleted manually or lost, clean up the index
+            self._accessed.pop(key, None)
+            await db.delete_media_cache([key])
+            return None, None
 
-        return None, None
+        self._accessed[key] = time.time()
+        return file_path, media_meta
 
     async def save_to_cache(self, url: str, mode: str, original_file_path: str, media_meta: dict) -> str:
-        """Copies the downloaded file to the cache directory and stores metadata."""
+        """
+        Stores the downloaded file under the hash of its bytes and points
+        the URL's key at it. The original is hard-linked into the store
+        (copied only across filesystems); identical content already cached
+        for another URL is reused without writing anything.
+        """
         from utils.state import state
 
-        if str(state.get_config("ENABLE_MEDIA_CACHE")).lower() in ["false", "off", "0"]:
+        if _is_off(state.get_config("ENABLE_MEDIA_CACHE")):
             return original_file_path
 
         try:
-            key = self.generate_cache_key(url, mode)
-            ext = os.path.splitext(original_file_path)[1]
-            cached_file_path = os.path.join(CACHE_DIR, f"{key}{ext}")
-
-            # Copy file (using asyncio to avoid blocking, though shutil for small files is fast)
-            import shutil
-
-            await asyncio.to_thread(shutil.copy2, original_file_path, cached_file_path)
+            await self._ensure_ready()
+            if os.path.getsize(original_file_path) > config.MEDIA_CACHE_MAX_MB * 1024 * 1024:
+                return original_file_path
 
-            self.metadata[key] = {
-                "file_path": cached_file_path,
-                "media_meta": media_meta,
-                "timestamp": time.time(),
-                "last_accessed": time.time(),
-            }
-            self._save_metadata()
+            key = self.generate_cache_key(url, mode)
+            cached_file_path = await self._store(key, original_file_path, media_meta, time.time())
+            await self._enforce_budget(keep=key)
             return cached_file_path
         except Exception as e:
             logger.error(f"Failed to save file to cache: {e}")
             return original_file_path  # Fallback to original if caching fails
 
-    def clear_cache(self) -> dict:
-        """Deletes all files in the cache directory and resets metadata."""
-        count = 0
-        size_freed = 0
+    async def _store(self, key: str, src: str, media_meta: dict, now: float) -> str:
+        """Links `src` into the blob store under `key`; returns the blob path."""
+        from utils.database import db
+
+        tmp, sha256, size = await asyncio.to_thread(_stage_file, src)
         try:
-            for filename in os.listdir(CACHE_DIR):
-                filepath = os.path.join(CACHE_DIR, filename)
-                if os.path.isfile(filepath):
-                    size_freed += os.path.getsize(filepath)
-                    os.remove(filepath)
-                    count += 1
+            async with self._lock:
+                blob = await db.get_media_blob(sha256)
+                if blob and os.path.exists(blob[0]):
+                    blob_path = blob[0]
+                    logger.debug(f"Media cache dedup: {key} reuses {sha256[:12]} ({size} bytes)")
+                else:
+                    blob_path = os.path.join(CACHE_DIR, f"{sha256}{os.path.splitext(src)[1]}")
+                    os.replace(tmp, blob_path)
+                orphans = await db.put_media_cache(key, sha256, blob_path, size, media_meta, now)
+                await asyncio.to_thread(_remove_files, [p for p in orphans if p != blob_path])
+        finally:
+            await asyncio.to_thread(_remove_files, [tmp])
+        return blob_path
+
+    async def usage(self) -> Dict[str, int]:
+        """Entry/blob counts and stored vs. logical (pre-dedup) bytes."""
+        from utils.database import db
+
+        return await db.get_media_cache_usage()
+
+    # --- Eviction ---
+
+    async def _flush_accessed(self):
+        from utils.database import db
+
+        accessed, self._accessed = self._accessed, {}
+        if accessed:
+            await db.touch_media_cache(accessed)
+
+    async def _drop(self, keys: List[str]) -> int:
+        """Deletes cache keys and any blobs left unreferenced; returns bytes freed."""
+        from utils.database import db
+
+        if not keys:
+            return 0
+        for key in keys:
+            self._accessed.pop(key, None)
+        orphans = await db.delete_media_cache(keys)
+        return await asyncio.to_thread(_remove_files, orphans)
+
+    async def _enforce_budget(self, keep: Optional[str] = None) -> int:
+        """Evicts least recently used entries until the blobs fit MEDIA_CACHE_MAX_MB."""
+        from utils.database import db
+
+        budget = config.MEDIA_CACHE_MAX_MB * 1024 * 1024
+        evicted = 0
+        async with self._lock:
+            stored = (await db.get_media_cache_usage())["stored"]
+            if stored <= budget:
+                return 0
+            await self._flush_accessed()
+            while stored > budget:
+                victims = [key for key in await db.get_media_cache_lru(EVICT_BATCH) if key != keep]
+                if not victims:
+                    break
+                # A blob is only freed once its last key goes, so evict one key at a time.
+                for key in victims:
+                    stored -= await self._drop([key])
+                    evicted += 1
+                    if stored <= budget:
+                        break
+        if evicted:
+            logger.info(f"Evicted {evicted} media cache entries to stay within {config.MEDIA_CACHE_MAX_MB} MB")
+        return evicted
+
+    # --- Janitor ---
+
+    def _sweep_orphans(self, known: set) -> int:
+        """Removes files the index does not reference (including stale temp files)."""
+        now = time.time()
+        removed = 0
+        for filename in os.listdir(CACHE_DIR):
+            path = os.path.join(CACHE_DIR, filename)
+            if path in known or path == CACHE_META_FILE or not os.path.isfile(path):
+                continue
+            try:
+                # ctime changes on rename, unlike the mtime copy2 preserves.
+                if now - os.stat(path).st_ctime < ORPHAN_GRACE_SECONDS:
+                    continue
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+        return removed
+
+    async def run_janitor(self):
+        """One maintenance pass: flush access times, expire, evict and sweep orphans."""
+        from utils.database import db
+        from utils.state import state
+
+        async with self._lock:
+            await self._flush_accessed()
+            if not _is_off(state.get_config("CACHE_AUTO_DELETE")):
+                before = int(time.time() - config.MEDIA_CACHE_TTL_HOURS * 3600)
+                expired = await db.get_expired_media_cache(before)
+                await self._drop(expired)
+            await asyncio.to_thread(self._sweep_orphans, await db.get_media_cache_paths())
+        await self._enforce_budget()
+
+    async def _janitor_loop(self):
+        while True:
+            await asyncio.sleep(max(1, config.MEDIA_CACHE_JANITOR_INTERVAL))
+            try:
+                await self.run_janitor()
+            except Exception as e:
+                logger.error(f"Media cache janitor error: {e}")
 
-            self.metadata = {}
-            self._save_metadata()
+    async def clear_cache(self) -> dict:
+        """Deletes all files in the cache directory and resets the index."""
+        from utils.database import db
+
+        try:
+            async with self._lock:
+                usage = await db.get_media_cache_usage()
+                self._accessed = {}
+                await db.clear_media_cache()
+                paths = [
+                    os.path.join(CACHE_DIR, filename)
+                    for filename in os.listdir(CACHE_DIR)
+                    if os.path.isfile(os.path.join(CACHE_DIR, filename))
+                ]
+                freed = await asyncio.to_thread(_remove_files, paths)
 
             # Convert to MB
-            size_mb = size_freed / (1024 * 1024)
-            return {"success": True, "files_deleted": count, "freed_mb": round(size_mb, 2)}
+            size_mb = freed / (1024 * 1024)
+            return {
+                "success": True,
+                "files_deleted": len(paths),
+                "freed_mb": round(size_mb, 2),
+                "entries": usage["entries"],
+                "blobs": usage["blobs"],
+                # Bytes deduplication kept off the disk for the cleared entries.
+                "dedup_saved_mb": round((usage["logical"] - usage["stored"]) / (1024 * 1024), 2),
+            }
         except Exception as e:
             logger.error(f"Failed to clear cache: {e}")
             return {"success": False, "error": str(e)}
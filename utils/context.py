@@ -0,0 +1,127 @@
+"""
+Per-Message Context
+-------------------
+Identity and authorization facts about one incoming message, computed
+at most once and shared by every filter and listener that sees it.
+Normalized chat/sender ids are resolved on creation; owner, sudo and
+permit verdicts are evaluated lazily and memoized. The bot account's
+own identity is fetched once per client instead of on every message.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from config import config
+from utils.state import state
+
+logger = logging.getLogger("Astra.Context")
+
+_CONTEXT_ATTR = "_astra_ctx"
+
+
+def primary_jid(jid: Any) -> str:
+    """Serialized JID without device markers (12345:4@c.us -> 12345@c.us)."""
+    if not jid:
+        return ""
+    s = jid.serialized if hasattr(jid, "serialized") else str(jid)
+    if "@" not in s:
+        return s
+    user, domain = s.split("@", 1)
+    return f"{user.split(':', 1)[0]}@{domain}"
+
+
+class MessageContext:
+    """Memoized identity and authorization verdicts for a single message."""
+
+    __slots__ = ("chat_id", "sender_id", "sender_num", "from_me", "_verdicts")
+
+    def __init__(self, message):
+        chat_raw = getattr(message, "chat_id", None)
+        sender_raw = (
+            getattr(message, "sender_id", None)
+            or getattr(message, "sender", None)
+            or getattr(message, "author", None)
+            or chat_raw
+        )
+
+        self.chat_id = state._normalize_contact_id(primary_jid(chat_raw))
+        self.sender_id = state._normalize_contact_id(primary_jid(sender_raw))
+        self.sender_num = self.sender_id.split("@")[0]
+        self.from_me = bool(getattr(message, "from_me", False))
+        self._verdicts: Dict[str, bool] = {}
+
+    @property
+    def is_private(self) -> bool:
+        return self.chat_id.endswith("@c.us") or self.chat_id.endswith("@lid")
+
+    def _verdict(self, name: str, check) -> bool:
+        verdict = self._verdicts.get(name)
+        if verdict is None:
+            verdict = self._verdicts[name] = bool(check())
+        return verdict
+
+    @property
+    def is_owner(self) -> bool:
+        """The bot owner or the bot account itself."""
+        return self._verdict(
+            "owner", lambda: self.from_me or (bool(self.sender_num) and str(config.OWNER_ID) == self.sender_num)
+        )
+
+    @property
+    def is_sudo(self) -> bool:
+        return self._verdict("sudo", lambda: bool(self.sender_id) and state.is_sudo(self.sender_id))
+
+    @property
+    def is_authorized(self) -> bool:
+        """Owner, bot account or sudo user."""
+        return self.is_owner or self.is_sudo
+
+    @property
+    def is_permitted(self) -> bool:
+        """Whitelisted for private messages (PM permit)."""
+        return self._verdict("permit", lambda: bool(self.sender_id) and state.is_permitted(self.sender_id))
+
+
+def get_context(message) -> MessageContext:
+    """Returns the context attached to `message`, creating it on first use."""
+    ctx = getattr(message, _CONTEXT_ATTR, None)
+    if ctx is None:
+        ctx = MessageContext(message)
+        try:
+            setattr(message, _CONTEXT_ATTR, ctx)
+        except Exception:
+            pass
+    return ctx
+
+
+# --- Bot Identity ---
+_me_cache: Dict[int, Any] = {}
+_me_lock = asyncio.Lock()
+
+
+async def get_me(client) -> Any:
+    """The bot account's identity, fetched once per client."""
+    me = _me_cache.get(id(client))
+    if me is not None:
+        return me
+    async with _me_lock:
+        me = _me_cache.get(id(client))
+        if me is None:
+            me = await client.get_me()
+            if me is not None:
+                _me_cache[id(client)] = me
+    return me
+
+
+def reset_me(client: Optional[Any] = None):
+    """Forgets the cached identity (e.g. after re-login)."""
+    if client is None:
+        _me_cache.clear()
+    else:
+        _me_cache.pop(id(client), None)
+
+
+async def get_my_number(client) -> str:
+    me = await get_me(client)
+    return primary_jid(getattr(me, "id", None)).split("@")[0]
@@ -0,0 +1,86 @@
+"""
+Command Analytics Counters
+--------------------------
+Buffers command invocations in memory and periodically flushes them
+into hourly buckets in the database, so the command hot path costs a
+single dict increment instead of database round-trips.
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+
+from .database import db
+
+logger = logging.getLogger("Astra.Counters")
+
+BUCKET_SECONDS = 3600
+
+
+def current_bucket(now: Optional[float] = None) -> int:
+    """Start (unix seconds) of the hour bucket containing `now`."""
+    now = time.time() if now is None else now
+    return int(now // BUCKET_SECONDS * BUCKET_SECONDS)
+
+
+class CommandCounters:
+    """Aggregates command usage deltas and flushes them in batches."""
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, int], int] = defaultdict(int)
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def track(self, command: str):
+        """Records one invocation of `command`. Synchronous and allocation-light."""
+        self._deltas[(command, current_bucket())] += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(config.ANALYTICS_FLUSH_INTERVAL)
+            await self.flush()
+            if not self._deltas:
+                # Go idle until the next tracked command re-arms the loop.
+                self._flush_task = None
+                return
+
+    async def flush(self):
+        """Writes buffered deltas to the database."""
+        async with self._lock:
+            if not self._deltas:
+                return
+            deltas, self._deltas = self._deltas, defaultdict(int)
+            retain_after = current_bucket() - config.ANALYTICS_RETENTION_DAYS * 86400
+            try:
+                await db.add_command_counts(dict(deltas), retain_after=retain_after)
+            except Exception as e:
+                logger.error(f"Failed to flush command counters: {e}")
+                for key, count in deltas.items():
+                    self._deltas[key] += count
+
+    async def top(self, limit: int = 10) -> List[Tuple[str, int]]:
+        await self.flush()
+        return await db.get_top_commands(limit)
+
+    async def summary(self) -> Tuple[int, int]:
+        """Returns (distinct commands used, total invocations)."""
+        await self.flush()
+        return await db.get_command_summary()
+
+    async def trend(self, hours: int = 24, command: Optional[str] = None) -> List[int]:
+        """Invocation counts for each of the last `hours` hours, oldest first."""
+        await self.flush()
+        end = current_bucket()
+        start = end - (hours - 1) * BUCKET_SECONDS
+        counts = await db.get_command_trend(start, command)
+        return [counts.get(start + i * BUCKET_SECONDS, 0) for i in range(hours)]
+
+
+# Singleton Export
+counters = CommandCounters()
@@ -3,15 +3,93 @@ import json
 import logging
 import os
 import time
-from typing import Any
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiosqlite
 from config import config
+from urllib.request import pathname2url
 from motor.motor_asyncio import AsyncIOMotorClient
-from utils.helpers import safe_task
+from pymongo import UpdateOne
+from utils.mongo_writer import DocKey, MongoOp, delete_op, merge_ops, mongo_writer, update_op
 
 logger = logging.getLogger("Astra.Database")
 
+# A queued write is (op, payload, updated_at) where op is "set" (payload is the
+# JSON-encoded value), "inc" (payload is the integer delta) or "del".
+PendingWrite = Tuple[str, Any, int]
+
+# Keyed collections (notes, pm_warnings, ...) are stored one row per member.
+# A pending member write is keyed by (name, member); (name, None) marks a
+# pending clear of the whole collection and is applied before member writes.
+MemberKey = Tuple[str, Optional[str]]
+
+
+def _as_int(value: Any) -> int:
+    """Mirrors SQLite's CAST(... AS INTEGER) for values we increment."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _merge_writes(prev: Optional[PendingWrite], new: PendingWrite) -> PendingWrite:
+    """Coalesces two queued writes for the same key into one."""
+    op, payload, ts = new
+    if prev is None or op != "inc":
+        return new
+
+    p_op, p_payload, _ = prev
+    if p_op == "inc":
+        return ("inc", p_payload + payload, ts)
+    if p_op == "del":
+        return ("set", json.dumps(payload), ts)
+    return ("set", json.dumps(_as_int(json.loads(p_payload)) + payload), ts)
+
+
+# Maximum number of keys bound into one `IN (...)` query during sync.
+SYNC_CHUNK_SIZE = 500
+
+# Pooled reads that race a group commit this many times fall back to the
+# writer connection.
+READ_RETRIES = 3
+
+
+def _is_blank(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _sync_winner(s_val: Optional[Tuple[Any, int]], m_val: Optional[Tuple[Any, int]]) -> Optional[str]:
+    """
+    Decides which side of a (value, updated_at) pair should be copied over:
+    "sqlite", "mongo" or None when they already agree. A real value always
+    beats a null/empty one; otherwise the newer timestamp wins.
+    """
+    if m_val is None:
+        return "sqlite" if s_val is not None else None
+    if s_val is None:
+        return "mongo"
+
+    s_blank, m_blank = _is_blank(s_val[0]), _is_blank(m_val[0])
+    if s_blank and not m_blank:
+        return "mongo"
+    if m_blank and not s_blank:
+        return "sqlite"
+    if m_val[1] > s_val[1]:
+        return "mongo"
+    if s_val[1] > m_val[1]:
+        return "sqlite"
+    return None
+
+
+def _escape_member(member: str) -> str:
+    """Makes a member usable as a MongoDB field name (no '.' or '$')."""
+    return member.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+
+def _unescape_member(field: str) -> str:
+    return field.replace("%24", "$").replace("%2E", ".").replace("%25", "%")
+
 
 class Database:
     def __init__(self):
@@ -21,6 +99,25 @@ class Database:
         self.initialized = False
         self._lock = asyncio.Lock()
 
+        # Group-commit write queue (see flush()).
+        self._pending: Dict[str, PendingWrite] = {}
+        self._pending_members: Dict[MemberKey, PendingWrite] = {}
+        self._write_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        # Odd while a batch is in flight; lets pooled readers detect a commit
+        # that overlapped their SELECT (see _snapshot_read()).
+        self._commit_epoch = 0
+
+        # Read-only connections; the main connection is reserved for writes.
+        self._readers: List[aiosqlite.Connection] = []
+        self._next_reader = 0
+
+        # MongoDB mirror operations ride the same group commit into the
+        # mongo_outbox table before the background writer sends them.
+        self._pending_mongo: Dict[DocKey, MongoOp] = {}
+        self._acked_outbox: List[int] = []
+        self._outbox_seq = 0
+
     async def initialize(self):
         if self.initialized:
             return
@@ -32,13 +129,69 @@ class Database:
 
             # Initialize SQLite
             self.sqlite_conn = await aiosqlite.connect(config.SQLITE_PATH)
+            # WAL lets readers proceed while a batch is being committed and
+            # turns each group commit into a single sequential append.
+            await self.sqlite_conn.execute("PRAGMA journal_mode=WAL")
+            await self.sqlite_conn.execute("PRAGMA synchronous=NORMAL")
             await self.sqlite_conn.execute(
                 "CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT, updated_at INTEGER)"
             )
+            await self.sqlite_conn.execute("CREATE INDEX IF NOT EXISTS idx_state_updated_at ON state (updated_at)")
             await self.sqlite_conn.execute(
                 "CREATE TABLE IF NOT EXISTS seen_memes (post_id TEXT PRIMARY KEY, subreddit TEXT, fetched_at INTEGER)"
             )
+            await self.sqlite_conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_seen_memes_fetched_at ON seen_memes (fetched_at)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS collections "
+                "(name TEXT, member TEXT, value TEXT, updated_at INTEGER, PRIMARY KEY (name, member))"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS collection_meta (name TEXT PRIMARY KEY, updated_at INTEGER)"
+            )
+            # Durable queue of MongoDB writes not yet acknowledged by the server.
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS mongo_outbox (seq INTEGER PRIMARY KEY, coll TEXT, doc_id TEXT, op TEXT)"
+            )
+            # Watermarks of the last incremental Mongo sync.
+            await self.sqlite_conn.execute("CREATE TABLE IF NOT EXISTS sync_meta (name TEXT PRIMARY KEY, value TEXT)")
+            # Command analytics: hourly buckets plus running totals indexed for top-N.
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS cmd_counters "
+                "(command TEXT, bucket INTEGER, count INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (command, bucket))"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cmd_counters_bucket ON cmd_counters (bucket)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS cmd_totals (command TEXT PRIMARY KEY, total INTEGER NOT NULL DEFAULT 0)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cmd_totals_total ON cmd_totals (total DESC)"
+            )
+            # Media cache (local only): URL keys pointing at content-addressed
+            # blobs, with key lookups plus LRU/expiry scans served by indexes.
+            cursor = await self.sqlite_conn.execute("PRAGMA table_info(media_cache)")
+            if "file_path" in {row[1] for row in await cursor.fetchall()}:
+                # Pre-dedup layout; its files are swept as orphans by the cache janitor.
+                await self.sqlite_conn.execute("DROP TABLE media_cache")
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_blobs "
+                "(sha256 TEXT PRIMARY KEY, file_path TEXT, size INTEGER, refs INTEGER NOT NULL DEFAULT 0)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE TABLE IF NOT EXISTS media_cache (key TEXT PRIMARY KEY, sha256 TEXT, "
+                "media_meta TEXT, created_at INTEGER, last_accessed REAL)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_media_cache_last_accessed ON media_cache (last_accessed)"
+            )
+            await self.sqlite_conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_media_cache_created_at ON media_cache (created_at)"
+            )
             await self.sqlite_conn.commit()
+            await self._open_read_pool()
 
             # Initialize MongoDB
             if config.MONGO_URI:
@@ -52,97 +205,250 @@ class Database:
                     logger.error(f"Failed to connect to MongoDB: {e}")
                     self.mongo_client = None
 
-            await self._sync_on_startup()
+            cursor = await self.sqlite_conn.execute("SELECT COALESCE(MAX(seq), 0) FROM mongo_outbox")
+            self._outbox_seq = (await cursor.fetchone())[0]
+            if self.mongo_db is not None:
+                mongo_writer.attach(self.mongo_db, self._load_outbox, self._ack_outbox)
+                # Replay writes left over from the last run before reconciling.
+                try:
+                    await mongo_writer.drain()
+                except Exception as e:
+                    logger.error(f"Failed to replay MongoDB outbox: {e}")
+
+            # Hold the write lock so outbox acks cannot commit mid-sync.
+            async with self._write_lock:
+                await self._sync_on_startup()
+                await self._migrate_command_usage()
             self.initialized = True
 
     async def _sync_on_startup(self):
-        """merges sqlite and mongo on boot"""
+        """
+        Incrementally merges SQLite and MongoDB on boot.
+
+        Only rows whose `updated_at` reaches the watermarks recorded by the
+        previous sync are compared (both sides index `updated_at`), and the
+        differences are applied with one Mongo bulk_write per collection and
+        one SQLite transaction. A full sync runs whenever the watermark does
+        not belong to the connected MongoDB (first boot, new MONGO_URI).
+        """
         if self.mongo_db is None:
             # no mongo, check for old json file
             await self._migrate_from_json()
             return
 
         logger.info("syncing db...")
+        started = time.perf_counter()
 
-        # 1. Get everything from SQLite
-        cursor = await self.sqlite_conn.execute("SELECT key, value, updated_at FROM state")
-        sqlite_data = {}
-        for row in await cursor.fetchall():
-            try:
-                sqlite_data[row[0]] = {"value": json.loads(row[1]), "updated_at": row[2]}
-            except Exception as e:
-                logger.warning(f"bad data for {row[0]}: {e}")
-                continue
-
-        # 2. Get everything from MongoDB
-        mongo_data = {}
         try:
-            async for doc in self.mongo_db.state.find({}):
-                mongo_data[doc["_id"]] = {"value": doc.get("value"), "updated_at": doc.get("updated_at", 0)}
+            await self.mongo_db.state.create_index("updated_at")
+            await self.mongo_db.state_collections.create_index("updated_at")
+            marks = await self._load_sync_marks()
+
+            state_push, state_marks = await self._sync_state(marks.get("state", (0, 0)))
+            coll_push, coll_marks = await self._sync_collections(marks.get("collections", (0, 0)))
         except Exception as e:
             logger.error(f"mongo sync failed: {e}")
+            await self.sqlite_conn.rollback()
             return
 
-        # 3. Synchronize
-        all_keys = set(sqlite_data.keys()) | set(mongo_data.keys())
+        # Push local changes; the watermark only advances once Mongo has them.
+        pushed = True
+        for collection, ops in (("state", state_push), ("state_collections", coll_push)):
+            if not ops:
+                continue
+            try:
+                await self.mongo_db[collection].bulk_write(ops, ordered=False)
+            except Exception as e:
+                logger.error(f"mongo sync push to {collection} failed: {e}")
+                pushed = False
+
+        if pushed:
+            try:
+                await self._save_sync_marks(marks.get("token"), state=state_marks, collections=coll_marks)
+            except Exception as e:
+                logger.error(f"Failed to record sync watermark: {e}")
+
+        await self.sqlite_conn.commit()
+        logger.info(
+            f"Database synchronization complete ({len(state_push) + len(coll_push)} pushed, "
+            f"{time.perf_counter() - started:.2f}s)."
+        )
+
+    async def _load_sync_marks(self) -> dict:
+        """
+        Returns the watermarks of the last completed sync, or an empty dict
+        (forcing a full sync) if they were recorded against another MongoDB.
+        """
+        cursor = await self.sqlite_conn.execute("SELECT value FROM sync_meta WHERE name = 'mongo'")
+        row = await cursor.fetchone()
+        if not row:
+            return {}
+
+        marks = json.loads(row[0])
+        doc = await self.mongo_db.sync_meta.find_one({"_id": "sqlite"})
+        if not doc or doc.get("token") != marks.get("token"):
+            logger.info("Sync watermark does not match this MongoDB, running a full sync.")
+            return {}
+        return marks
 
-        for key in all_keys:
+    async def _save_sync_marks(self, token: Optional[str], **marks):
+        """Stores the new watermarks; the SQLite side commits with the sync transaction."""
+        if not token:
+            token = uuid.uuid4().hex
+            await self.mongo_db.sync_meta.update_one({"_id": "sqlite"}, {"$set": {"token": token}}, upsert=True)
+        await self.sqlite_conn.execute(
+            "INSERT OR REPLACE INTO sync_meta (name, value) VALUES ('mongo', ?)",
+            (json.dumps({"token": token, **marks}),),
+        )
+
+    async def _read_state_rows(self, where: str, params=()) -> Dict[str, Tuple[Any, int]]:
+        cursor = await self.sqlite_conn.execute(f"SELECT key, value, updated_at FROM state WHERE {where}", params)
+        rows = {}
+        for key, value, updated_at in await cursor.fetchall():
+            try:
+                rows[key] = (json.loads(value), updated_at or 0)
+            except Exception as e:
+                logger.warning(f"bad data for {key}: {e}")
+        return rows
+
+    async def _read_mongo_state(self, query: dict) -> Dict[str, Tuple[Any, int]]:
+        return {
+            doc["_id"]: (doc.get("value"), doc.get("updated_at", 0) or 0)
+            async for doc in self.mongo_db.state.find(query)
+        }
+
+    async def _sync_state(self, marks: Tuple[int, int]) -> Tuple[List[UpdateOne], Tuple[int, int]]:
+        """
+        Reconciles `state` rows changed since `marks` (sqlite, mongo).
+        Pulls are written to SQLite (uncommitted); pushes are returned.
+        """
+        s_mark, m_mark = marks
+
+        # 1. Rows changed on either side since the last sync
+        sqlite_data = await self._read_state_rows("updated_at >= ?", (s_mark,)) if s_mark else await self._read_state_rows("1")
+        mongo_data = await self._read_mongo_state({"updated_at": {"$gte": m_mark}} if m_mark else {})
+
+        # 2. Their counterparts on the opposite side
+        missing = [key for key in sqlite_data if key not in mongo_data]
+        if missing:
+            mongo_data.update(await self._read_mongo_state({"_id": {"$in": missing}}))
+        missing = [key for key in mongo_data if key not in sqlite_data]
+        for i in range(0, len(missing), SYNC_CHUNK_SIZE):
+            chunk = missing[i : i + SYNC_CHUNK_SIZE]
+            sqlite_data.update(
+                await self._read_state_rows(f"key IN ({','.join('?' * len(chunk))})", chunk)
+            )
+
+        # 3. Synchronize
+        push, pull, pushed_ts = [], [], []
+        for key in sqlite_data.keys() | mongo_data.keys():
             s_val = sqlite_data.get(key)
             m_val = mongo_data.get(key)
+            winner = _sync_winner(s_val, m_val)
+            if winner == "sqlite":
+                push.append(UpdateOne({"_id": key}, {"$set": {"value": s_val[0], "updated_at": s_val[1]}}, upsert=True))
+                pushed_ts.append(s_val[1])
+            elif winner == "mongo":
+                pull.append((key, json.dumps(m_val[0]), m_val[1]))
 
-            # Only in SQLite
-            if s_val is not None and m_val is None:
-                await self._mongo_update_task(
-                    "state", {"_id": key}, {"$set": {"value": s_val["value"], "updated_at": s_val["updated_at"]}}
+        if pull:
+            await self.sqlite_conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value, updated_at) VALUES (?, ?, ?)", pull
+            )
+
+        s_new = max([s_mark] + [ts for _, ts in sqlite_data.values()] + [ts for _, _, ts in pull])
+        m_new = max([m_mark] + [ts for _, ts in mongo_data.values()] + pushed_ts)
+        return push, (s_new, m_new)
+
+    async def _sync_collections(self, marks: Tuple[int, int]) -> Tuple[List[UpdateOne], Tuple[int, int]]:
+        """Reconciles keyed collections changed since `marks`; the newer side wins per collection."""
+        s_mark, m_mark = marks
+
+        # collection_meta holds one row per collection; the member rows are only
+        # read for collections that need pushing.
+        cursor = await self.sqlite_conn.execute("SELECT name, updated_at FROM collection_meta")
+        sqlite_meta = {row[0]: row[1] or 0 for row in await cursor.fetchall()}
+        changed = {name for name, ts in sqlite_meta.items() if ts >= s_mark}
+
+        query = {"updated_at": {"$gte": m_mark}} if m_mark else {}
+        mongo_docs = {doc["_id"]: doc async for doc in self.mongo_db.state_collections.find(query)}
+        mongo_meta = {name: doc.get("updated_at", 0) for name, doc in mongo_docs.items()}
+        missing = [name for name in changed if name not in mongo_docs]
+        if missing:
+            async for doc in self.mongo_db.state_collections.find({"_id": {"$in": missing}}, {"updated_at": 1}):
+                mongo_meta[doc["_id"]] = doc.get("updated_at", 0)
+
+        push = []
+        for name in changed | mongo_docs.keys():
+            s_ts = sqlite_meta.get(name)
+            m_ts = mongo_meta.get(name)
+            doc = mongo_docs.get(name)
+
+            if doc is not None and (s_ts is None or m_ts > s_ts):
+                members = {_unescape_member(k): v for k, v in (doc.get("members") or {}).items()}
+                await self.sqlite_conn.execute("DELETE FROM collections WHERE name = ?", (name,))
+                await self.sqlite_conn.executemany(
+                    "INSERT INTO collections (name, member, value, updated_at) VALUES (?, ?, ?, ?)",
+                    [(name, m, json.dumps(v), m_ts) for m, v in members.items()],
                 )
-            
-            # Only in MongoDB
-            elif m_val is not None and s_val is None:
                 await self.sqlite_conn.execute(
-                    "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?)",
-                    (key, json.dumps(m_val["value"]), m_val["updated_at"]),
+                    "INSERT OR REPLACE INTO collection_meta (name, updated_at) VALUES (?, ?)", (name, m_ts)
                 )
-            
-            # Case: Both exist -> Use timestamps or handle null-ish values
-            elif s_val is not None and m_val is not None:
-                s_value = s_val["value"]
-                m_value = m_val["value"]
-                s_ts = s_val["updated_at"]
-                m_ts = m_val["updated_at"]
-
-                # If SQLite value is null/empty but Mongo has a real value, pull it
-                is_sqlite_null = s_value is None or s_value == "" or s_value == [] or s_value == {}
-                is_mongo_null = m_value is None or m_value == "" or m_value == [] or m_value == {}
-
-                if is_sqlite_null and not is_mongo_null:
-                    logger.debug(f"Pulling real value for {key} from MongoDB to SQLite (SQLite was null/empty)")
-                    await self.sqlite_conn.execute(
-                        "UPDATE state SET value = ?, updated_at = ? WHERE key = ?",
-                        (json.dumps(m_value), m_ts, key),
-                    )
-                elif is_mongo_null and not is_sqlite_null:
-                    logger.debug(f"Pushing real value for {key} from SQLite to MongoDB (MongoDB was null/empty)")
-                    await self._mongo_update_task(
-                        "state",
-                        {"_id": key},
-                        {"$set": {"value": s_value, "updated_at": s_ts}},
-                    )
-                elif m_ts > s_ts:
-                    # Normal update: Mongo is newer
-                    await self.sqlite_conn.execute(
-                        "UPDATE state SET value = ?, updated_at = ? WHERE key = ?",
-                        (json.dumps(m_value), m_ts, key),
-                    )
-                elif s_ts > m_ts:
-                    # Normal update: SQLite is newer
-                    await self._mongo_update_task(
-                        "state",
-                        {"_id": key},
-                        {"$set": {"value": s_value, "updated_at": s_ts}},
+                sqlite_meta[name] = m_ts
+            elif s_ts is not None and (m_ts is None or s_ts > m_ts):
+                cursor = await self.sqlite_conn.execute(
+                    "SELECT member, value FROM collections WHERE name = ?", (name,)
+                )
+                members = {_escape_member(m): json.loads(v) for m, v in await cursor.fetchall()}
+                push.append(
+                    UpdateOne({"_id": name}, {"$set": {"members": members, "updated_at": s_ts}}, upsert=True)
+                )
+                mongo_meta[name] = s_ts
+
+        s_new = max([s_mark] + list(sqlite_meta.values()))
+        m_new = max([m_mark] + list(mongo_meta.values()))
+        return push, (s_new, m_new)
+
+    async def _migrate_command_usage(self):
+        """Seeds cmd_totals from MongoDB or the legacy `cmd_usage:*` state keys."""
+        cursor = await self.sqlite_conn.execute("SELECT COUNT(*) FROM cmd_totals")
+        if (await cursor.fetchone())[0]:
+            return
+
+        if self.mongo_db is not None:
+            try:
+                rows = [(doc["_id"], int(doc.get("total", 0))) async for doc in self.mongo_db.cmd_counters.find({})]
+                if rows:
+                    await self.sqlite_conn.executemany(
+                        "INSERT OR REPLACE INTO cmd_totals (command, total) VALUES (?, ?)", rows
                     )
+                    await self.sqlite_conn.commit()
+                    return
+            except Exception as e:
+                logger.error(f"Failed to load command counters from MongoDB: {e}")
+
+        cursor = await self.sqlite_conn.execute("SELECT key, value FROM state WHERE key LIKE 'cmd_usage:%'")
+        rows = [(key.split(":", 1)[1], _as_int(json.loads(value))) for key, value in await cursor.fetchall()]
+        if not rows:
+            return
 
+        logger.info(f"Migrating {len(rows)} command usage counters to cmd_totals...")
+        await self.sqlite_conn.executemany("INSERT OR REPLACE INTO cmd_totals (command, total) VALUES (?, ?)", rows)
+        await self.sqlite_conn.execute(
+            "DELETE FROM state WHERE key LIKE 'cmd_usage:%' OR key IN ('total_commands_v1', 'total_commands_v2')"
+        )
         await self.sqlite_conn.commit()
-        logger.info("Database synchronization complete.")
+
+        if self.mongo_db is not None:
+            try:
+                await self.mongo_db.cmd_counters.bulk_write(
+                    [UpdateOne({"_id": cmd}, {"$set": {"total": total}}, upsert=True) for cmd, total in rows]
+                )
+                await self.mongo_db.state.delete_many(
+                    {"$or": [{"_id": {"$regex": "^cmd_usage:"}}, {"_id": {"$in": ["total_commands_v1", "total_commands_v2"]}}]}
+                )
+            except Exception as e:
+                logger.error(f"Failed to migrate command counters in MongoDB: {e}")
 
     async def _migrate_from_json(self):
         """Migrates data from bot_state.json if SQLite is empty."""
@@ -165,92 +471,634 @@ class Database:
                 except Exception as e:
                     logger.error(f"Migration failed: {e}")
 
+    # --- Read connection pool ---
+
+    async def _open_read_pool(self):
+        """Opens read-only WAL connections so long reads never queue behind writes."""
+        if config.SQLITE_READ_POOL_SIZE <= 0 or config.SQLITE_PATH == ":memory:":
+            return
+        uri = f"file:{pathname2url(os.path.abspath(config.SQLITE_PATH))}?mode=ro"
+        try:
+            for _ in range(config.SQLITE_READ_POOL_SIZE):
+                self._readers.append(await aiosqlite.connect(uri, uri=True))
+        except Exception as e:
+            logger.warning(f"Read pool unavailable, reading through the writer connection: {e}")
+            await self._close_read_pool()
+
+    async def _close_read_pool(self):
+        readers, self._readers = self._readers, []
+        for conn in readers:
+            await conn.close()
+
+    async def _read(self, sql: str, params=()) -> list:
+        """Runs a SELECT on the next pooled read connection (round-robin)."""
+        if self._readers:
+            # Each connection serializes its own requests on its thread, so
+            # readers are shared rather than checked out exclusively.
+            conn = self._readers[self._next_reader % len(self._readers)]
+            self._next_reader += 1
+        else:
+            conn = self.sqlite_conn
+        async with conn.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+    async def _snapshot_read(self, overlay, sql: str, params=()):
+        """
+        Runs a SELECT together with `overlay()`, a snapshot of the queued
+        writes to layer on top of it. The pair is consistent: a group commit
+        that overlaps the read (and may or may not be visible to it) makes
+        the read retry, so queued writes are never applied twice or lost.
+        """
+        for _ in range(READ_RETRIES):
+            if self._commit_epoch % 2:
+                async with self._write_lock:
+                    pass
+            epoch = self._commit_epoch
+            pending = overlay()
+            rows = await self._read(sql, params)
+            if epoch == self._commit_epoch:
+                return pending, rows
+
+        # Commits kept landing mid-read; read behind the writer instead.
+        async with self._write_lock:
+            pending = overlay()
+            cursor = await self.sqlite_conn.execute(sql, params)
+            return pending, await cursor.fetchall()
+
+    # --- Group-commit write queue ---
+
+    def _queue_write(self, key: str, write: PendingWrite):
+        """Coalesces a write into the pending batch and arms the flush timer."""
+        self._pending[key] = _merge_writes(self._pending.get(key), write)
+        self._arm_flush()
+
+    def _queue_member_write(self, key: MemberKey, write: PendingWrite):
+        name, member = key
+        if member is None:
+            # A clear supersedes every member write queued before it.
+            for pending_key in [k for k in self._pending_members if k[0] == name]:
+                del self._pending_members[pending_key]
+        self._pending_members[key] = write
+        self._arm_flush()
+
+    def _arm_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(config.DB_FLUSH_INTERVAL_MS / 1000)
+        # Detach first so writes queued during this flush arm a new timer.
+        self._flush_task = None
+        await self.flush()
+
+    def _requeue(self, batch: Dict[str, PendingWrite], member_batch: Dict[MemberKey, PendingWrite]):
+        """Puts a failed batch back underneath anything queued meanwhile."""
+        newer, self._pending = self._pending, batch
+        for key, write in newer.items():
+            self._pending[key] = _merge_writes(self._pending.get(key), write)
+
+        newer_members, self._pending_members = self._pending_members, member_batch
+        for key, write in newer_members.items():
+            self._queue_member_write(key, write)
+        self._arm_flush()
+
+    def _queue_mongo(self, collection: str, doc_id: Any, op: MongoOp):
+        """Queues a MongoDB mirror write; it is persisted to the outbox on the next flush."""
+        if self.mongo_db is None:
+            return
+        key = (collection, doc_id)
+        self._pending_mongo[key] = merge_ops(self._pending_mongo.get(key), op)
+        self._arm_flush()
+
+    def _requeue_mongo(self, mongo_batch: Dict[DocKey, MongoOp]):
+        newer, self._pending_mongo = self._pending_mongo, mongo_batch
+        for key, op in newer.items():
+            self._pending_mongo[key] = merge_ops(self._pending_mongo.get(key), op)
+
+    async def _load_outbox(self, after_seq: int, limit: int):
+        """Reads persisted MongoDB writes in commit order (used by the writer)."""
+        # Under the write lock so rows of an uncommitted batch are never read.
+        async with self._write_lock:
+            cursor = await self.sqlite_conn.execute(
+                "SELECT seq, coll, doc_id, op FROM mongo_outbox WHERE seq > ? ORDER BY seq LIMIT ?", (after_seq, limit)
+            )
+            rows = await cursor.fetchall()
+        return [(seq, coll, json.loads(doc_id), json.loads(op)) for seq, coll, doc_id, op in rows]
+
+    async def _ack_outbox(self, seqs: List[int]):
+        """Marks outbox rows as applied; they are deleted with the next group commit."""
+        self._acked_outbox.extend(seqs)
+        self._arm_flush()
+
+    async def flush(self):
+        """
+        Commits every pending write in a single SQLite transaction.
+        Runs automatically every DB_FLUSH_INTERVAL_MS; call it explicitly
+        before shutdown or when raw SQL must observe the latest writes.
+        """
+        async with self._write_lock:
+            if self.sqlite_conn is None or not (
+                self._pending or self._pending_members or self._pending_mongo or self._acked_outbox
+            ):
+                return
+
+            batch, self._pending = self._pending, {}
+            member_batch, self._pending_members = self._pending_members, {}
+            mongo_batch, self._pending_mongo = self._pending_mongo, {}
+            acked, self._acked_outbox = self._acked_outbox, []
+
+            sets, incs, dels = [], [], []
+            for key, (op, payload, ts) in batch.items():
+                if op == "set":
+                    sets.append((key, payload, ts))
+                elif op == "inc":
+                    incs.append((key, json.dumps(payload), ts, payload, ts))
+                else:
+                    dels.append((key,))
+
+            clears, member_sets, member_dels, touched = [], [], [], {}
+            for (name, member), (op, payload, ts) in member_batch.items():
+                touched[name] = max(ts, touched.get(name, 0))
+                if member is None:
+                    clears.append((name,))
+                elif op == "set":
+                    member_sets.append((name, member, payload, ts))
+                else:
+                    member_dels.append((name, member))
+
+            outbox = []
+            for (collection, doc_id), op in mongo_batch.items():
+                self._outbox_seq += 1
+                outbox.append((self._outbox_seq, collection, doc_id, op))
+
+            self._commit_epoch += 1
+            try:
+                if sets:
+                    await self.sqlite_conn.executemany(
+                        "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
+                        sets,
+                    )
+                if incs:
+                    await self.sqlite_conn.executemany(
+                        "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = CAST(json_extract(value, '$') AS INTEGER) + ?, "
+                        "updated_at = ?",
+                        incs,
+                    )
+                if dels:
+                    await self.sqlite_conn.executemany("DELETE FROM state WHERE key = ?", dels)
+                if clears:
+                    await self.sqlite_conn.executemany("DELETE FROM collections WHERE name = ?", clears)
+                if member_sets:
+                    await self.sqlite_conn.executemany(
+                        "INSERT INTO collections (name, member, value, updated_at) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(name, member) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
+                        member_sets,
+                    )
+                if member_dels:
+                    await self.sqlite_conn.executemany(
+                        "DELETE FROM collections WHERE name = ? AND member = ?", member_dels
+                    )
+                if touched:
+                    await self.sqlite_conn.executemany(
+                        "INSERT INTO collection_meta (name, updated_at) VALUES (?, ?) "
+                        "ON CONFLICT(name) DO UPDATE SET updated_at=excluded.updated_at",
+                        list(touched.items()),
+                    )
+                if outbox:
+                    await self.sqlite_conn.executemany(
+                        "INSERT INTO mongo_outbox (seq, coll, doc_id, op) VALUES (?, ?, ?, ?)",
+                        [(seq, collection, json.dumps(doc_id), json.dumps(op)) for seq, collection, doc_id, op in outbox],
+                    )
+                if acked:
+                    await self.sqlite_conn.executemany("DELETE FROM mongo_outbox WHERE seq = ?", [(s,) for s in acked])
+                await self.sqlite_conn.commit()
+            except Exception as e:
+                logger.error(f"Group commit of {len(batch) + len(member_batch)} writes failed, requeueing: {e}")
+                try:
+                    await self.sqlite_conn.rollback()
+                except Exception:
+                    pass
+                self._requeue(batch, member_batch)
+                self._requeue_mongo(mongo_batch)
+                self._acked_outbox[:0] = acked
+            else:
+                if outbox:
+                    mongo_writer.submit(outbox)
+            finally:
+                self._commit_epoch += 1
+
+    async def close(self):
+        """Flushes pending writes, drains MongoDB and closes the SQLite connection."""
+        await self.flush()
+        if self.mongo_db is not None:
+            await mongo_writer.close()
+            await self.flush()
+        await self._close_read_pool()
+        if self.sqlite_conn is not None:
+            await self.sqlite_conn.close()
+            self.sqlite_conn = None
+        self.initialized = False
+
+    @staticmethod
+    def _resolve_pending(write: PendingWrite, stored: Any, default: Any) -> Any:
+        """Applies a queued write on top of the committed value."""
+        op, payload, _ = write
+        if op == "set":
+            return json.loads(payload)
+        if op == "del":
+            return default
+        return _as_int(stored) + payload
+
     async def get(self, key: str, default: Any = None) -> Any:
         if not self.initialized:
             await self.initialize()
-        cursor = await self.sqlite_conn.execute("SELECT value FROM state WHERE key = ?", (key,))
-        row = await cursor.fetchone()
+
+        pending = self._pending.get(key)
+        if pending is not None and pending[0] != "inc":
+            return self._resolve_pending(pending, None, default)
+
+        pending, rows = await self._snapshot_read(
+            lambda: self._pending.get(key), "SELECT value FROM state WHERE key = ?", (key,)
+        )
+        row = rows[0] if rows else None
+        value = default
         if row:
             try:
-                return json.loads(row[0])
+                value = json.loads(row[0])
             except Exception as e:
                 logger.error(f"Failed to parse JSON for key {key}: {e}")
-                return default
-        return default
+
+        if pending is not None:
+            return self._resolve_pending(pending, value if row else None, default)
+        return value
 
     async def get_all_with_prefix(self, prefix: str) -> dict:
         if not self.initialized:
             await self.initialize()
-        cursor = await self.sqlite_conn.execute("SELECT key, value FROM state WHERE key LIKE ?", (f"{prefix}%",))
+        pending, rows = await self._snapshot_read(
+            lambda: {k: w for k, w in self._pending.items() if k.startswith(prefix)},
+            "SELECT key, value FROM state WHERE key LIKE ?",
+            (f"{prefix}%",),
+        )
         results = {}
-        for row in await cursor.fetchall():
+        for row in rows:
             try:
                 results[row[0]] = json.loads(row[1])
             except Exception as e:
                 logger.error(f"Failed to parse JSON for key {row[0]}: {e}")
-        return results
 
-    async def _mongo_update_task(self, collection_name: str, filter_query: dict, update_data: dict, upsert: bool = True):
-        """Helper for fire-and-forget MongoDB updates to prevent Future vs Coroutine errors."""
-        try:
-            if self.mongo_db is not None:
-                await self.mongo_db[collection_name].update_one(filter_query, update_data, upsert=upsert)
-        except Exception as e:
-            logger.error(f"Background MongoDB update failed: {e}")
+        for key, write in pending.items():
+            if write[0] == "del":
+                results.pop(key, None)
+            else:
+                results[key] = self._resolve_pending(write, results.get(key), None)
+        return results
 
-    async def _mongo_delete_task(self, collection_name: str, filter_query: dict):
-        """Helper for fire-and-forget MongoDB deletions."""
-        try:
-            if self.mongo_db is not None:
-                await self.mongo_db[collection_name].delete_one(filter_query)
-        except Exception as e:
-            logger.error(f"Background MongoDB delete failed: {e}")
+    async def _apply_backpressure(self):
+        """Flushes inline once the pending batch is full."""
+        if len(self._pending) + len(self._pending_members) >= config.DB_FLUSH_BATCH_SIZE:
+            await self.flush()
 
     async def set(self, key: str, value: Any):
         if not self.initialized:
             await self.initialize()
         now = int(time.time())
-        # Update SQLite
-        await self.sqlite_conn.execute(
-            "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
-            "ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at",
-            (key, json.dumps(value), now),
+        # Queue for SQLite (the value is serialized now, so later mutations
+        # of the caller's object do not leak into the pending write)
+        encoded = json.dumps(value)
+        self._queue_write(key, ("set", encoded, now))
+        # Mirror to MongoDB through the write-behind outbox
+        if self.mongo_db is not None:
+            self._queue_mongo("state", key, update_op(set={"value": json.loads(encoded), "updated_at": now}))
+        await self._apply_backpressure()
+
+    async def increment(self, key: str, amount: int = 1):
+        if not self.initialized:
+            await self.initialize()
+        now = int(time.time())
+        # Queue for SQLite; consecutive increments collapse into one UPSERT
+        self._queue_write(key, ("inc", amount, now))
+        # Mirror to MongoDB using $inc; queued deltas are summed per key
+        self._queue_mongo("state", key, update_op(inc={"value": amount}, set={"updated_at": now}))
+        await self._apply_backpressure()
+
+    async def delete(self, key: str):
+        if not self.initialized:
+            await self.initialize()
+        self._queue_write(key, ("del", None, int(time.time())))
+        self._queue_mongo("state", key, delete_op())
+        await self._apply_backpressure()
+
+    # --- Keyed collections ---
+
+    async def get_collection(self, name: str) -> dict:
+        """Returns every member of a keyed collection as {member: value}."""
+        if not self.initialized:
+            await self.initialize()
+        pending, rows = await self._snapshot_read(
+            lambda: {k[1]: w for k, w in self._pending_members.items() if k[0] == name},
+            "SELECT member, value FROM collections WHERE name = ? ORDER BY member",
+            (name,),
         )
-        await self.sqlite_conn.commit()
+        results = {}
+        if None not in pending:
+            for member, raw in rows:
+                try:
+                    results[member] = json.loads(raw)
+                except Exception as e:
+                    logger.error(f"Failed to parse JSON for {name}[{member}]: {e}")
+
+        for member, (op, payload, _) in pending.items():
+            if member is None:
+                continue
+            if op == "set":
+                results[member] = json.loads(payload)
+            else:
+                results.pop(member, None)
+        return results
 
-        # Update MongoDB (fire and forget)
+    async def set_member(self, name: str, member: str, value: Any):
+        """Upserts a single member of a keyed collection."""
+        if not self.initialized:
+            await self.initialize()
+        now = int(time.time())
+        encoded = json.dumps(value)
+        self._queue_member_write((name, member), ("set", encoded, now))
         if self.mongo_db is not None:
-            safe_task(
-                self._mongo_update_task("state", {"_id": key}, {"$set": {"value": value, "updated_at": now}}),
-                log_context=f"DB.set:{key}"
+            self._queue_mongo(
+                "state_collections",
+                name,
+                update_op(set={f"members.{_escape_member(member)}": json.loads(encoded), "updated_at": now}),
             )
+        await self._apply_backpressure()
 
-    async def increment(self, key: str, amount: int = 1):
+    async def delete_member(self, name: str, member: str):
+        """Removes a single member of a keyed collection."""
         if not self.initialized:
             await self.initialize()
         now = int(time.time())
-        # Update SQLite using UPSERT pattern
-        await self.sqlite_conn.execute(
-            "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
-            "ON CONFLICT(key) DO UPDATE SET value = CAST(json_extract(value, '$') AS INTEGER) + ?, updated_at = ?",
-            (key, json.dumps(amount), now, amount, now),
+        self._queue_member_write((name, member), ("del", None, now))
+        self._queue_mongo(
+            "state_collections",
+            name,
+            update_op(set={"updated_at": now}, unset=[f"members.{_escape_member(member)}"]),
         )
-        await self.sqlite_conn.commit()
+        await self._apply_backpressure()
 
-        # Update MongoDB using $inc (fire and forget)
-        if self.mongo_db is not None:
-            safe_task(
-                self._mongo_update_task("state", {"_id": key}, {"$inc": {"value": amount}, "$set": {"updated_at": now}}),
-                log_context=f"DB.increment:{key}"
+    async def replace_collection(self, name: str, members: dict):
+        """Replaces the whole collection (also used to clear it)."""
+        if not self.initialized:
+            await self.initialize()
+        now = int(time.time())
+        self._queue_member_write((name, None), ("del", None, now))
+        escaped = {}
+        for member, value in members.items():
+            encoded = json.dumps(value)
+            self._queue_member_write((name, member), ("set", encoded, now))
+            escaped[_escape_member(member)] = json.loads(encoded)
+        self._queue_mongo("state_collections", name, update_op(set={"members": escaped, "updated_at": now}))
+        await self._apply_backpressure()
+
+    async def clear_collection(self, name: str):
+        await self.replace_collection(name, {})
+
+    # --- Command analytics counters ---
+
+    async def add_command_counts(self, deltas: Dict[Tuple[str, int], int], retain_after: int = 0):
+        """
+        Applies buffered per-hour command counts in one transaction.
+        `deltas` maps (command, hour_bucket) -> count. Buckets older than
+        `retain_after` are pruned; running totals are kept forever.
+        """
+        if not self.initialized:
+            await self.initialize()
+
+        totals: Dict[str, int] = {}
+        for (command, _), count in deltas.items():
+            totals[command] = totals.get(command, 0) + count
+
+        async with self._write_lock:
+            await self.sqlite_conn.executemany(
+                "INSERT INTO cmd_counters (command, bucket, count) VALUES (?, ?, ?) "
+                "ON CONFLICT(command, bucket) DO UPDATE SET count = count + excluded.count",
+                [(command, bucket, count) for (command, bucket), count in deltas.items()],
+            )
+            await self.sqlite_conn.executemany(
+                "INSERT INTO cmd_totals (command, total) VALUES (?, ?) "
+                "ON CONFLICT(command) DO UPDATE SET total = total + excluded.total",
+                list(totals.items()),
             )
+            if retain_after:
+                await self.sqlite_conn.execute("DELETE FROM cmd_counters WHERE bucket < ?", (retain_after,))
+            await self.sqlite_conn.commit()
 
-    async def delete(self, key: str):
+        for command, count in totals.items():
+            self._queue_mongo("cmd_counters", command, update_op(inc={"total": count}))
+
+    async def get_top_commands(self, limit: int = 10) -> List[Tuple[str, int]]:
+        """Most used commands by lifetime total, served from the totals index."""
         if not self.initialized:
             await self.initialize()
-        await self.sqlite_conn.execute("DELETE FROM state WHERE key = ?", (key,))
-        await self.sqlite_conn.commit()
-        if self.mongo_db is not None:
-            safe_task(self._mongo_delete_task("state", {"_id": key}), log_context=f"DB.delete:{key}")
+        rows = await self._read("SELECT command, total FROM cmd_totals ORDER BY total DESC LIMIT ?", (limit,))
+        return [(row[0], row[1]) for row in rows]
+
+    async def get_command_summary(self) -> Tuple[int, int]:
+        """Returns (distinct commands used, total invocations)."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read("SELECT COUNT(*), COALESCE(SUM(total), 0) FROM cmd_totals")
+        return rows[0][0], rows[0][1]
+
+    async def get_command_trend(self, since_bucket: int, command: Optional[str] = None) -> Dict[int, int]:
+        """Per-hour invocation counts since `since_bucket`, optionally for one command."""
+        if not self.initialized:
+            await self.initialize()
+        if command:
+            rows = await self._read(
+                "SELECT bucket, count FROM cmd_counters WHERE bucket >= ? AND command = ?", (since_bucket, command)
+            )
+        else:
+            rows = await self._read(
+                "SELECT bucket, SUM(count) FROM cmd_counters WHERE bucket >= ? GROUP BY bucket", (since_bucket,)
+            )
+        return {row[0]: row[1] for row in rows}
+
+    # --- Seen memes ---
+
+    async def get_seen_memes(self, since: int) -> List[Tuple[str, int]]:
+        """Returns (post_id, fetched_at) for posts sent at or after `since`."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read("SELECT post_id, fetched_at FROM seen_memes WHERE fetched_at >= ?", (since,))
+        return [(row[0], row[1]) for row in rows]
+
+    async def filter_seen_memes(self, post_ids: List[str], since: int) -> set:
+        """Returns which of `post_ids` were sent at or after `since`, in one query."""
+        if not self.initialized:
+            await self.initialize()
+        if not post_ids:
+            return set()
+        rows = await self._read(
+            f"SELECT post_id FROM seen_memes WHERE fetched_at >= ? AND post_id IN ({','.join('?' * len(post_ids))})",
+            (since, *post_ids),
+        )
+        return {row[0] for row in rows}
+
+    async def mark_meme_seen(self, post_id: str, subreddit: str, fetched_at: int):
+        if not self.initialized:
+            await self.initialize()
+        async with self._write_lock:
+            await self.sqlite_conn.execute(
+                "INSERT OR REPLACE INTO seen_memes (post_id, subreddit, fetched_at) VALUES (?, ?, ?)",
+                (post_id, subreddit, fetched_at),
+            )
+            await self.sqlite_conn.commit()
+
+    async def prune_seen_memes(self, before: int) -> int:
+        """Deletes seen memes older than `before` (served by the fetched_at index)."""
+        if not self.initialized:
+            await self.initialize()
+        async with self._write_lock:
+            cursor = await self.sqlite_conn.execute("DELETE FROM seen_memes WHERE fetched_at < ?", (before,))
+            await self.sqlite_conn.commit()
+        return cursor.rowcount
+
+    # --- Media cache index ---
+
+    async def get_media_cache(self, key: str) -> Optional[Tuple[str, int, dict, int]]:
+        """Returns (file_path, size, media_meta, created_at) for a cache key, or None."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read(
+            "SELECT b.file_path, b.size, c.media_meta, c.created_at FROM media_cache c "
+            "JOIN media_blobs b ON b.sha256 = c.sha256 WHERE c.key = ?",
+            (key,),
+        )
+        if not rows:
+            return None
+        file_path, size, media_meta, created_at = rows[0]
+        return file_path, size, json.loads(media_meta or "{}"), created_at
+
+    async def get_media_blob(self, sha256: str) -> Optional[Tuple[str, int]]:
+        """Returns (file_path, size) of a stored blob, or None."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read("SELECT file_path, size FROM media_blobs WHERE sha256 = ?", (sha256,))
+        return (rows[0][0], rows[0][1]) if rows else None
+
+    async def _release_media_blobs(self, sha256s: List[str]) -> List[str]:
+        """Drops a reference per entry (caller holds the write lock); returns paths of unreferenced blobs."""
+        await self.sqlite_conn.executemany(
+            "UPDATE media_blobs SET refs = refs - 1 WHERE sha256 = ?", [(sha,) for sha in sha256s]
+        )
+        cursor = await self.sqlite_conn.execute("SELECT file_path FROM media_blobs WHERE refs <= 0")
+        orphans = [row[0] for row in await cursor.fetchall()]
+        await self.sqlite_conn.execute("DELETE FROM media_blobs WHERE refs <= 0")
+        return orphans
+
+    async def put_media_cache(
+        self, key: str, sha256: str, file_path: str, size: int, media_meta: dict, now: float
+    ) -> List[str]:
+        """
+        Points `key` at blob `sha256` (registering the blob if new) and
+        moves its reference from any previous blob. Returns the paths of
+        blobs left without references, for the caller to delete.
+        """
+        if not self.initialized:
+            await self.initialize()
+        async with self._write_lock:
+            await self.sqlite_conn.execute(
+                "INSERT OR IGNORE INTO media_blobs (sha256, file_path, size, refs) VALUES (?, ?, ?, 0)",
+                (sha256, file_path, size),
+            )
+            cursor = await self.sqlite_conn.execute("SELECT sha256 FROM media_cache WHERE key = ?", (key,))
+            row = await cursor.fetchone()
+            previous = row[0] if row else None
+            await self.sqlite_conn.execute(
+                "INSERT OR REPLACE INTO media_cache (key, sha256, media_meta, created_at, last_accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sha256, json.dumps(media_meta or {}, default=str), int(now), now),
+            )
+            orphans = []
+            if previous != sha256:
+                await self.sqlite_conn.execute("UPDATE media_blobs SET refs = refs + 1 WHERE sha256 = ?", (sha256,))
+                if previous:
+                    orphans = await self._release_media_blobs([previous])
+            await self.sqlite_conn.commit()
+        return orphans
+
+    async def touch_media_cache(self, accessed: Dict[str, float]):
+        """Applies buffered last-access times {key: timestamp} in one transaction."""
+        if not self.initialized:
+            await self.initialize()
+        if not accessed:
+            return
+        async with self._write_lock:
+            await self.sqlite_conn.executemany(
+                "UPDATE media_cache SET last_accessed = MAX(last_accessed, ?) WHERE key = ?",
+                [(ts, key) for key, ts in accessed.items()],
+            )
+            await self.sqlite_conn.commit()
+
+    async def delete_media_cache(self, keys: List[str]) -> List[str]:
+        """Deletes cache keys; returns the paths of blobs no key references anymore."""
+        if not self.initialized:
+            await self.initialize()
+        if not keys:
+            return []
+        async with self._write_lock:
+            placeholders = ",".join("?" * len(keys))
+            cursor = await self.sqlite_conn.execute(
+                f"SELECT sha256 FROM media_cache WHERE key IN ({placeholders})", tuple(keys)
+            )
+            sha256s = [row[0] for row in await cursor.fetchall()]
+            await self.sqlite_conn.execute(f"DELETE FROM media_cache WHERE key IN ({placeholders})", tuple(keys))
+            orphans = await self._release_media_blobs(sha256s)
+            await self.sqlite_conn.commit()
+        return orphans
+
+    async def get_media_cache_lru(self, limit: int) -> List[str]:
+        """Least recently used cache keys, served by the last_accessed index."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read("SELECT key FROM media_cache ORDER BY last_accessed LIMIT ?", (limit,))
+        return [row[0] for row in rows]
+
+    async def get_expired_media_cache(self, before: int) -> List[str]:
+        """Cache keys created before `before`."""
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read("SELECT key FROM media_cache WHERE created_at < ?", (before,))
+        return [row[0] for row in rows]
+
+    async def get_media_cache_usage(self) -> Dict[str, int]:
+        """
+        Entry and blob counts with bytes on disk (`stored`) and bytes the
+        entries would take without deduplication (`logical`).
+        """
+        if not self.initialized:
+            await self.initialize()
+        rows = await self._read(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(size * refs), 0) FROM media_blobs"
+        )
+        entries = (await self._read("SELECT COUNT(*) FROM media_cache"))[0][0]
+        blobs, stored, logical = rows[0]
+        return {"entries": entries, "blobs": blobs, "stored": stored, "logical": logical}
+
+    async def get_media_cache_paths(self) -> set:
+        if not self.initialized:
+            await self.initialize()
+        return {row[0] for row in await self._read("SELECT file_path FROM media_blobs")}
+
+    async def clear_media_cache(self):
+        if not self.initialized:
+            await self.initialize()
+        async with self._write_lock:
+            await self.sqlite_conn.execute("DELETE FROM media_cache")
+            await self.sqlite_conn.execute("DELETE FROM media_blobs")
+            await self.sqlite_conn.commit()
 
     async def get_stats(self) -> dict:
         """Returns statistics about the database."""
@@ -258,11 +1106,12 @@ class Database:
             await self.initialize()
             
         # SQLite Stats
-        cursor = await self.sqlite_conn.execute("SELECT COUNT(*) FROM state")
-        state_count = (await cursor.fetchone())[0]
+        await self.flush()
+        state_count = (await self._read("SELECT COUNT(*) FROM state"))[0][0]
         
-        cursor = await self.sqlite_conn.execute("SELECT COUNT(*) FROM seen_memes")
-        meme_count = (await cursor.fetchone())[0]
+        meme_count = (await self._read("SELECT COUNT(*) FROM seen_memes"))[0][0]
+
+        collection_count = (await self._read("SELECT COUNT(*) FROM collections"))[0][0]
         
         sqlite_size = 0
         if os.path.exists(config.SQLITE_PATH):
@@ -272,6 +1121,7 @@ class Database:
             "sqlite": {
                 "state_records": state_count,
                 "meme_records": meme_count,
+                "collection_records": collection_count,
                 "size_mb": round(sqlite_size, 2)
             }
         }
@@ -280,8 +1130,10 @@ class Database:
         if self.mongo_db is not None:
             try:
                 m_state_count = await self.mongo_db.state.count_documents({})
+                outbox_rows = (await self._read("SELECT COUNT(*) FROM mongo_outbox"))[0][0]
                 stats["mongodb"] = {
                     "state_records": m_state_count,
+                    "pending_writes": outbox_rows,
                     "connected": True
                 }
             except:
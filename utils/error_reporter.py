@@ -173,18 +173,32 @@ class ErrorReporter:
             pass
 
     @classmethod
-    async def boot_message(cls, client, plugin_count: int = 0):
+    async def boot_message(cls, client, plugin_count: int = 0, profile: Optional[dict] = None):
         """Send startup notification to error group (or DM fallback)."""
         from utils.database import db
         from config import config
 
         custom_msg = await db.get("STARTUP_MESSAGE")
 
+        boot_line = ""
+        if profile:
+            from utils.plugin_profiler import plugin_profiler
+
+            slowest = ", ".join(
+                f"{name.split('.')[-1]} {rec['wall_ms'] / 1000:.1f}s"
+                for name, rec in plugin_profiler.slowest(profile, 3)
+            )
+            boot_line = (
+                f"*Plugin Load:* `{profile['wall_ms'] / 1000:.1f}s`, `+{profile['rss_kb'] // 1024} MB`\n"
+                f"*Slowest:* `{slowest or '-'}`\n"
+            )
+
         boot_text = custom_msg or (
             f"✅ *Astra Userbot Online*\n"
             f"━━━━━━━━━━━━━━━━━━━━\n"
             f"*Version:* `{config.VERSION}`\n"
             f"*Plugins:* `{plugin_count}` loaded\n"
+            f"{boot_line}"
             f"*Python:* `{sys.version.split()[0]}`\n"
             f"*Platform:* `{platform.system()} {platform.release()}`\n"
             f"*Time:* `{time.strftime('%Y-%m-%d %H:%M:%S')}`"
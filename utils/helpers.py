@@ -193,7 +193,9 @@ async def get_contact_name(client, jid: str) -> str:
         jid_obj = JID.parse(jid) if isinstance(jid, str) else jid
 
         # Check if it's "Me" (LID or User ID matches)
-        me = await client.get_me()
+        from utils.context import get_me
+
+        me = await get_me(client)
         if jid_obj.primary == me.id.primary:
             return "Me"
 
@@ -1,118 +0,0 @@
-const { spawn } = require('child_process');
-const path = require('path');
-const fs = require('fs');
-
-/**
- * JS Downloader Bridge for Astra Userbot
- * Bypasses Python environment instability for media downloads.
- */
-
-async function download() {
-    const args = process.argv.slice(2);
-    if (args.length < 1) {
-        console.error(JSON.stringify({ error: 'No URL provided' }));
-        process.exit(1);
-    }
-
-    const url = args[0];
-    const mode = args[1] || 'video'; // 'video' or 'audio'
-    const cookies_file = args[2] || null;
-    const cookies_browser = args[3] || null;
-    const pythonPath = args[4] || 'python3';
-
-    const tempDir = path.join(__dirname, '../temp');
-    if (!fs.existsSync(tempDir)) fs.mkdirSync(tempDir, { recursive: true });
-
-    const timestamp = Date.now();
-    const outputTmpl = path.join(tempDir, `jsdl_${timestamp}_%(id)s.%(ext)s`);
-
-    let ytArgs = [
-        '--newline',
-        '--no-playlist',
-        '--geo-bypass',
-        '--no-check-certificates',
-        '--add-header', 'Referer:https://www.google.com/',
-        '--add-header', 'User-Agent:Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        '--extractor-args', 'instagram:allow_direct_url',
-        '--buffer-size', '1M',
-        '--concurrent-fragments', '5',
-        '--no-mtime',
-        '-o', outputTmpl
-    ];
-
-    if (cookies_file && cookies_file !== 'None' && cookies_file !== '') {
-        ytArgs.push('--cookies', cookies_file);
-    } else if (cookies_browser && cookies_browser !== 'None' && cookies_browser !== '') {
-        ytArgs.push('--cookies-from-browser', cookies_browser);
-    }
-
-    if (mode === 'audio') {
-        ytArgs.push('--extract-audio', '--audio-format', 'mp3', '--audio-quality', '0');
-        ytArgs.push('-f', 'ba/b');
-    } else {
-        // Force H.264/MP4 for maximum compatibility across all devices
-        ytArgs.push('-f', 'bestvideo[ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4][vcodec^=avc1]/best');
-        ytArgs.push('-S', 'vcodec:h264,res,acodec:m4a');
-        ytArgs.push('--merge-output-format', 'mp4');
-        ytArgs.push('--postprocessor-args', 'ffmpeg:-movflags +faststart');
-    }
-
-    ytArgs.push(url);
-
-    // 1. Get Metadata First
-    const metaArgs = ['-j', '--simulate', '--no-playlist', url];
-    if (cookies_file && cookies_file !== 'None' && cookies_file !== '') metaArgs.push('--cookies', cookies_file);
-    else if (cookies_browser && cookies_browser !== 'None' && cookies_browser !== '') metaArgs.push('--cookies-from-browser', cookies_browser);
-
-    const metaCp = spawn(pythonPath, ['-m', 'yt_dlp', ...metaArgs]);
-    let metaData = '';
-    metaCp.stdout.on('data', (d) => metaData += d.toString());
-
-    await new Promise((resolve) => metaCp.on('close', resolve));
-
-    let info = {};
-    try {
-        info = JSON.parse(metaData);
-        // Direct output for Python to capture metadata immediately
-        process.stdout.write(`METADATA:${JSON.stringify({
-            title: info.title || 'Unknown Title',
-            platform: info.extractor_key || 'Unknown',
-            uploader: info.uploader || info.channel || '',
-            url: info.webpage_url || url
-        })}\n`);
-    } catch (e) {
-        process.stdout.write(`METADATA:{"title":"Media Content","platform":"Direct","url":"${url}"}\n`);
-    }
-
-    // 2. Perform Download
-    const cp = spawn(pythonPath, ['-m', 'yt_dlp', ...ytArgs]);
-
-    cp.stdout.on('data', (data) => {
-        // Forward yt-dlp progress to Python
-        process.stdout.write(data);
-    });
-
-    cp.stderr.on('data', (data) => {
-        process.stderr.write(data);
-    });
-
-    cp.on('close', (code) => {
-        if (code !== 0) {
-            process.exit(code);
-        }
-
-        const files = fs.readdirSync(tempDir).filter(f => f.startsWith(`jsdl_${timestamp}_`));
-        if (files.length === 0) {
-            console.error(JSON.stringify({ error: 'No file found after download' }));
-            process.exit(1);
-        }
-
-        const results = files.map(f => path.join(tempDir, f));
-        process.stdout.write(`SUCCESS:${JSON.stringify({ files: results })}\n`);
-    });
-}
-
-download().catch(err => {
-    console.error(JSON.stringify({ error: err.message }));
-    process.exit(1);
-});
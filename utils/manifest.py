@@ -0,0 +1,226 @@
+"""
+Plugin Command Manifest
+-----------------------
+Static description of every plugin under `commands/`, generated by
+parsing the sources with `ast` instead of importing them. It lists the
+`@astra_command(...)` declarations of each module (name, aliases,
+category, auth flags) and whether the module also registers raw event
+listeners, which is what lazy plugin loading needs to decide what can
+be deferred until first use, and the third-party modules it imports at
+top level, which lazy loading pre-imports off the event loop. The help
+menu reads it too.
+
+Entries are cached per file, keyed by mtime and size with a sha256
+fallback, so only edited plugins are parsed again.
+
+Generate it ahead of time with:
+    python3 -m utils.manifest
+"""
+
+import ast
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import config
+
+logger = logging.getLogger("Astra.Manifest")
+
+MANIFEST_VERSION = 4
+COMMANDS_DIR = os.path.join(config.BASE_DIR, "commands")
+MANIFEST_PATH = os.path.join(config.BASE_DIR, "plugin_manifest.json")
+
+# astra_command(...) parameters in positional order, with their defaults.
+COMMAND_FIELDS = (
+    ("name", ""),
+    ("description", ""),
+    ("category", "General"),
+    ("aliases", []),
+    ("usage", ""),
+    ("owner_only", False),
+    ("is_public", False),
+    ("workload", None),
+)
+# Attribute calls that register raw event handlers (Client.on_message, client.on).
+LISTENER_CALLS = ("on_message", "on")
+# Top-level packages that belong to the bot itself, never pre-imported.
+PROJECT_PACKAGES = ("astra", "commands", "config", "utils")
+
+
+def _call_name(node: ast.AST) -> str:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    return ""
+
+
+def _parse_command(call: ast.Call) -> Dict[str, Any]:
+    """Evaluates the literal arguments of one astra_command(...) call."""
+    command = {field: default for field, default in COMMAND_FIELDS}
+    for (field, _), arg in zip(COMMAND_FIELDS, call.args):
+        command[field] = ast.literal_eval(arg)
+    for keyword in call.keywords:
+        if keyword.arg in command:
+            command[keyword.arg] = ast.literal_eval(keyword.value)
+    command["aliases"] = list(command["aliases"] or [])
+    return command
+
+
+def _third_party_imports(tree: ast.Module) -> List[str]:
+    """Third-party modules imported at module level (including inside try/if blocks)."""
+    stdlib = getattr(sys, "stdlib_module_names", ())
+    modules: List[str] = []
+    pending = list(tree.body)
+    while pending:
+        node = pending.pop(0)
+        if isinstance(node, (ast.Try, ast.If)):
+            pending.extend(node.body + node.orelse + getattr(node, "finalbody", []))
+            for handler in getattr(node, "handlers", []):
+                pending.extend(handler.body)
+            continue
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            root = name.split(".")[0]
+            if root not in PROJECT_PACKAGES and root not in stdlib and name not in modules:
+                modules.append(name)
+    return modules
+
+
+def scan_plugin(path: str) -> Dict[str, Any]:
+    """
+    Extracts the command declarations of one plugin file.
+    `lazy` is False when the module cannot be described statically
+    (syntax the running interpreter rejects, computed decorator
+    arguments) or registers listeners that must see every message.
+    """
+    entry: Dict[str, Any] = {"commands": [], "listeners": False, "lazy": False, "imports": []}
+    try:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.debug(f"Cannot scan {path}: {e}")
+        return entry
+
+    static = True
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if isinstance(decorator, ast.Call) and _call_name(decorator.func) == "astra_command":
+                    try:
+                        entry["commands"].append(_parse_command(decorator))
+                    except ValueError:
+                        static = False
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            if node.func.attr in LISTENER_CALLS:
+                entry["listeners"] = True
+
+    entry["lazy"] = static and bool(entry["commands"]) and not entry["listeners"]
+    entry["imports"] = _third_party_imports(tree)
+    return entry
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _plugin_files(commands_dir: str) -> Dict[str, str]:
+    return {
+        f"commands.{filename[:-3]}": os.path.join(commands_dir, filename)
+        for filename in sorted(os.listdir(commands_dir))
+        if filename.endswith(".py") and not filename.startswith("_")
+    }
+
+
+def build_manifest(commands_dir: str = COMMANDS_DIR, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Scans every plugin module in `commands_dir`, reusing entries from
+    `previous` whose file is unchanged (same mtime and size, or same hash).
+    """
+    cached = (previous or {}).get("plugins", {}) if (previous or {}).get("version") == MANIFEST_VERSION else {}
+    plugins = {}
+    for plugin_name, path in _plugin_files(commands_dir).items():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        old = cached.get(plugin_name)
+        if old and old.get("mtime") == stat.st_mtime and old.get("size") == stat.st_size:
+            plugins[plugin_name] = old
+            continue
+
+        digest = _file_hash(path)
+        if old and old.get("sha256") == digest:
+            entry = dict(old)
+        else:
+            entry = scan_plugin(path)
+            entry["sha256"] = digest
+        entry["mtime"], entry["size"] = stat.st_mtime, stat.st_size
+        plugins[plugin_name] = entry
+    return {"version": MANIFEST_VERSION, "plugins": plugins}
+
+
+def write_manifest(manifest: Dict[str, Any], path: str = MANIFEST_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+_loaded: Optional[Dict[str, Any]] = None
+
+
+def load_manifest(path: str = MANIFEST_PATH, commands_dir: str = COMMANDS_DIR) -> Dict[str, Any]:
+    """Returns the manifest, rescanning only plugins changed since it was written."""
+    global _loaded
+    previous = _loaded if _loaded is not None else _read_manifest(path)
+    manifest = build_manifest(commands_dir, previous)
+    if manifest != previous:
+        try:
+            write_manifest(manifest, path)
+        except OSError as e:
+            logger.warning(f"Could not write plugin manifest: {e}")
+    _loaded = manifest
+    return manifest
+
+
+def get_manifest() -> Dict[str, Any]:
+    """The manifest as last loaded in this process (loading it on first use)."""
+    return _loaded if _loaded is not None else load_manifest()
+
+
+def manifest_commands(plugin_names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Command metadata in the COMMANDS_METADATA format, read from the
+    manifest, optionally limited to the given plugins.
+    """
+    plugins = get_manifest()["plugins"]
+    names = plugins.keys() if plugin_names is None else [p for p in plugin_names if p in plugins]
+    return [
+        {**command, "module": plugin_name.split(".")[-1]}
+        for plugin_name in names
+        for command in plugins[plugin_name]["commands"]
+    ]
+
+
+if __name__ == "__main__":
+    result = load_manifest()
+    lazy = sum(1 for p in result["plugins"].values() if p["lazy"])
+    print(f"Wrote {MANIFEST_PATH}: {len(result['plugins'])} plugins ({lazy} lazy-loadable)")
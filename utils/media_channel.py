@@ -1,8 +1,9 @@
 import asyncio
-import json
 import os
 import re
 import time
+from contextlib import aclosing
+from typing import Dict, List, Optional, Tuple
 
 from config import config
 from utils.helpers import safe_edit
@@ -15,11 +16,42 @@ from utils.media_exceptions import (
     RateLimitException,
 )
 from utils.progress import get_progress_bar
+from utils.ytdlp_pool import DownloadFailed, ytdlp_pool
 
 from astra.client import Client
 from astra.models import Message
 
 
+def _human_size(num_bytes: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.2f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.2f}GiB"
+
+
+class _Flight:
+    """One running download and the channels (status messages) waiting on it."""
+
+    def __init__(self):
+        self.channels: List["MediaChannel"] = []
+        self.task: Optional[asyncio.Task] = None
+        # Latest (text, is_progress) shown, replayed to channels that join late.
+        self.last_status: Optional[Tuple[str, bool]] = None
+
+    async def update(self, text: str, force: bool = False, is_progress: bool = False):
+        """Mirrors a status update onto every attached channel (each keeps its own throttle)."""
+        self.last_status = (text, is_progress)
+        await asyncio.gather(
+            *(channel._update_status(text, force, is_progress) for channel in list(self.channels)),
+            return_exceptions=True,
+        )
+
+
+# (canonical url, mode) -> download in progress, shared by concurrent requests.
+_IN_FLIGHT: Dict[Tuple[str, str], _Flight] = {}
+
+
 class MediaChannel:
     """
     Centralized Media Downloader and Uploader Channel.
@@ -47,11 +79,18 @@ class MediaChannel:
             self.last_update = now
 
     async def run_bridge(self, url: str, mode: str):
-        """Executes the JS downloader bridge, utilizing cache for speed."""
+        """
+        Downloads through the yt-dlp worker pool, utilizing cache for speed.
+        Concurrent requests for the same canonical URL and mode share one
+        download: later callers attach to it, see its progress on their own
+        status message and receive the same file (or the same error).
+        """
         from utils.cache_manager import cache
+        from utils.url_canon import canonicalize
 
-        # 1. Check Cache
-        cached_file, cached_meta = await cache.get_cached_file(url, mode)
+        # 1. Check Cache (keyed by the canonical URL so every link shape of a post hits)
+        cache_url = canonicalize(url)
+        cached_file, cached_meta = await cache.get_cached_file(cache_url, mode)
         if cached_file:
             await self._update_status(
                 f"⚡ **Astra Media Gateway**\n"
@@ -65,86 +104,98 @@ class MediaChannel:
             await asyncio.sleep(1)
             return cached_file, cached_meta
 
-        bridge_script = os.path.join(os.path.dirname(__file__), "js_downloader.js")
-        cookies_file = getattr(config, "YOUTUBE_COOKIES_FILE", "") or ""
-        cookies_browser = getattr(config, "YOUTUBE_COOKIES_FROM_BROWSER", "") or ""
-
-        import sys
-
-        process = await asyncio.create_subprocess_exec(
-            "node",
-            bridge_script,
-            url,
-            mode,
-            cookies_file,
-            cookies_browser,
-            sys.executable,  # Pass current python path
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-        metadata = {"title": "Media Content", "platform": "Astra", "uploader": "Unknown", "url": url}
-        file_path = None
-
-        while True:
-            line = await process.stdout.readline()
-            if not line:
-                break
-
-            line_str = line.decode("utf-8", errors="ignore").strip()
+        # 2. Join or start the download of this link
+        key = (cache_url, mode)
+        flight = _IN_FLIGHT.get(key)
+        if flight is None:
+            flight = _IN_FLIGHT[key] = _Flight()
+            flight.task = asyncio.create_task(self._download(flight, url, mode, cache_url))
+
+            def _landed(task: asyncio.Task, key=key, flight=flight):
+                if _IN_FLIGHT.get(key) is flight:
+                    del _IN_FLIGHT[key]
+                # Mark the error as retrieved even if every waiter was cancelled.
+                if not task.cancelled():
+                    task.exception()
+
+            flight.task.add_done_callback(_landed)
+        elif flight.last_status:
+            await self._update_status(flight.last_status[0], force=True, is_progress=flight.last_status[1])
+        else:
+            await self._update_status(
+                "⚡ **Astra Media Gateway**\n"
+                "━━━━━━━━━━━━━━━━━━━━\n"
+                "🔗 *Joined an in-progress download of this link...*",
+                force=True,
+            )
 
-            # Metadata Capture
-            if line_str.startswith("METADATA:"):
-                metadata.update(json.loads(line_str.replace("METADATA:", "")))
-                await self._update_status(
-                    f"⚡ **Astra Media Gateway**\n"
-                    f"━━━━━━━━━━━━━━━━━━━━\n"
-                    f"✨ *{metadata['title']}*\n"
-                    f"🌐 *Platform:* {metadata['platform']}\n"
-                    f"📂 *Format:* {mode.capitalize()}\n\n"
-                    f"⏳ *Initializing download stream...*",
-                    force=True,
-                )
+        flight.channels.append(self)
+        try:
+            # Shielded: one caller giving up must not cancel the download for the rest.
+            file_path, metadata = await asyncio.shield(flight.task)
+        finally:
+            flight.channels.remove(self)
+        return file_path, dict(metadata)
 
-            # Progress Capture
-            if "[download]" in line_str and "%" in line_str:
-                match = re.search(r"(\d+\.\d+)% of\s+([\d\.]+\w+)\s+at\s+([\d\.]+\w+/s)\s+ETA\s+(\d+:\d+)", line_str)
-                if match:
-                    pct, size, speed, eta = match.groups()
-                    bar = get_progress_bar(float(pct))
-                    await self._update_status(
-                        f"⚡ **Astra Media Gateway**\n"
-                        f"━━━━━━━━━━━━━━━━━━━━\n"
-                        f"✨ *{metadata['title']}*\n\n"
-                        f"📥 *Stream:* {bar}\n"
-                        f"📋 *Size:* `{size}`\n"
-                        f"🚀 *Speed:* `{speed}`\n"
-                        f"🕒 *ETA:* `{eta}`",
-                        is_progress=True,
-                    )
+    async def _download(self, flight: _Flight, url: str, mode: str, cache_url: str):
+        """Runs the download for one flight; returns (cached file path, metadata)."""
+        from utils.cache_manager import cache
 
-            # Success Capture
-            if line_str.startswith("SUCCESS:"):
-                res = json.loads(line_str.replace("SUCCESS:", ""))
-                files = res.get("files", [])
-                if files:
-                    file_path = files[0]
+        cookies_file = getattr(config, "YOUTUBE_COOKIES_FILE", "") or None
+        cookies_browser = getattr(config, "YOUTUBE_COOKIES_FROM_BROWSER", "") or None
 
-        await process.wait()
-        if process.returncode != 0:
-            stderr_full = (await process.stderr.read()).decode(errors="ignore")
+        metadata = {"title": "Media Content", "platform": "Astra", "uploader": "Unknown", "url": url}
+        file_path = None
+        stderr = ""
 
-            # Filter out non-fatal warnings from stderr to find the real error
+        try:
+            async with aclosing(ytdlp_pool.download(url, mode, cookies_file, cookies_browser)) as events:
+                async for event in events:
+                    kind = event.get("event")
+
+                    # Metadata Capture
+                    if kind == "metadata":
+                        metadata.update(event["metadata"])
+                        await flight.update(
+                            f"⚡ **Astra Media Gateway**\n"
+                            f"━━━━━━━━━━━━━━━━━━━━\n"
+                            f"✨ *{metadata['title']}*\n"
+                            f"🌐 *Platform:* {metadata['platform']}\n"
+                            f"📂 *Format:* {mode.capitalize()}\n\n"
+                            f"⏳ *Initializing download stream...*",
+                            force=True,
+                        )
+
+                    # Progress Capture
+                    elif kind == "progress" and event.get("total"):
+                        bar = get_progress_bar(event["downloaded"] * 100 / event["total"])
+                        eta = event.get("eta")
+                        eta_str = f"{int(eta) // 60:02d}:{int(eta) % 60:02d}" if eta is not None else "--:--"
+                        await flight.update(
+                            f"⚡ **Astra Media Gateway**\n"
+                            f"━━━━━━━━━━━━━━━━━━━━\n"
+                            f"✨ *{metadata['title']}*\n\n"
+                            f"📥 *Stream:* {bar}\n"
+                            f"📋 *Size:* `{_human_size(event['total'])}`\n"
+                            f"🚀 *Speed:* `{_human_size(event.get('speed') or 0)}/s`\n"
+                            f"🕒 *ETA:* `{eta_str}`",
+                            is_progress=True,
+                        )
+
+                    # Success Capture
+                    elif kind == "done" and event.get("files"):
+                        file_path = event["files"][0]
+        except DownloadFailed as e:
+            stderr_full = e.message
+
+            # Filter out non-fatal warnings to find the real error
             stderr_lines = [
-                l for l in stderr_full.split("\n") 
+                l for l in stderr_full.split("\n")
                 if "RequestsDependencyWarning" not in l and "urllib3" not in l and "chardet" not in l
             ]
-            stderr = "\n".join(stderr_lines).strip()
-
-            # If after filtering stderr is empty but returncode is non-zero, use the original for context
-            if not stderr:
-                stderr = stderr_full.strip()
+            stderr = "\n".join(stderr_lines).strip() or stderr_full.strip() or "yt-dlp failed"
 
+        if stderr:
             # Smart Error Parsing
             if "This video is private" in stderr or "Private account" in stderr:
                 raise ContentPrivateException()
@@ -170,7 +221,7 @@ class MediaChannel:
                         quiet=True
                     )
                     
-                    await self._update_status("📡 **Astra Media Gateway**\n━━━━━━━━━━━━━━━━━━━━\n🔄 *Primary bridge failed. Attempting Instaloader fallback...*")
+                    await flight.update("📡 **Astra Media Gateway**\n━━━━━━━━━━━━━━━━━━━━\n🔄 *Primary bridge failed. Attempting Instaloader fallback...*")
                     
                     # Extract shortcode/username
                     shortcode_match = re.search(r"/(?:p|reels|reel|stories)/([^/?#&]+)", url)
@@ -197,7 +248,8 @@ class MediaChannel:
                                 # Move to temp for standard cleanup
                                 final_path = os.path.join(os.path.dirname(__file__), f"../temp/ig_fb_{int(time.time())}_{os.path.basename(file_path)}")
                                 os.rename(file_path, final_path)
-                                return await cache.save_to_cache(url, mode, final_path, metadata)
+                                cached_path = await cache.save_to_cache(cache_url, mode, final_path, metadata)
+                                return cached_path, metadata
                 except Exception as ie:
                     # If fallback also fails, log it and continue to raise the original MediaException
                     print(f"Instaloader fallback failed: {str(ie)}")
@@ -209,7 +261,7 @@ class MediaChannel:
             raise MediaException("File stream failed or was not written to disk.")
 
         # Save to Cache automatically
-        cached_path = await cache.save_to_cache(url, mode, file_path, metadata)
+        cached_path = await cache.save_to_cache(cache_url, mode, file_path, metadata)
         return cached_path, metadata
 
     async def upload_file(self, file_path: str, metadata: dict, mode: str):
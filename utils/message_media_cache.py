@@ -0,0 +1,212 @@
+"""
+Message Media Cache
+-------------------
+Keeps recently downloaded message media so chained edits of the same
+replied file (`.blur`, then `.sepia`, then `.sticker`, ...) skip the
+browser round-trip. Entries are keyed by the resolved message id and kept
+in memory up to MESSAGE_MEDIA_CACHE_MB; least recently used entries past
+that are spilled to disk, which is bounded by MESSAGE_MEDIA_CACHE_DISK_MB
+and evicted oldest first. Spill files only live for one run.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import config
+
+logger = logging.getLogger("Astra.MessageMediaCache")
+
+
+class _Entry:
+    __slots__ = ("size", "data", "path")
+
+    def __init__(self, size: int, data: Optional[bytes] = None, path: Optional[str] = None):
+        self.size = size
+        self.data = data  # held in memory, or
+        self.path = path  # spilled to disk
+
+
+def _write(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class MessageMediaCache:
+    """Bytes-budgeted LRU of message media, in memory with disk spill."""
+
+    def __init__(self, spill_dir: Optional[str] = None):
+        self.spill_dir = spill_dir or os.path.join(config.BASE_DIR, "temp", "message_media")
+        # Least recently used first.
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._memory = 0
+        self._disk = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._prepared = False
+        self.hits = 0
+        self.misses = 0
+
+    # --- Budgets ---
+
+    @staticmethod
+    def _memory_budget() -> int:
+        return max(0, config.MESSAGE_MEDIA_CACHE_MB) * 1024 * 1024
+
+    @staticmethod
+    def _disk_budget() -> int:
+        return max(0, config.MESSAGE_MEDIA_CACHE_DISK_MB) * 1024 * 1024
+
+    def _fits(self, size: int) -> bool:
+        return size <= max(self._memory_budget(), self._disk_budget())
+
+    # --- Internals ---
+
+    def _guard(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _prepare(self):
+        if self._prepared:
+            return
+        # Spill files left by a previous run are not indexed; start clean.
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._prepared = True
+
+    def _spill_path(self, key: str) -> str:
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        if entry.data is not None:
+            self._memory -= entry.size
+        if entry.path is not None:
+            self._disk -= entry.size
+            _remove(entry.path)
+
+    async def _rebalance(self):
+        """Spills the coldest in-memory entries, then evicts the coldest spilled ones."""
+        while self._memory > self._memory_budget():
+            key, entry = next((k, e) for k, e in self._entries.items() if e.data is not None)
+            if entry.size > self._disk_budget():
+                self._drop(key)
+                continue
+            path = self._spill_path(key)
+            await asyncio.to_thread(_write, path, entry.data)
+            entry.data, entry.path = None, path
+            self._memory -= entry.size
+            self._disk += entry.size
+        while self._disk > self._disk_budget():
+            key = next(k for k, e in self._entries.items() if e.path is not None)
+            self._drop(key)
+
+    # --- Public API ---
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Cached media for `key`, or None (counted as a miss)."""
+        async with self._guard():
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if entry.data is not None:
+                self.hits += 1
+                return entry.data
+            try:
+                data = await asyncio.to_thread(_read, entry.path)
+            except OSError as e:
+                logger.debug(f"Spilled media for {key} is gone: {e}")
+                self._drop(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            # Back into memory while it is hot; something colder spills instead.
+            if entry.size <= self._memory_budget():
+                _remove(entry.path)
+                entry.data, entry.path = data, None
+                self._disk -= entry.size
+                self._memory += entry.size
+                await self._rebalance()
+            return data
+
+    async def copy_to(self, key: str, path: str) -> Optional[int]:
+        """Writes cached media for `key` to `path`; bytes written, or None on a miss."""
+        async with self._guard():
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                try:
+                    if entry.data is not None:
+                        await asyncio.to_thread(_write, path, entry.data)
+                    else:
+                        await asyncio.to_thread(shutil.copyfile, entry.path, path)
+                    self.hits += 1
+                    return entry.size
+                except OSError as e:
+                    logger.debug(f"Cached media for {key} could not be copied: {e}")
+                    self._drop(key)
+            self.misses += 1
+            return None
+
+    async def put(self, key: str, data: bytes):
+        """Caches `data` in memory, spilling colder entries as needed."""
+        if not self._fits(len(data)):
+            return
+        async with self._guard():
+            self._prepare()
+            self._drop(key)
+            self._entries[key] = _Entry(len(data), data=data)
+            self._memory += len(data)
+            await self._rebalance()
+
+    async def put_file(self, key: str, path: str):
+        """Caches a copy of the file at `path` straight on disk."""
+        size = os.path.getsize(path)
+        if size > self._disk_budget():
+            return
+        async with self._guard():
+            self._prepare()
+            self._drop(key)
+            spill = self._spill_path(key)
+            try:
+                await asyncio.to_thread(shutil.copyfile, path, spill)
+            except OSError as e:
+                logger.debug(f"Could not cache {path}: {e}")
+                _remove(spill)
+                return
+            self._entries[key] = _Entry(size, path=spill)
+            self._disk += size
+            await self._rebalance()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "memory": self._memory,
+            "disk": self._disk,
+        }
+
+
+# Singleton Export
+message_media_cache = MessageMediaCache()
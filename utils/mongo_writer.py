@@ -0,0 +1,321 @@
+"""
+MongoDB Write-Behind Pipeline
+-----------------------------
+A single background writer that mirrors local writes into MongoDB.
+Operations are coalesced per document (last write wins for `$set`,
+`$inc` deltas are summed), sent in unordered `bulk_write` batches and
+retried with exponential backoff. Every operation is first committed to
+the SQLite `mongo_outbox` table by the Database, so nothing queued is
+lost across restarts; the writer only acknowledges rows MongoDB accepted.
+"""
+
+import asyncio
+import copy
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config import config
+from pymongo import DeleteOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger("Astra.MongoWriter")
+
+# An operation is a JSON-serializable dict:
+#   {"k": "update", "f": {path: [op, value]}}   op is "set", "inc" or "unset"
+#   {"k": "replace", "doc": {...}}             produced by delete + update
+#   {"k": "delete"}
+MongoOp = Dict[str, Any]
+DocKey = Tuple[str, Any]
+OutboxRow = Tuple[int, str, Any, MongoOp]
+
+# Writes rejected by MongoDB itself (not connectivity failures) are retried
+# this many times before being dropped with an error.
+MAX_WRITE_ERROR_RETRIES = 5
+
+
+def update_op(set: Optional[dict] = None, inc: Optional[dict] = None, unset: Optional[list] = None) -> MongoOp:
+    fields = {}
+    for path, value in (set or {}).items():
+        fields[path] = ["set", value]
+    for path, value in (inc or {}).items():
+        fields[path] = ["inc", value]
+    for path in unset or ():
+        fields[path] = ["unset", ""]
+    return {"k": "update", "f": fields}
+
+
+def delete_op() -> MongoOp:
+    return {"k": "delete"}
+
+
+def _apply_field(doc: dict, op: str, path: str, value: Any):
+    """Applies one update operator to a plain dict, following dotted paths."""
+    *parents, leaf = path.split(".")
+    for part in parents:
+        child = doc.get(part)
+        if not isinstance(child, dict):
+            if op == "unset":
+                return
+            child = doc[part] = {}
+        doc = child
+    if op == "set":
+        doc[leaf] = copy.deepcopy(value)
+    elif op == "inc":
+        doc[leaf] = (doc.get(leaf) or 0) + value
+    else:
+        doc.pop(leaf, None)
+
+
+def _merge_field(fields: dict, op: str, path: str, value: Any):
+    """
+    Folds one operator into a coalesced update. MongoDB rejects updates
+    whose paths overlap (`members` and `members.x`), so a write below an
+    already-set path is applied into that value instead.
+    """
+    prev = fields.get(path)
+    if op == "inc" and prev is not None and prev[0] in ("set", "inc"):
+        base = prev[1] if isinstance(prev[1], (int, float)) else 0
+        fields[path] = [prev[0], base + value]
+        return
+
+    for other in [p for p in fields if p.startswith(path + ".")]:
+        del fields[other]
+
+    parts = path.split(".")
+    for i in range(1, len(parts)):
+        parent = ".".join(parts[:i])
+        if parent not in fields:
+            continue
+        p_op, p_value = fields[parent]
+        if p_op == "unset" and op == "unset":
+            return
+        base = copy.deepcopy(p_value) if p_op == "set" and isinstance(p_value, dict) else {}
+        _apply_field(base, op, ".".join(parts[i:]), value)
+        fields[parent] = ["set", base]
+        return
+
+    fields[path] = [op, value]
+
+
+def merge_ops(prev: Optional[MongoOp], new: MongoOp) -> MongoOp:
+    """Coalesces two operations on the same document into one."""
+    if prev is None or new["k"] != "update":
+        return new
+
+    if prev["k"] == "update":
+        fields = copy.deepcopy(prev["f"])
+        for path, (op, value) in new["f"].items():
+            _merge_field(fields, op, path, value)
+        return {"k": "update", "f": fields}
+
+    # delete/replace followed by an update: the result is a known document.
+    doc = copy.deepcopy(prev.get("doc", {}))
+    for path, (op, value) in new["f"].items():
+        _apply_field(doc, op, path, value)
+    return {"k": "replace", "doc": doc}
+
+
+def to_request(doc_id: Any, op: MongoOp):
+    """Builds the pymongo bulk request for a coalesced operation."""
+    if op["k"] == "delete":
+        return DeleteOne({"_id": doc_id})
+    if op["k"] == "replace":
+        return ReplaceOne({"_id": doc_id}, op["doc"], upsert=True)
+
+    update: Dict[str, dict] = {}
+    for path, (field_op, value) in op["f"].items():
+        update.setdefault(f"${field_op}", {})[path] = value
+    return UpdateOne({"_id": doc_id}, update, upsert=True)
+
+
+class MongoWriter:
+    """
+    Drains outbox operations into MongoDB from one background task.
+
+    At most MONGO_WRITE_QUEUE_MAX documents are held in memory. Beyond
+    that the writer stops accepting operations and reads them back from
+    the outbox in order once it has caught up.
+    """
+
+    def __init__(self):
+        self.mongo_db = None
+        self._load: Optional[Callable[[int, int], Awaitable[List[OutboxRow]]]] = None
+        self._ack: Optional[Callable[[List[int]], Any]] = None
+
+        # (collection, _id) -> {"op", "seqs", "attempts"}; dicts keep insertion order.
+        self._pending: Dict[DocKey, Dict[str, Any]] = {}
+        self._last_seq = 0
+        self._spilled = False
+        self._spilled_upto = 0
+        self._failures = 0
+        self._wake = asyncio.Event()
+        self._drain_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.written = 0
+        self.dropped = 0
+
+    def attach(self, mongo_db, load, ack):
+        """
+        Binds the writer to a MongoDB database and the outbox callbacks:
+        `load(after_seq, limit)` returns persisted rows in seq order and
+        `ack(seqs)` deletes rows once MongoDB has applied them.
+        """
+        self.mongo_db = mongo_db
+        self._load = load
+        self._ack = ack
+        # Everything unacknowledged lives in the outbox, so start from it.
+        self._pending = {}
+        self._last_seq = 0
+        self._spilled = True
+        self._spilled_upto = 0
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    @property
+    def backlog(self) -> int:
+        return len(self._pending)
+
+    def submit(self, rows: List[OutboxRow]):
+        """Accepts operations that were just committed to the outbox."""
+        for seq, collection, doc_id, op in rows:
+            if seq <= self._last_seq:
+                continue
+            if self._spilled or len(self._pending) >= config.MONGO_WRITE_QUEUE_MAX:
+                # Leave it in the outbox; _refill() picks it up in order.
+                if not self._spilled:
+                    logger.warning("Mongo write queue is full, deferring writes to the outbox.")
+                self._spilled = True
+                self._spilled_upto = max(self._spilled_upto, seq)
+                continue
+            self._accept(seq, collection, doc_id, op)
+        self._wake.set()
+
+    def _accept(self, seq: int, collection: str, doc_id: Any, op: MongoOp):
+        entry = self._pending.get((collection, doc_id))
+        if entry is None:
+            self._pending[(collection, doc_id)] = {"op": op, "seqs": [seq], "attempts": 0}
+        else:
+            entry["op"] = merge_ops(entry["op"], op)
+            entry["seqs"].append(seq)
+        self._last_seq = max(self._last_seq, seq)
+
+    async def _refill(self):
+        """Moves deferred outbox rows back into memory once there is room."""
+        room = config.MONGO_WRITE_QUEUE_MAX - len(self._pending)
+        if room <= 0:
+            return
+        rows = await self._load(self._last_seq, room)
+        for seq, collection, doc_id, op in rows:
+            self._accept(seq, collection, doc_id, op)
+        if not rows or (len(rows) < room and self._last_seq >= self._spilled_upto):
+            self._spilled = False
+
+    def _requeue(self, batch: Dict[DocKey, Dict[str, Any]]):
+        """Puts failed entries back underneath anything submitted meanwhile."""
+        newer, self._pending = self._pending, batch
+        for key, entry in newer.items():
+            prev = self._pending.get(key)
+            if prev is None:
+                self._pending[key] = entry
+            else:
+                prev["op"] = merge_ops(prev["op"], entry["op"])
+                prev["seqs"].extend(entry["seqs"])
+
+    async def _write_batch(self) -> bool:
+        """Sends one batch; returns False if MongoDB could not be reached."""
+        keys = list(self._pending)[: config.MONGO_WRITE_BATCH_SIZE]
+        batch = {key: self._pending.pop(key) for key in keys}
+
+        by_collection: Dict[str, List[DocKey]] = {}
+        for key in keys:
+            by_collection.setdefault(key[0], []).append(key)
+
+        acked, failed, ok = [], {}, True
+        for collection, coll_keys in by_collection.items():
+            requests = [to_request(key[1], batch[key]["op"]) for key in coll_keys]
+            try:
+                await self.mongo_db[collection].bulk_write(requests, ordered=False)
+                acked.extend(coll_keys)
+            except BulkWriteError as e:
+                bad = {err["index"] for err in e.details.get("writeErrors", [])}
+                for index, key in enumerate(coll_keys):
+                    if index not in bad:
+                        acked.append(key)
+                        continue
+                    entry = batch[key]
+                    entry["attempts"] += 1
+                    if entry["attempts"] >= MAX_WRITE_ERROR_RETRIES:
+                        logger.error(f"Dropping MongoDB write to {collection}/{key[1]} after repeated errors.")
+                        self.dropped += 1
+                        acked.append(key)
+                    else:
+                        failed[key] = entry
+                if e.details.get("writeConcernErrors"):
+                    ok = False
+            except Exception as e:
+                logger.error(f"MongoDB bulk write to {collection} failed: {e}")
+                failed.update({key: batch[key] for key in coll_keys})
+                ok = False
+
+        if failed:
+            self._requeue(failed)
+        if acked:
+            self.written += len(acked)
+            seqs = [seq for key in acked for seq in batch[key]["seqs"]]
+            try:
+                await self._ack(seqs)
+            except Exception as e:
+                logger.error(f"Failed to acknowledge {len(seqs)} outbox rows: {e}")
+        return ok and not failed
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await asyncio.sleep(config.MONGO_WRITE_INTERVAL_MS / 1000)
+            try:
+                await self.drain()
+                self._failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failures += 1
+                delay = min(config.MONGO_RETRY_MAX_DELAY, 0.5 * 2 ** self._failures)
+                logger.warning(f"MongoDB writer backing off for {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                self._wake.set()
+
+    async def drain(self):
+        """Writes everything queued (including deferred outbox rows) or raises."""
+        if self.mongo_db is None:
+            return
+        async with self._drain_lock:
+            while True:
+                if self._spilled:
+                    await self._refill()
+                if not self._pending:
+                    if not self._spilled:
+                        return
+                    continue
+                if not await self._write_batch():
+                    raise ConnectionError(f"{len(self._pending)} documents still pending")
+
+    async def close(self, timeout: float = 5.0):
+        """Stops the background task after a best-effort final drain."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except Exception as e:
+            logger.warning(f"Unsent MongoDB writes stay in the outbox until next start: {e}")
+
+
+# Singleton Export
+mongo_writer = MongoWriter()
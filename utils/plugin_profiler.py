@@ -0,0 +1,126 @@
+"""
+Plugin Import Profiler
+----------------------
+Measures what each plugin import costs: wall time, CPU time and the
+resident memory it adds, including heavy third-party packages pulled in
+transitively (the first plugin to import e.g. cv2 pays for it). Boot and
+reload runs are kept as profiles; the last PLUGIN_PROFILE_HISTORY of them
+are persisted for `.plugins --timings` and the boot message.
+"""
+
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from config import config
+
+logger = logging.getLogger("Astra.PluginProfiler")
+
+PROFILES_KEY = "plugin_boot_profiles"
+# How many newly imported top-level packages to remember per plugin.
+MAX_NEW_PACKAGES = 8
+
+
+def _top_level_packages(names) -> List[str]:
+    packages = {name.split(".")[0] for name in names}
+    return sorted(p for p in packages if p not in ("commands", "utils") and not p.startswith("_"))
+
+
+class PluginProfiler:
+    """Collects per-plugin import costs for the current boot or reload."""
+
+    def __init__(self):
+        self._process = psutil.Process(os.getpid())
+        self.current: Optional[Dict[str, Any]] = None
+        self.last: Optional[Dict[str, Any]] = None
+        # Plugins imported outside a boot (lazy first use, single reloads).
+        self.on_demand: Dict[str, Dict[str, Any]] = {}
+
+    def _rss(self) -> int:
+        try:
+            return self._process.memory_info().rss
+        except Exception:
+            return 0
+
+    def start(self, mode: str = "boot"):
+        """Begins a profile; every plugin measured until finish() belongs to it."""
+        self.current = {
+            "mode": mode,
+            "started_at": int(time.time()),
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "_rss": self._rss(),
+            "plugins": {},
+        }
+
+    @contextmanager
+    def measure(self, plugin_name: str):
+        """Times one plugin import (and everything it imports)."""
+        modules_before = set(sys.modules)
+        wall, cpu, rss = time.perf_counter(), time.process_time(), self._rss()
+        record = {"ok": False}
+        try:
+            yield record
+            record["ok"] = True
+        finally:
+            new_modules = set(sys.modules) - modules_before
+            record.update(
+                {
+                    "wall_ms": round((time.perf_counter() - wall) * 1000, 1),
+                    "cpu_ms": round((time.process_time() - cpu) * 1000, 1),
+                    "rss_kb": max(0, (self._rss() - rss) // 1024),
+                    "modules": len(new_modules),
+                    "packages": _top_level_packages(new_modules)[:MAX_NEW_PACKAGES],
+                }
+            )
+            target = self.current["plugins"] if self.current is not None else self.on_demand
+            target[plugin_name] = record
+
+    async def finish(self) -> Optional[Dict[str, Any]]:
+        """Closes the current profile and persists it with the previous ones."""
+        profile, self.current = self.current, None
+        if profile is None:
+            return None
+
+        profile["wall_ms"] = round((time.perf_counter() - profile.pop("_wall")) * 1000, 1)
+        profile["cpu_ms"] = round((time.process_time() - profile.pop("_cpu")) * 1000, 1)
+        profile["rss_kb"] = max(0, (self._rss() - profile.pop("_rss")) // 1024)
+        profile["rss_total_kb"] = self._rss() // 1024
+        self.last = profile
+
+        try:
+            from utils.database import db
+
+            history = await db.get(PROFILES_KEY) or []
+            history.append(profile)
+            await db.set(PROFILES_KEY, history[-max(1, config.PLUGIN_PROFILE_HISTORY) :])
+        except Exception as e:
+            logger.warning(f"Could not persist plugin boot profile: {e}")
+
+        slowest = ", ".join(f"{name} {rec['wall_ms']:.0f}ms" for name, rec in self.slowest(profile, 3))
+        logger.info(
+            f"Plugin {profile['mode']}: {len(profile['plugins'])} plugins in {profile['wall_ms']:.0f}ms "
+            f"(+{profile['rss_kb'] // 1024} MB RSS); slowest: {slowest or '-'}"
+        )
+        return profile
+
+    async def history(self) -> List[Dict[str, Any]]:
+        """Persisted profiles, oldest first."""
+        from utils.database import db
+
+        return await db.get(PROFILES_KEY) or []
+
+    @staticmethod
+    def slowest(profile: Dict[str, Any], limit: int = 10):
+        """(plugin, record) pairs of a profile ordered by wall time."""
+        plugins = (profile or {}).get("plugins", {})
+        return sorted(plugins.items(), key=lambda item: item[1].get("wall_ms", 0), reverse=True)[:limit]
+
+
+# Singleton Export
+plugin_profiler = PluginProfiler()
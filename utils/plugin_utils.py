@@ -1,8 +1,9 @@
 import asyncio
-from typing import Dict, List, Optional
+import sys
+from typing import Dict, Iterable, List, Optional, Set
 
 from config import config
-from utils.state import state
+from utils.context import get_context
 
 from astra import Client, Filters, Message
 
@@ -13,48 +14,16 @@ COMMANDS_METADATA: List[Dict] = []
 async def is_authorized(event) -> bool:
     """
     Checks if the event sender is the owner, a sudo user, or the bot account itself.
+    The verdict is memoized on the message, so every filter shares one check.
     """
-    sender_id = getattr(event, "sender_id", None) or getattr(event, "chat_id", None)
-    if not sender_id:
-        return False
-
-    # 1. From Me (Self/Bot Account)
-    from_me = getattr(event, "from_me", False)
-    if from_me:
-        return True
-
-    # Normalize sender_id for lookup (Primary JID only, handle multi-device)
-    sid_str = str(sender_id)
-    primary_id = sid_str.split("@")[0].split(":")[0] + "@" + sid_str.split("@")[1] if "@" in sid_str else sid_str
-
-    # 2. Sudo Users
-    if state.is_sudo(primary_id):
-        return True
-
-    # 3. Owner
-    sender_num = primary_id.split("@")[0]
-    if str(config.OWNER_ID) == sender_num:
-        return True
-
-    return False
+    ctx = get_context(event)
+    return bool(ctx.sender_id) and ctx.is_authorized
 
 
 async def is_owner(event) -> bool:
-    """Strictly checks if the event sender is the bot owner."""
-    sender_id = getattr(event, "sender_id", None) or getattr(event, "chat_id", None)
-    if not sender_id:
-        return False
-
-    # Check if message is from the bot account itself (considered owner)
-    if getattr(event, "from_me", False):
-        return True
-
-    # Normalize sender_id for lookup (Primary JID only, handle multi-device)
-    sid_str = str(sender_id)
-    primary_id = sid_str.split("@")[0].split(":")[0] + "@" + sid_str.split("@")[1] if "@" in sid_str else sid_str
-
-    sender_num = primary_id.split("@")[0]
-    return str(config.OWNER_ID) == sender_num
+    """Strictly checks if the event sender is the bot owner (or the bot account itself)."""
+    ctx = get_context(event)
+    return bool(ctx.sender_id) and ctx.is_owner
 
 
 # Exported filters
@@ -80,6 +49,13 @@ def _install_plain_text_hooks():
     return
 
 
+def _register_metadata(entry: Dict):
+    # Mutate in-place to ensure all modules see the updates.
+    # Remove every stale entry for this command name to prevent count inflation.
+    COMMANDS_METADATA[:] = [cmd for cmd in COMMANDS_METADATA if cmd.get("name") != entry["name"]]
+    COMMANDS_METADATA.append(entry)
+
+
 def astra_command(
     name: str,
     description: str = "",
@@ -88,20 +64,24 @@ def astra_command(
     usage: str = "",
     owner_only: bool = False,
     is_public: bool = False,
+    workload: Optional[str] = None,
 ):
     """
     Unified decorator for Astra Userbot commands.
-    Registers the command as a native handler and stores metadata for the help menu.
+    Registers the command with the central router and stores metadata for the help menu.
+    `workload` (light/network/cpu/media) picks the scheduler class; it defaults per module.
     """
     if aliases is None:
         aliases = []
 
     # 1. Capture calling module info (Helpful for plugin-wise categorization like CatUserbot)
-    import inspect
+    # Reading the caller's globals is O(1); inspect.stack() would resolve every frame's source.
+    caller = sys._getframe(1).f_globals.get("__name__") or ""
+    module_name = caller.split(".")[-1] if caller else "General"
+
+    from utils.scheduler import workload_for
 
-    frame = inspect.stack()[1]
-    module = inspect.getmodule(frame[0])
-    module_name = module.__name__.split(".")[-1] if module else "General"
+    workload = workload_for(module_name, workload)
 
     # Register metadata (Replacing if exists)
     new_entry = {
@@ -113,52 +93,38 @@ def astra_command(
         "usage": usage,
         "owner_only": owner_only,
         "is_public": is_public,
+        "workload": workload,
     }
-    # Mutate in-place to ensure all modules see the updates.
-    # Remove every stale entry for this command name to prevent count inflation.
-    COMMANDS_METADATA[:] = [cmd for cmd in COMMANDS_METADATA if cmd.get("name") != name]
-    COMMANDS_METADATA.append(new_entry)
+    _register_metadata(new_entry)
 
     def decorator(func):
-        # Build the native filter by ORing name and aliases
-        names = [name] + aliases
-
-        # 1. Base Command Filter (with prefixes)
-        crit = Filters.command(names[0], prefixes="!./")
-        for alias in names[1:]:
-            crit |= Filters.command(alias, prefixes="!./")
-
-        # 2. NO_HNDLR Support (without prefixes)
-        # Prefix-less matching is now handled better by EventDispatcher + CommandCriterion(prefixes="")
-        if config.NO_HNDLR:
-            crit |= Filters.command(names, prefixes="")
-
-        # Apply Global Startup Filter (Ignore old messages)
-        crit = crit & startup_filter
-
-        # Apply Authorization Logic
-        if owner_only:
-            crit = crit & owner_filter
-        elif not is_public:
-            crit = crit & authorized_filter
-
         # --- Global Wrapper for Error Handling & Analytics ---
         import functools
         @functools.wraps(func)
         async def global_wrapper(client: Client, message: Message, *args, **kwargs):
-            # 1. Analytics: Track command usage
+            # 1. Analytics: Track command usage (buffered, flushed in the background)
             try:
-                from utils.database import db
-                from utils.helpers import safe_task
+                from utils.counters import counters
                 # We use the primary command name for stats
-                safe_task(db.increment(f"cmd_usage:{name}"), log_context=f"Analytics:{name}")
-                safe_task(db.increment("total_commands_v2"), log_context="Analytics:Total")
+                counters.track(name)
             except:
                 pass
 
-            # 2. Execution & Error Handling
+            # 2. Scheduling, Execution & Error Handling
+            from utils.scheduler import LIGHT, scheduler
+
+            async def notify_queued(position: int):
+                if workload != LIGHT:
+                    from utils.helpers import edit_or_reply
+                    await edit_or_reply(message, f"⏳ Queued: #{position} in the {workload} queue")
+
             try:
-                return await func(client, message, *args, **kwargs)
+                return await scheduler.run(
+                    workload,
+                    get_context(message).chat_id,
+                    lambda: func(client, message, *args, **kwargs),
+                    notify_queued,
+                )
             except Exception as e:
                 from utils.error_reporter import ErrorReporter
                 module_name = func.__module__.split(".")[-1] if hasattr(func, "__module__") else "unknown"
@@ -166,13 +132,129 @@ def astra_command(
                     client, message, e, context=f"{module_name}.{func.__name__}"
                 )
 
-        # Register as a class-level handler for Client.load_plugins()
-        Client.on_message(crit)(global_wrapper)
+        # Queue the route; load_plugin() activates it in the central router.
+        _PENDING_ROUTES.append(
+            {
+                "name": name,
+                "words": [w.lower() for w in [name] + aliases],
+                "func": global_wrapper,
+                "module": getattr(func, "__module__", ""),
+                "owner_only": owner_only,
+                "is_public": is_public,
+            }
+        )
         return global_wrapper
 
     return decorator
 
 
+# --- Command Router ---
+# Instead of one filter chain per command, a single message handler parses
+# the command word once and looks it up here (name/alias -> routes).
+COMMAND_PREFIXES = "!./"
+COMMAND_ROUTES: Dict[str, List[Dict]] = {}
+_PENDING_ROUTES: List[Dict] = []
+_ROUTER_CLIENTS: set = set()
+
+
+class ParsedCommand:
+    """Command word and arguments attached to the message as `message.command`."""
+
+    __slots__ = ("name", "prefix", "args")
+
+    def __init__(self, name: str, prefix: str, args: List[str]):
+        self.name = name
+        self.prefix = prefix
+        self.args = args
+
+
+def parse_command(body: str) -> Optional[ParsedCommand]:
+    """
+    Splits a message body into prefix, lowercase command word and arguments.
+    Returns None when the body cannot be a command invocation.
+    """
+    parts = body.split()
+    if not parts:
+        return None
+
+    word = parts[0]
+    prefix = ""
+    if word[0] in COMMAND_PREFIXES:
+        prefix, word = word[0], word[1:]
+    elif not config.NO_HNDLR:
+        return None
+
+    if not word:
+        return None
+    return ParsedCommand(word.lower(), prefix, parts[1:])
+
+
+def _activate_routes(plugin_name: str) -> int:
+    """Moves the pending routes of one plugin into the routing table."""
+    activated = 0
+    remaining = []
+    for route in _PENDING_ROUTES:
+        if route["module"] != plugin_name:
+            remaining.append(route)
+            continue
+        for word in route["words"]:
+            routes = COMMAND_ROUTES.setdefault(word, [])
+            # A re-registered command replaces its previous route.
+            routes[:] = [r for r in routes if (r["module"], r["name"]) != (plugin_name, route["name"])]
+            routes.append(route)
+        activated += 1
+    _PENDING_ROUTES[:] = remaining
+    return activated
+
+
+def _remove_routes(plugin_name: str):
+    for word in list(COMMAND_ROUTES):
+        routes = [r for r in COMMAND_ROUTES[word] if r["module"] != plugin_name]
+        if routes:
+            COMMAND_ROUTES[word] = routes
+        else:
+            del COMMAND_ROUTES[word]
+
+
+async def _route_allowed(route: Dict, message) -> bool:
+    if route["owner_only"]:
+        return await is_owner(message)
+    if not route["is_public"]:
+        return await is_authorized(message)
+    return True
+
+
+def _install_router(client: Client):
+    """Registers the central command dispatcher once per client."""
+    if id(client) in _ROUTER_CLIENTS:
+        return
+
+    async def dispatch_command(message: Message):
+        parsed = parse_command(getattr(message, "body", "") or "")
+        if parsed is None:
+            return
+        routes = COMMAND_ROUTES.get(parsed.name)
+        if not routes:
+            return
+
+        try:
+            message.command = parsed
+        except Exception:
+            pass
+
+        # Copy: a command may reload plugins and mutate the table while running.
+        # Each command runs as its own task so one waiting in the scheduler
+        # queue never holds up dispatch of the next message.
+        from utils.helpers import safe_task
+
+        for route in list(routes):
+            if await _route_allowed(route, message):
+                safe_task(route["func"](client, message), log_context=f"command.{route['name']}")
+
+    client.on("message", criteria=startup_filter)(dispatch_command)
+    _ROUTER_CLIENTS.add(id(client))
+
+
 def extract_args(message) -> List[str]:
     """
     Safely extracts command arguments from a message object.
@@ -206,10 +288,12 @@ def extract_args(message) -> List[str]:
 import importlib
 import logging
 import re
-import sys
 
 logger = logging.getLogger("Astra.Plugins")
 PLUGIN_HANDLES: Dict[str, List[int]] = {}
+# Plugins registered from the manifest whose module has not been imported yet.
+LAZY_STUBS: Set[str] = set()
+_LAZY_LOCKS: Dict[str, asyncio.Lock] = {}
 
 
 def _is_safe_plugin_module(plugin_name: str) -> bool:
@@ -220,6 +304,45 @@ def _is_safe_plugin_module(plugin_name: str) -> bool:
     return bool(re.fullmatch(r"[a-zA-Z_][a-zA-Z0-9_]*", module))
 
 
+def _register_plugin(client: Client, plugin_name: str):
+    """Activates the routes and class handlers an imported plugin declared."""
+    _install_router(client)
+    _activate_routes(plugin_name)
+
+    handles = []
+    if hasattr(Client, "_class_handlers"):
+        pending = list(Client._class_handlers)
+        module_handlers = []
+        remaining_handlers = []
+
+        # Only register handlers that belong to the plugin currently being loaded.
+        for event, func, criteria in pending:
+            func_module = getattr(func, "__module__", "")
+            if func_module == plugin_name:
+                module_handlers.append((event, func, criteria))
+            else:
+                remaining_handlers.append((event, func, criteria))
+
+        for event, func, criteria in module_handlers:
+            # Better Filtering: Automatically inject Startup Isolation for all message events
+            # This ensures any plugin (even without astra_command) ignores old messages.
+            if event == "message":
+                criteria = (criteria & startup_filter) if criteria else startup_filter
+
+            # Pass-through wrapper for loading
+            async def load_wrapper(event_payload, _f=func):
+                return await _f(client, event_payload)
+
+            # Register and capture handle
+            handle = client.on(event, criteria=criteria)(load_wrapper)
+            handles.append(handle)
+
+        # Keep non-target handlers for their own plugin load calls.
+        Client._class_handlers = remaining_handlers
+
+    PLUGIN_HANDLES[plugin_name] = handles
+
+
 def load_plugin(client: Client, plugin_name: str) -> bool:
     """
     Loads or reloads a plugin module and registers its handlers.
@@ -235,50 +358,19 @@ def load_plugin(client: Client, plugin_name: str) -> bool:
         if was_active:
             unload_plugin(client, plugin_name)
 
-        # 1. Import or Reload Module
-        if plugin_name in sys.modules:
-            module = importlib.reload(sys.modules[plugin_name])
-            if was_active:
-                logger.info(f"Reloaded plugin: {plugin_name}")
+        # 1. Import or Reload Module (timed for the boot profile)
+        from utils.plugin_profiler import plugin_profiler
+
+        with plugin_profiler.measure(plugin_name) as timing:
+            if plugin_name in sys.modules:
+                module = importlib.reload(sys.modules[plugin_name])
             else:
-                logger.info(f"Loaded plugin: {plugin_name}")
-        else:
-            module = importlib.import_module(plugin_name)
-            logger.info(f"Loaded plugin: {plugin_name}")
-
-        # 2. Register Handlers
-        handles = []
-        if hasattr(Client, "_class_handlers"):
-            pending = list(Client._class_handlers)
-            module_handlers = []
-            remaining_handlers = []
-
-            # Only register handlers that belong to the plugin currently being loaded.
-            for event, func, criteria in pending:
-                func_module = getattr(func, "__module__", "")
-                if func_module == plugin_name:
-                    module_handlers.append((event, func, criteria))
-                else:
-                    remaining_handlers.append((event, func, criteria))
-
-            for event, func, criteria in module_handlers:
-                # Better Filtering: Automatically inject Startup Isolation for all message events
-                # This ensures any plugin (even without astra_command) ignores old messages.
-                if event == "message":
-                    criteria = (criteria & startup_filter) if criteria else startup_filter
-
-                # Pass-through wrapper for loading
-                async def load_wrapper(event_payload, _f=func):
-                    return await _f(client, event_payload)
-
-                # Register and capture handle
-                handle = client.on(event, criteria=criteria)(load_wrapper)
-                handles.append(handle)
-
-            # Keep non-target handlers for their own plugin load calls.
-            Client._class_handlers = remaining_handlers
-
-        PLUGIN_HANDLES[plugin_name] = handles
+                module = importlib.import_module(plugin_name)
+        verb = "Reloaded" if was_active else "Loaded"
+        logger.info(f"{verb} plugin: {plugin_name} ({timing['wall_ms']:.0f} ms)")
+
+        # 2. Register Commands & Handlers
+        _register_plugin(client, plugin_name)
         return True
 
     except Exception as e:
@@ -293,6 +385,8 @@ def unload_plugin(client: Client, plugin_name: str):
     if plugin_name in PLUGIN_HANDLES:
         for handle in PLUGIN_HANDLES[plugin_name]:
             client.events.off(handle)
+        _remove_routes(plugin_name)
+        LAZY_STUBS.discard(plugin_name)
 
         # Remove from metadata registry
         module_name = plugin_name.split(".")[-1]
@@ -327,13 +421,21 @@ def reload_all_plugins(client: Client) -> int:
         # Also patch the live instance
         client.fetch_messages = _patched_fetch.__get__(client, AstraClient)
 
+    from utils.plugin_profiler import plugin_profiler
+
+    plugin_profiler.start("reload")
+
     # 1. Capture and Unload
     current_plugins = list(PLUGIN_HANDLES.keys())
     for p in current_plugins:
         unload_plugin(client, p)
 
     # 2. Core Project Reload
-    # We identify modules belonging to the bot (excluding 'astra' engine)
+    # We identify modules belonging to the bot (excluding 'astra' engine).
+    # Modules owning live singletons (database, scheduler, worker pools, ...)
+    # are never reloaded; re-executing them would fork their state.
+    from utils.reloader import RESTART_REQUIRED
+
     project_root = str(Path(__file__).parent.parent.resolve())
 
     to_reload = []
@@ -343,7 +445,7 @@ def reload_all_plugins(client: Client) -> int:
 
         mod_path = str(Path(mod.__file__).resolve())
         if project_root in mod_path and "astra/" not in mod_path.replace(project_root, ""):
-            if name != "__main__" and name != "utils.plugin_utils":  # Reload us last or not at all?
+            if name != "__main__" and name not in RESTART_REQUIRED:
                 to_reload.append(name)
 
     # Reload Config & Utils first
@@ -380,4 +482,137 @@ def reload_all_plugins(client: Client) -> int:
             if load_plugin(client, mod_name):
                 success += 1
 
+    try:
+        asyncio.get_running_loop().create_task(plugin_profiler.finish())
+    except RuntimeError:
+        pass
     return success
+
+
+# --- Lazy Plugin Loading ---
+def _lazy_command(plugin_name: str, command_name: str):
+    """Stub route handler: imports the plugin on first use, then runs the real command."""
+
+    async def lazy_command(client: Client, message: Message):
+        if not await ensure_plugin(client, plugin_name):
+            return
+        for route in COMMAND_ROUTES.get(command_name.lower(), ()):
+            if route["module"] == plugin_name and route["name"] == command_name:
+                return await route["func"](client, message)
+
+    return lazy_command
+
+
+def register_lazy_plugin(client: Client, plugin_name: str, commands: List[Dict]):
+    """Registers manifest metadata and stub routes for a plugin without importing it."""
+    from utils.scheduler import workload_for
+
+    module_name = plugin_name.split(".")[-1]
+    for command in commands:
+        workload = workload_for(module_name, command.get("workload"))
+        _register_metadata({**command, "module": module_name, "workload": workload})
+        _PENDING_ROUTES.append(
+            {
+                "name": command["name"],
+                "words": [w.lower() for w in [command["name"]] + command["aliases"]],
+                "func": _lazy_command(plugin_name, command["name"]),
+                "module": plugin_name,
+                "owner_only": command["owner_only"],
+                "is_public": command["is_public"],
+            }
+        )
+    _install_router(client)
+    _activate_routes(plugin_name)
+    PLUGIN_HANDLES[plugin_name] = []
+    LAZY_STUBS.add(plugin_name)
+
+
+def _preimport(modules: Iterable[str]):
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except Exception:
+            # Optional dependencies are handled (or reported) by the plugin itself.
+            pass
+
+
+async def ensure_plugin(client: Client, plugin_name: str) -> bool:
+    """Imports a lazily registered plugin and swaps its stubs for the real handlers."""
+    if plugin_name not in LAZY_STUBS:
+        return plugin_name in PLUGIN_HANDLES
+
+    lock = _LAZY_LOCKS.setdefault(plugin_name, asyncio.Lock())
+    async with lock:
+        if plugin_name not in LAZY_STUBS:
+            return plugin_name in PLUGIN_HANDLES
+        from utils.plugin_profiler import plugin_profiler
+
+        from utils.manifest import get_manifest
+
+        dependencies = get_manifest()["plugins"].get(plugin_name, {}).get("imports", [])
+        try:
+            with plugin_profiler.measure(plugin_name):
+                # Heavy third-party imports (cv2, moviepy, ...) run off the event loop;
+                # the plugin itself is imported here, since its decorators write
+                # to the command and handler registries the loop is reading.
+                await asyncio.to_thread(_preimport, dependencies)
+                importlib.import_module(plugin_name)
+        except Exception as e:
+            logger.error(f"Failed to load plugin {plugin_name}: {e}", exc_info=True)
+            return False
+
+        LAZY_STUBS.discard(plugin_name)
+        _remove_routes(plugin_name)
+        _register_plugin(client, plugin_name)
+        logger.info(f"Loaded plugin on demand: {plugin_name}")
+        return True
+
+
+def load_plugins_lazily(client: Client) -> int:
+    """
+    Boots from the plugin manifest: plugins made only of commands get stub
+    routes and are imported on first use; plugins with event listeners (or
+    that cannot be described statically) are loaded eagerly.
+    """
+    from utils.manifest import load_manifest
+
+    manifest = load_manifest()
+    loaded = 0
+    for plugin_name, entry in manifest["plugins"].items():
+        if not _is_safe_plugin_module(plugin_name):
+            continue
+        if entry["lazy"] and plugin_name not in sys.modules:
+            register_lazy_plugin(client, plugin_name, entry["commands"])
+            loaded += 1
+        elif load_plugin(client, plugin_name):
+            loaded += 1
+
+    logger.info(f"Registered {len(LAZY_STUBS)} plugins lazily, {loaded - len(LAZY_STUBS)} eagerly.")
+    return loaded
+
+
+async def warm_up_plugins(client: Client, plugin_names: Iterable[str]):
+    """Imports lazily registered plugins in the background, one at a time."""
+    for plugin_name in plugin_names:
+        if plugin_name in LAZY_STUBS:
+            await ensure_plugin(client, plugin_name)
+            # Give pending messages a turn between imports.
+            await asyncio.sleep(0.1)
+
+
+async def popular_plugins(limit: int) -> List[str]:
+    """Plugins owning the most used commands, most used first."""
+    if limit <= 0:
+        return []
+    from utils.counters import counters
+
+    owners = {}
+    for cmd in COMMANDS_METADATA:
+        owners[cmd["name"]] = f"commands.{cmd['module']}"
+
+    plugins: List[str] = []
+    for name, _ in await counters.top(limit * 3):
+        plugin_name = owners.get(name)
+        if plugin_name and plugin_name not in plugins:
+            plugins.append(plugin_name)
+    return plugins[:limit]
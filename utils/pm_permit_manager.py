@@ -1,7 +1,7 @@
 import logging
-from typing import Any
 
 from config import config
+from utils.context import get_context
 from utils.helpers import get_contact_name, edit_or_reply
 from utils.state import state
 
@@ -21,6 +21,14 @@ async def enforce_pm_protection(client: Client, message: Message):
     if not state.initialized:
         await state.initialize()
 
+    # 1. Resolve IDs once per message (primary JIDs, shared with the command filters)
+    ctx = get_context(message)
+    sender_id = ctx.sender_id
+
+    # 2. Skip if not a private message (@c.us or @lid)
+    if not ctx.is_private:
+        return True
+
     protection_enabled = bool(
         state.get_config("ENABLE_PM_PROTECTION", getattr(config, "ENABLE_PM_PROTECTION", True))
     )
@@ -33,47 +41,16 @@ async def enforce_pm_protection(client: Client, message: Message):
     except Exception:
         warn_limit = 3
 
-    # 1. Resolve IDs safely (handles both JID objects and strings)
-    # We always use the primary JID (stripping device stickers like :4) for logic checks
-    def get_primary(jid: Any) -> str:
-        """Provides a normalized ID without device markers."""
-        if not jid:
-            return ""
-        s = jid.serialized if hasattr(jid, "serialized") else str(jid)
-        if "@" not in s:
-            return s
-        parts = s.split("@")
-        user = parts[0].split(":")[0]
-        return f"{user}@{parts[1]}"
-
-    chat_id = state._normalize_contact_id(get_primary(message.chat_id))
-    sender_raw = message.sender if getattr(message, "sender", None) else getattr(message, "author", None)
-    sender_id = state._normalize_contact_id(get_primary(sender_raw) if sender_raw else chat_id)
-
-    # 2. Skip if not a private message (@c.us or @lid)
-    is_private = chat_id.endswith("@c.us") or chat_id.endswith("@lid")
-    if not is_private:
-        return True
-
     # 3. Skip if security exclusions apply
-    # Exclude Bot Owner
-    sender_num = sender_id.split("@")[0]
-    if str(config.OWNER_ID) == sender_num:
-        return True
-
-    # Exclude From Me (Self Account / My own replies)
-    if message.from_me:
-        return True
-
-    # Exclude Sudo Users
-    if state.is_sudo(sender_id):
+    # Exclude Bot Owner and From Me (Self Account / My own replies)
+    if ctx.is_owner:
         return True
 
-    # Exclude Whitelisted/Permitted Users
-    if state.is_permitted(sender_id):
+    # Exclude Sudo Users and Whitelisted/Permitted Users
+    if ctx.is_sudo or ctx.is_permitted:
         return True
 
-    # 3. Handle Violation
+    # 4. Handle Violation
     logger.info(f"PM Protection triggered for {sender_id}")
 
     # Increment Warning Count
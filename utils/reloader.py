@@ -0,0 +1,296 @@
+"""
+Incremental Hot Reload
+----------------------
+Reloads only what changed on disk. Project modules (`utils/`,
+`commands/`) are fingerprinted by mtime and size, with a sha256 check
+so touched-but-identical files are ignored. A reverse graph of
+module-level imports finds every module that bound names from a changed
+one; those are reloaded after their dependencies, and only the affected
+plugins have their handlers re-registered. A polling watcher can run
+this in the background (HOT_RELOAD).
+"""
+
+import ast
+import asyncio
+import hashlib
+import importlib
+import logging
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import config
+
+logger = logging.getLogger("Astra.Reloader")
+
+PROJECT_PACKAGES = ("utils", "commands")
+
+# Modules owning live singletons (connections, caches, the router) that the
+# rest of the bot holds references to; reloading them would fork that state.
+RESTART_REQUIRED = {
+    "config",
+    "utils.cache_manager",
+    "utils.context",
+    "utils.counters",
+    "utils.database",
+    "utils.media_channel",
+    "utils.message_media_cache",
+    "utils.mongo_writer",
+    "utils.plugin_profiler",
+    "utils.plugin_utils",
+    "utils.reloader",
+    "utils.scheduler",
+    "utils.seen_memes",
+    "utils.state",
+    "utils.yt_search",
+    "utils.ytdlp_pool",
+}
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _module_level_imports(tree: ast.Module) -> List[ast.stmt]:
+    """Import statements executed at import time (not inside functions)."""
+    found, pending = [], list(tree.body)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            found.append(node)
+        elif isinstance(node, (ast.If, ast.Try, ast.With)):
+            for field in ("body", "orelse", "finalbody", "handlers"):
+                pending.extend(getattr(node, field, []) or [])
+        elif isinstance(node, ast.ExceptHandler):
+            pending.extend(node.body)
+    return found
+
+
+class Reloader:
+    """Tracks project module fingerprints and reloads changes incrementally."""
+
+    def __init__(self, root: str = config.BASE_DIR):
+        self.root = root
+        # module -> (mtime, size, sha256)
+        self._fingerprints: Dict[str, Tuple[float, int, str]] = {}
+        # module -> project modules it imports at module level
+        self._imports: Dict[str, Set[str]] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # --- Discovery ---
+
+    def _project_files(self) -> Dict[str, str]:
+        files = {"config": os.path.join(self.root, "config.py")}
+        for package in PROJECT_PACKAGES:
+            directory = os.path.join(self.root, package)
+            if not os.path.isdir(directory):
+                continue
+            for filename in os.listdir(directory):
+                if not filename.endswith(".py"):
+                    continue
+                stem = filename[:-3]
+                files[package if stem == "__init__" else f"{package}.{stem}"] = os.path.join(directory, filename)
+        return files
+
+    def _parse_imports(self, module: str, path: str, known: Set[str]) -> Set[str]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                tree = ast.parse(f.read(), filename=path)
+        except (OSError, SyntaxError, ValueError):
+            return self._imports.get(module, set())
+
+        is_package = path.endswith("__init__.py")
+        package = module if is_package else module.rpartition(".")[0]
+        deps = set()
+        for node in _module_level_imports(tree):
+            if isinstance(node, ast.Import):
+                targets = [alias.name for alias in node.names]
+            else:
+                base = node.module or ""
+                if node.level:
+                    parts = package.split(".") if package else []
+                    parts = parts[: len(parts) - (node.level - 1)] if node.level > 1 else parts
+                    base = ".".join(parts + ([node.module] if node.module else []))
+                # `from utils import helpers` imports the submodule itself.
+                targets = [base] + [f"{base}.{alias.name}" for alias in node.names]
+            deps.update(t for t in targets if t in known and t != module)
+        return deps
+
+    def snapshot(self):
+        """Records the current state of every project module as the baseline."""
+        files = self._project_files()
+        known = set(files)
+        for module, path in files.items():
+            try:
+                stat = os.stat(path)
+                self._fingerprints[module] = (stat.st_mtime, stat.st_size, _file_hash(path))
+            except OSError:
+                continue
+            self._imports[module] = self._parse_imports(module, path, known)
+
+    def changed_modules(self) -> Set[str]:
+        """Modules whose source differs from the last snapshot (updates it)."""
+        files = self._project_files()
+        known = set(files)
+        changed = set()
+        for module, path in files.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            previous = self._fingerprints.get(module)
+            if previous and previous[:2] == (stat.st_mtime, stat.st_size):
+                continue
+            digest = _file_hash(path)
+            self._fingerprints[module] = (stat.st_mtime, stat.st_size, digest)
+            if previous and previous[2] == digest:
+                continue
+            self._imports[module] = self._parse_imports(module, path, known)
+            changed.add(module)
+
+        for module in set(self._fingerprints) - known:
+            del self._fingerprints[module]
+            self._imports.pop(module, None)
+        return changed
+
+    # --- Dependency Graph ---
+
+    def dependents(self, modules: Set[str]) -> Set[str]:
+        """`modules` plus every module importing them, transitively."""
+        reverse: Dict[str, Set[str]] = {}
+        for module, deps in self._imports.items():
+            for dep in deps:
+                reverse.setdefault(dep, set()).add(module)
+
+        affected, stack = set(modules), list(modules)
+        while stack:
+            for parent in reverse.get(stack.pop(), ()):
+                if parent not in affected:
+                    affected.add(parent)
+                    stack.append(parent)
+        return affected
+
+    def reload_order(self, modules: Set[str]) -> List[str]:
+        """Dependencies before dependents; cycles fall back to name order."""
+        order, visiting, done = [], set(), set()
+
+        def visit(module: str):
+            if module in done or module in visiting:
+                return
+            visiting.add(module)
+            for dep in sorted(self._imports.get(module, ()) & modules):
+                visit(dep)
+            visiting.discard(module)
+            done.add(module)
+            order.append(module)
+
+        for module in sorted(modules):
+            visit(module)
+        return order
+
+    # --- Reload ---
+
+    def reload(self, client, changed: Set[str]) -> Dict[str, List[str]]:
+        """Reloads `changed` and its dependents; returns what happened to each module."""
+        from utils.manifest import load_manifest
+        from utils.plugin_utils import (
+            LAZY_STUBS,
+            PLUGIN_HANDLES,
+            load_plugin,
+            register_lazy_plugin,
+            unload_plugin,
+        )
+
+        result: Dict[str, List[str]] = {"reloaded": [], "plugins": [], "skipped": [], "failed": []}
+        blocked = changed & RESTART_REQUIRED
+        if blocked:
+            logger.warning(f"Restart required to apply changes to: {', '.join(sorted(blocked))}")
+            result["skipped"].extend(sorted(blocked))
+
+        affected = self.dependents(changed - RESTART_REQUIRED) - RESTART_REQUIRED
+        manifest = None
+        for module in self.reload_order(affected):
+            is_plugin = module.startswith("commands.")
+            if is_plugin and module in LAZY_STUBS:
+                # Not imported yet: only its manifest entry can be stale.
+                manifest = manifest or load_manifest()
+                entry = manifest["plugins"].get(module)
+                unload_plugin(client, module)
+                if entry:
+                    register_lazy_plugin(client, module, entry["commands"])
+                result["plugins"].append(module)
+            elif is_plugin:
+                # Unloaded plugins stay unloaded; new or edited files get (re)loaded.
+                if module not in PLUGIN_HANDLES and module not in changed:
+                    continue
+                if load_plugin(client, module):
+                    result["plugins"].append(module)
+                else:
+                    result["failed"].append(module)
+            elif module in sys.modules:
+                try:
+                    importlib.reload(sys.modules[module])
+                    result["reloaded"].append(module)
+                except Exception as e:
+                    logger.error(f"Failed to reload {module}: {e}", exc_info=True)
+                    result["failed"].append(module)
+        return result
+
+    async def reload_changed(self, client) -> Dict[str, List[str]]:
+        """Detects changes since the last check and applies them."""
+        async with self._lock:
+            if not self._fingerprints:
+                self.snapshot()
+                return {"reloaded": [], "plugins": [], "skipped": [], "failed": []}
+            changed = self.changed_modules()
+            if not changed:
+                return {"reloaded": [], "plugins": [], "skipped": [], "failed": []}
+
+            started = time.perf_counter()
+            result = self.reload(client, changed)
+            logger.info(
+                f"Hot reload of {', '.join(sorted(changed))}: {len(result['reloaded'])} modules, "
+                f"{len(result['plugins'])} plugins in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            return result
+
+    async def resync(self) -> List[str]:
+        """
+        Resets the baseline after a full reload and returns the modules
+        that changed since the last one but need a restart to apply.
+        """
+        async with self._lock:
+            if not self._fingerprints:
+                self.snapshot()
+                return []
+            return sorted(self.changed_modules() & RESTART_REQUIRED)
+
+    # --- Watcher ---
+
+    def start_watcher(self, client, interval: Optional[float] = None):
+        """Polls the project tree and hot-reloads changes in the background."""
+        if self._task is not None and not self._task.done():
+            return
+        if not self._fingerprints:
+            self.snapshot()
+        self._task = asyncio.create_task(self._watch(client, interval or config.HOT_RELOAD_INTERVAL))
+
+    async def _watch(self, client, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload_changed(client)
+            except Exception as e:
+                logger.error(f"Hot reload watcher error: {e}", exc_info=True)
+
+    def stop_watcher(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Singleton Export
+reloader = Reloader()
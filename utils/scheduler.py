@@ -0,0 +1,230 @@
+"""
+Command Scheduler
+-----------------
+Admission control for command handlers. Every command belongs to a
+workload class (light, network, cpu, media) with its own concurrency
+limit, so a burst of downloads or ffmpeg jobs cannot starve quick
+commands. Waiting jobs are queued per chat: a chat's commands start in
+the order they arrived, and chats take turns (round-robin) so one busy
+chat cannot monopolize a class. A command that calls another command
+of a class it already holds a slot in runs the nested call directly.
+"""
+
+import asyncio
+import logging
+import os
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, FrozenSet, Optional, Tuple
+
+from config import config
+
+logger = logging.getLogger("Astra.Scheduler")
+
+LIGHT, NETWORK, CPU, MEDIA = "light", "network", "cpu", "media"
+WORKLOADS = (LIGHT, NETWORK, CPU, MEDIA)
+
+# Task currently running a scheduled job and the classes it holds slots in.
+# Keyed by task so background tasks spawned by a job (which copy the
+# context) still go through admission.
+_HELD: "ContextVar[Tuple[Optional[asyncio.Task], FrozenSet[str]]]" = ContextVar(
+    "astra_sched_held", default=(None, frozenset())
+)
+
+# Default workload per plugin module; commands may override it with
+# astra_command(workload=...). Anything unlisted is light.
+MODULE_WORKLOADS = {
+    # Downloads that end in ffmpeg/yt-dlp work
+    "facebook": MEDIA,
+    "instagram": MEDIA,
+    "pinterest": MEDIA,
+    "reddit": MEDIA,
+    "snapchat": MEDIA,
+    "song": MEDIA,
+    "soundcloud": MEDIA,
+    "twitter": MEDIA,
+    "youtube": MEDIA,
+    # Local image/audio/video/PDF processing
+    "audio_tools": CPU,
+    "converter_tools": CPU,
+    "image_tools": CPU,
+    "logo_maker": CPU,
+    "sticker": CPU,
+    "text_tools": CPU,
+    "tools_cmd": CPU,
+    "video_tools": CPU,
+    # Remote APIs and scraping
+    "ai_cmd": NETWORK,
+    "anime": NETWORK,
+    "broadcast": NETWORK,
+    "currency": NETWORK,
+    "define": NETWORK,
+    "duckduckgo": NETWORK,
+    "extra_power": NETWORK,
+    "fact": NETWORK,
+    "github": NETWORK,
+    "google": NETWORK,
+    "history": NETWORK,
+    "instagram_info": NETWORK,
+    "joke": NETWORK,
+    "lyrics": NETWORK,
+    "meme": NETWORK,
+    "movie": NETWORK,
+    "pfp": NETWORK,
+    "quote": NETWORK,
+    "shorten": NETWORK,
+    "translate": NETWORK,
+    "tts_tools": NETWORK,
+    "urban": NETWORK,
+    "utility_cmds": NETWORK,
+    "weather": NETWORK,
+    "whois": NETWORK,
+    "wiki": NETWORK,
+    "ytsearch": NETWORK,
+}
+
+
+def workload_for(module_name: str, workload: Optional[str] = None) -> str:
+    """Resolves a command's workload class from an explicit value or its module."""
+    if workload:
+        if workload not in WORKLOADS:
+            raise ValueError(f"Unknown workload '{workload}', expected one of {', '.join(WORKLOADS)}")
+        return workload
+    return MODULE_WORKLOADS.get(module_name, LIGHT)
+
+
+class _Lane:
+    """Concurrency slots of one workload class with per-chat FIFO waiters."""
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self.running = 0
+        # chat -> waiters in arrival order; dict order is the round-robin rotation.
+        self.waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def queued(self) -> int:
+        return sum(len(q) for q in self.waiting.values())
+
+    def try_acquire(self) -> bool:
+        if self.running < self.limit and not self.waiting:
+            self.running += 1
+            return True
+        return False
+
+    def enqueue(self, chat: str) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(chat, deque()).append(future)
+        return future
+
+    def position(self, chat: str, future: asyncio.Future) -> int:
+        """1-based start position of a waiter under round-robin admission."""
+        own = self.waiting.get(chat)
+        if not own or future not in own:
+            return 0
+        index = own.index(future)
+        ahead = index
+        before = True
+        for other, queue in self.waiting.items():
+            if other == chat:
+                before = False
+                continue
+            # Chats earlier in the rotation get index + 1 turns before ours, later ones index.
+            ahead += min(len(queue), index + 1 if before else index)
+        return ahead + 1
+
+    def discard(self, chat: str, future: asyncio.Future):
+        queue = self.waiting.get(chat)
+        if queue and future in queue:
+            queue.remove(future)
+            if not queue:
+                del self.waiting[chat]
+
+    def release(self):
+        self.running -= 1
+        while self.running < self.limit and self.waiting:
+            chat, queue = next(iter(self.waiting.items()))
+            future = queue.popleft()
+            if queue:
+                self.waiting.move_to_end(chat)
+            else:
+                del self.waiting[chat]
+            if future.done():
+                continue
+            self.running += 1
+            future.set_result(None)
+
+
+class CommandScheduler:
+    """Runs command coroutines within their workload's concurrency limit."""
+
+    def __init__(self):
+        self._lanes: Dict[str, _Lane] = {}
+
+    def _lane(self, workload: str) -> _Lane:
+        lane = self._lanes.get(workload)
+        if lane is None:
+            limits = {
+                LIGHT: config.SCHED_LIGHT_LIMIT,
+                NETWORK: config.SCHED_NETWORK_LIMIT,
+                CPU: config.SCHED_CPU_LIMIT or (os.cpu_count() or 2),
+                MEDIA: config.SCHED_MEDIA_LIMIT,
+            }
+            lane = self._lanes[workload] = _Lane(workload, limits[workload])
+        return lane
+
+    async def run(
+        self,
+        workload: str,
+        chat: str,
+        job: Callable[[], Awaitable[Any]],
+        on_queued: Optional[Callable[[int], Awaitable[Any]]] = None,
+    ) -> Any:
+        """
+        Waits for a slot in `workload` (behind earlier commands from the
+        same chat), then runs `job()`. `on_queued(position)` is awaited
+        once if the job has to wait. Re-entrant: if the calling task
+        already holds a `workload` slot, `job()` runs right away, since
+        waiting for a second slot could deadlock the lane.
+        """
+        task = asyncio.current_task()
+        holder, held = _HELD.get()
+        if holder is task and workload in held:
+            return await job()
+
+        lane = self._lane(workload)
+        if not lane.try_acquire():
+            future = lane.enqueue(chat)
+            if on_queued is not None:
+                try:
+                    await on_queued(lane.position(chat, future))
+                except Exception as e:
+                    logger.debug(f"Queue notice failed: {e}")
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    lane.release()
+                else:
+                    lane.discard(chat, future)
+                raise
+
+        token = _HELD.set((task, (held if holder is task else frozenset()) | {workload}))
+        try:
+            return await job()
+        finally:
+            _HELD.reset(token)
+            lane.release()
+
+    def depths(self) -> Dict[str, Dict[str, int]]:
+        """Running/queued counts and limits for every workload class."""
+        return {
+            workload: {"running": lane.running, "queued": lane.queued, "limit": lane.limit}
+            for workload in WORKLOADS
+            for lane in (self._lane(workload),)
+        }
+
+
+# Singleton Export
+scheduler = CommandScheduler()
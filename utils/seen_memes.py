@@ -0,0 +1,99 @@
+"""
+Seen Meme Registry
+------------------
+Remembers which posts were already sent so meme sources can skip them.
+Recent post ids live in hourly in-memory slices warmed once from the
+`seen_memes` table; lookups never hit the database, and expired rows
+are pruned by a background task instead of on every request.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from .database import db
+
+logger = logging.getLogger("Astra.SeenMemes")
+
+SEEN_TTL_SECONDS = 24 * 3600
+SLICE_SECONDS = 3600
+PRUNE_INTERVAL = 3600
+
+
+def _slice_of(ts: float) -> int:
+    return int(ts // SLICE_SECONDS)
+
+
+class SeenMemes:
+    """Time-sliced set of recently sent post ids."""
+
+    def __init__(self):
+        self._slices: Dict[int, Set[str]] = {}
+        self._warm = False
+        self._load_lock = asyncio.Lock()
+        self._prune_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _cutoff() -> int:
+        return int(time.time()) - SEEN_TTL_SECONDS
+
+    async def _ensure_loaded(self):
+        if self._warm:
+            return
+        async with self._load_lock:
+            if self._warm:
+                return
+            for post_id, fetched_at in await db.get_seen_memes(self._cutoff()):
+                self._slices.setdefault(_slice_of(fetched_at), set()).add(post_id)
+            self._warm = True
+            if self._prune_task is None or self._prune_task.done():
+                self._prune_task = asyncio.ensure_future(self._prune_loop())
+
+    def _is_seen(self, post_id: str) -> bool:
+        oldest = _slice_of(self._cutoff())
+        return any(post_id in ids for bucket, ids in self._slices.items() if bucket >= oldest)
+
+    async def filter_unseen(self, post_ids: Iterable[str]) -> List[str]:
+        """Returns the ids from `post_ids` that were not sent within the TTL, in order."""
+        post_ids = list(post_ids)
+        try:
+            await self._ensure_loaded()
+        except Exception as e:
+            logger.warning(f"Seen-meme cache unavailable, querying directly: {e}")
+            try:
+                seen = await db.filter_seen_memes(post_ids, self._cutoff())
+            except Exception:
+                return post_ids
+            return [pid for pid in post_ids if pid not in seen]
+        return [pid for pid in post_ids if not self._is_seen(pid)]
+
+    async def mark(self, post_id: str, subreddit: str):
+        now = int(time.time())
+        self._slices.setdefault(_slice_of(now), set()).add(post_id)
+        try:
+            await db.mark_meme_seen(post_id, subreddit, now)
+        except Exception as e:
+            logger.debug(f"Failed to persist seen meme {post_id}: {e}")
+
+    async def prune(self):
+        """Drops expired slices from memory and expired rows from the database."""
+        cutoff = self._cutoff()
+        oldest = _slice_of(cutoff)
+        for bucket in [b for b in self._slices if b < oldest]:
+            del self._slices[bucket]
+        removed = await db.prune_seen_memes(cutoff)
+        if removed:
+            logger.debug(f"Pruned {removed} expired seen memes.")
+
+    async def _prune_loop(self):
+        while True:
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Seen meme pruning failed: {e}")
+            await asyncio.sleep(PRUNE_INTERVAL)
+
+
+# Singleton Export
+seen_memes = SeenMemes()
@@ -8,7 +8,8 @@ Synchronizes local memory cache with the SQLite backend.
 import asyncio
 import logging
 import time
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Set
 
 from .database import db
 
@@ -18,6 +19,32 @@ logger = logging.getLogger("Astra.State")
 # Used to ignore messages sent before the bot was online.
 BOOT_TIME = int(time.time())
 
+# State keys persisted as keyed collections (one row per member) rather than
+# single JSON blobs. Membership lists store each member with a `True` value.
+DICT_COLLECTIONS = ("notes", "pm_warnings", "group_configs", "configs")
+LIST_COLLECTIONS = ("pm_permits", "sudo_users")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_jid(uid: str) -> str:
+    uid = uid.strip()
+    if not uid:
+        return ""
+
+    # Keep full group ids unchanged.
+    if uid.endswith("@g.us"):
+        return uid
+
+    # Convert @s.whatsapp.net to @c.us and strip device suffixes like 12345:7@c.us
+    if "@" in uid:
+        local, domain = uid.split("@", 1)
+        local = local.split(":", 1)[0]
+        domain = "c.us" if domain in ("s.whatsapp.net", "c.us") else domain
+        return f"{local}@{domain}"
+
+    # Bare numeric fallback
+    return f"{uid}@c.us" if uid.isdigit() else uid
+
 
 class StateManager:
     """
@@ -30,8 +57,8 @@ class StateManager:
         # Local state cache to avoid frequent database I/O for reads.
         self.state: Dict[str, Any] = {
             "afk": {"is_afk": False, "reason": "", "since": 0},
-            "pm_permits": [],
-            "sudo_users": [],
+            "pm_permits": set(),  # canonical (normalized) ids
+            "sudo_users": set(),
             "notes": {},
             "pm_warnings": {},
             "group_configs": {},  # gid -> {muted: bool, welcome: str}
@@ -40,6 +67,9 @@ class StateManager:
             "I_DEV": False,  # Privacy filter bypass (Disabled by default)
             "configs": {},  # Dynamic runtime configurations
         }
+        # Membership aliases: collection -> canonical id -> ids as stored in
+        # the database (legacy rows may hold @s.whatsapp.net or device JIDs).
+        self._aliases: Dict[str, Dict[str, Set[str]]] = {name: {} for name in LIST_COLLECTIONS}
         self.initialized = False
 
     async def initialize(self):
@@ -52,36 +82,108 @@ class StateManager:
 
         await db.initialize()
 
-        # Bulk load managed state keys
+        # Bulk load managed scalar keys
         keys = [
             "afk",
-            "pm_permits",
-            "sudo_users",
-            "notes",
-            "pm_warnings",
-            "group_configs",
             "prefix",
             "I_DEV",
             "FULL_DEV",
-            "configs",
         ]
         for key in keys:
             val = await db.get(key)
             if val is not None:
-                if key == "configs" and not isinstance(val, dict):
-                    val = {}
                 self.state[key] = val
 
+        for name in DICT_COLLECTIONS + LIST_COLLECTIONS:
+            members = await self._load_collection(name)
+            if name in LIST_COLLECTIONS:
+                self._index_members(name, members)
+            else:
+                self.state[name] = members
+
         self.initialized = True
         logger.info("StateManager successfully synchronized with persistent store.")
 
+    @staticmethod
+    async def _load_collection(name: str) -> Dict[str, Any]:
+        """
+        Loads a keyed collection, migrating the legacy whole-blob key
+        (e.g. `notes` stored as one JSON document) on first boot.
+        """
+        members = await db.get_collection(name)
+        if members:
+            return members
+
+        legacy = await db.get(name)
+        if not legacy:
+            return members
+
+        if isinstance(legacy, list):
+            members = {str(m): True for m in legacy if m}
+        elif isinstance(legacy, dict):
+            members = {str(k): v for k, v in legacy.items()}
+        else:
+            logger.warning(f"Dropping malformed legacy state blob for {name}.")
+            return members
+
+        await db.replace_collection(name, members)
+        await db.delete(name)
+        logger.info(f"Migrated {len(members)} {name} entries to row-level storage.")
+        return members
+
+    def _index_members(self, name: str, stored: Iterable[str]):
+        """Builds the canonical membership set and alias map for a list collection."""
+        members: Set[str] = set()
+        aliases: Dict[str, Set[str]] = {}
+        for raw in stored:
+            canonical = self._normalize_user_id(raw)
+            if canonical:
+                members.add(canonical)
+                aliases.setdefault(canonical, set()).add(str(raw))
+        self.state[name] = members
+        self._aliases[name] = aliases
+
+    def _add_member(self, name: str, user_id: str) -> bool:
+        normalized = self._normalize_user_id(user_id)
+        if not normalized or normalized in self.state[name]:
+            return False
+        self.state[name].add(normalized)
+        self._aliases[name][normalized] = {normalized}
+        self._persist_member(name, normalized)
+        return True
+
+    def _remove_member(self, name: str, user_id: str) -> bool:
+        normalized = self._normalize_user_id(user_id)
+        if not normalized or normalized not in self.state[name]:
+            return False
+        self.state[name].discard(normalized)
+        for stored in sorted(self._aliases[name].pop(normalized, {normalized})):
+            self._forget_member(name, stored)
+        return True
+
+    def _persist_member(self, name: str, member: str, value: Any = True):
+        """Writes a single collection member in the background."""
+        asyncio.create_task(db.set_member(name, member, value))
+
+    def _forget_member(self, name: str, member: str):
+        """Deletes a single collection member in the background."""
+        asyncio.create_task(db.delete_member(name, member))
+
     async def save(self):
         """
         Force-syncs the entire memory state to the database.
         Note: The class handles individual state changes automatically;
         this remains for manual consistency checks.
         """
-        tasks = [db.set(key, val) for key, val in self.state.items()]
+        tasks = []
+        for key, val in self.state.items():
+            if key in LIST_COLLECTIONS:
+                tasks.append(db.replace_collection(key, {m: True for m in sorted(val)}))
+                self._aliases[key] = {m: {m} for m in val}
+            elif key in DICT_COLLECTIONS:
+                tasks.append(db.replace_collection(key, val))
+            else:
+                tasks.append(db.set(key, val))
         if tasks:
             await asyncio.gather(*tasks)
 
@@ -105,47 +207,19 @@ class StateManager:
 
     def is_permitted(self, user_id: str) -> bool:
         """Validates if a specific user is authorized to send direct messages."""
-        normalized = self._normalize_contact_id(user_id)
-        if not normalized:
-            return False
-
-        permits = set(self.state["pm_permits"])
-        if normalized in permits:
-            return True
-
-        if normalized.endswith("@c.us"):
-            return normalized.replace("@c.us", "@s.whatsapp.net") in permits
-        if normalized.endswith("@s.whatsapp.net"):
-            return normalized.replace("@s.whatsapp.net", "@c.us") in permits
-        return False
+        return self._normalize_contact_id(user_id) in self.state["pm_permits"]
 
     def permit_user(self, user_id: str):
         """Adds a user to the whitelist for direct messages."""
-        normalized = self._normalize_contact_id(user_id)
-        if normalized and normalized not in self.state["pm_permits"]:
-            self.state["pm_permits"].append(normalized)
-            asyncio.create_task(db.set("pm_permits", self.state["pm_permits"]))
+        self._add_member("pm_permits", user_id)
 
     def deny_user(self, user_id: str):
         """Removes a user from the direct message whitelist."""
-        normalized = self._normalize_contact_id(user_id)
-        if not normalized:
-            return
-
-        variants = {normalized}
-        if normalized.endswith("@c.us"):
-            variants.add(normalized.replace("@c.us", "@s.whatsapp.net"))
-        if normalized.endswith("@s.whatsapp.net"):
-            variants.add(normalized.replace("@s.whatsapp.net", "@c.us"))
-
-        original_len = len(self.state["pm_permits"])
-        self.state["pm_permits"] = [u for u in self.state["pm_permits"] if u not in variants]
-        if len(self.state["pm_permits"]) != original_len:
-            asyncio.create_task(db.set("pm_permits", self.state["pm_permits"]))
+        self._remove_member("pm_permits", user_id)
 
     def get_permitted_users(self):
-        """Returns a copy of PM permitted users."""
-        return list(self.state.get("pm_permits", []))
+        """Returns PM permitted users in a stable (sorted) order."""
+        return sorted(self.state.get("pm_permits", ()))
 
     def get_pm_warning(self, user_id: str) -> int:
         normalized = self._normalize_contact_id(user_id)
@@ -157,94 +231,48 @@ class StateManager:
             return 0
         count = int(self.state["pm_warnings"].get(normalized, 0)) + 1
         self.state["pm_warnings"][normalized] = count
-        asyncio.create_task(db.set("pm_warnings", self.state["pm_warnings"]))
+        self._persist_member("pm_warnings", normalized, count)
         return count
 
     def clear_pm_warning(self, user_id: str):
         normalized = self._normalize_contact_id(user_id)
         if normalized and normalized in self.state["pm_warnings"]:
             del self.state["pm_warnings"][normalized]
-            asyncio.create_task(db.set("pm_warnings", self.state["pm_warnings"]))
+            self._forget_member("pm_warnings", normalized)
 
     def clear_all_pm_warnings(self):
         self.state["pm_warnings"] = {}
-        asyncio.create_task(db.set("pm_warnings", self.state["pm_warnings"]))
+        asyncio.create_task(db.clear_collection("pm_warnings"))
 
     # --- Administrative Sudo Privileges ---
 
     @staticmethod
     def _normalize_user_id(user_id: str) -> str:
         """Normalize user IDs/JIDs so sudo checks are consistent across domains/devices."""
-        uid = str(user_id or "").strip()
-        if not uid:
-            return ""
-
-        # Keep full group ids unchanged.
-        if uid.endswith("@g.us"):
-            return uid
-
-        # Convert @s.whatsapp.net to @c.us and strip device suffixes like 12345:7@c.us
-        if "@" in uid:
-            local, domain = uid.split("@", 1)
-            local = local.split(":", 1)[0]
-            domain = "c.us" if domain in ("s.whatsapp.net", "c.us") else domain
-            return f"{local}@{domain}"
-
-        # Bare numeric fallback
-        return f"{uid}@c.us" if uid.isdigit() else uid
+        return _normalize_jid(str(user_id or ""))
 
     def is_sudo(self, user_id: str) -> bool:
         """Checks if a user has elevated sudo privileges."""
-        normalized = self._normalize_user_id(user_id)
-        if not normalized:
-            return False
-
-        sudo_set = set(self.state["sudo_users"])
-        if normalized in sudo_set:
-            return True
-
-        # Backward compatibility for any historical storage variant.
-        if normalized.endswith("@c.us"):
-            return normalized.replace("@c.us", "@s.whatsapp.net") in sudo_set
-        if normalized.endswith("@s.whatsapp.net"):
-            return normalized.replace("@s.whatsapp.net", "@c.us") in sudo_set
-        return False
+        return self._normalize_user_id(user_id) in self.state["sudo_users"]
 
     def add_sudo(self, user_id: str):
         """Grants sudo privileges to a user."""
-        normalized = self._normalize_user_id(user_id)
-        if normalized and normalized not in self.state["sudo_users"]:
-            self.state["sudo_users"].append(normalized)
-            asyncio.create_task(db.set("sudo_users", self.state["sudo_users"]))
+        self._add_member("sudo_users", user_id)
 
     def remove_sudo(self, user_id: str) -> bool:
         """Revokes sudo privileges from a user. Returns True if removed."""
-        normalized = self._normalize_user_id(user_id)
-        if not normalized:
-            return False
-
-        candidates = {normalized}
-        if normalized.endswith("@c.us"):
-            candidates.add(normalized.replace("@c.us", "@s.whatsapp.net"))
-        if normalized.endswith("@s.whatsapp.net"):
-            candidates.add(normalized.replace("@s.whatsapp.net", "@c.us"))
-
-        removed = False
-        self.state["sudo_users"] = [u for u in self.state["sudo_users"] if not (u in candidates and (removed := True))]
-        if removed:
-            asyncio.create_task(db.set("sudo_users", self.state["sudo_users"]))
-        return removed
+        return self._remove_member("sudo_users", user_id)
 
     def get_sudo_users(self):
-        """Returns a copy of sudo users list."""
-        return list(self.state.get("sudo_users", []))
+        """Returns sudo users in a stable (sorted) order."""
+        return sorted(self.state.get("sudo_users", ()))
 
     # --- Customizable Notes System ---
 
     def set_note(self, keyword: str, content: str):
         """Saves a snippet of text for quick recall via a keyword."""
         self.state["notes"][keyword.lower()] = content
-        asyncio.create_task(db.set("notes", self.state["notes"]))
+        self._persist_member("notes", keyword.lower(), content)
 
     def get_note(self, keyword: str) -> Optional[str]:
         """Recalls a previously saved note by its keyword."""
@@ -254,7 +282,7 @@ class StateManager:
         """Permanently deletes a saved note."""
         if keyword.lower() in self.state["notes"]:
             del self.state["notes"][keyword.lower()]
-            asyncio.create_task(db.set("notes", self.state["notes"]))
+            self._forget_member("notes", keyword.lower())
 
     # --- Dynamic Interface Routing ---
 
@@ -285,7 +313,15 @@ class StateManager:
     def set_config(self, key: str, value: Any):
         """Sets a dynamic configuration value in the database."""
         self.state["configs"][key] = value
-        asyncio.create_task(db.set("configs", self.state["configs"]))
+        self._persist_member("configs", key, value)
+
+    def delete_config(self, key: str) -> bool:
+        """Removes a dynamic configuration value. Returns True if it existed."""
+        if key not in self.state["configs"]:
+            return False
+        del self.state["configs"][key]
+        self._forget_member("configs", key)
+        return True
 
     def get_config(self, key: str, default: Any = None) -> Any:
         """Retrieves a dynamic configuration value."""
@@ -295,6 +331,18 @@ class StateManager:
         """Returns all dynamic configurations."""
         return self.state["configs"]
 
+    # --- Per-Group Settings ---
+
+    def set_group_config(self, group_id: str, key: str, value: Any):
+        """Updates a single setting for one group, persisting only that group."""
+        gid = str(group_id)
+        group = self.state["group_configs"].setdefault(gid, {})
+        group[key] = value
+        self._persist_member("group_configs", gid, group)
+
+    def get_group_config(self, group_id: str, key: str, default: Any = None) -> Any:
+        return self.state["group_configs"].get(str(group_id), {}).get(key, default)
+
 
 # Singleton Export
 state = StateManager()
@@ -0,0 +1,204 @@
+"""
+URL Canonicalization
+--------------------
+Maps the many link shapes a platform hands out for one post (short links,
+mobile and music subdomains, share/tracking parameters, timestamps) to a
+single canonical URL, so the media cache keys them identically.
+
+Platforms plug in with `@canonicalizer(*domains)`: the function receives
+the parsed URL (host lowercased, `www.`/`m.` stripped) and returns the
+canonical URL, or None to fall back to generic cleanup. Canonical URLs
+are only used as cache keys; downloads still use the link as sent.
+"""
+
+import re
+from typing import Callable, Dict, Optional
+from urllib.parse import SplitResult, parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that identify the sharer or campaign, never the content.
+TRACKING_PARAMS = {
+    "fbclid", "feature", "gclid", "igsh", "igshid", "mibextid", "rdid", "ref", "ref_src",
+    "ref_url", "share_id", "si",
+}
+# Host prefixes that serve the same content as the bare domain.
+HOST_PREFIXES = ("www.", "m.", "mobile.", "web.", "mbasic.")
+
+Canonicalizer = Callable[[SplitResult], Optional[str]]
+_CANONICALIZERS: Dict[str, Canonicalizer] = {}
+
+
+def canonicalizer(*domains: str):
+    """Registers a platform canonicalizer for `domains` (and their subdomains)."""
+
+    def decorator(func: Canonicalizer) -> Canonicalizer:
+        for domain in domains:
+            _CANONICALIZERS[domain] = func
+        return func
+
+    return decorator
+
+
+def _host(netloc: str) -> str:
+    host = netloc.lower().rsplit("@", 1)[-1].split(":", 1)[0]
+    for prefix in HOST_PREFIXES:
+        if host.startswith(prefix):
+            return host[len(prefix):]
+    return host
+
+
+def _lookup(host: str) -> Optional[Canonicalizer]:
+    """Finds the canonicalizer of `host` or its closest registered parent domain."""
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        func = _CANONICALIZERS.get(".".join(parts[i:]))
+        if func is not None:
+            return func
+    return None
+
+
+def _query(parts: SplitResult) -> Dict[str, str]:
+    return dict(parse_qsl(parts.query, keep_blank_values=True))
+
+
+def _generic(parts: SplitResult, host: str) -> str:
+    """Drops tracking parameters, the fragment and trailing slashes; sorts the query."""
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    )
+    return urlunsplit(("https", host, parts.path.rstrip("/") or "/", urlencode(query), ""))
+
+
+def canonicalize(url: str) -> str:
+    """Returns the canonical form of `url`; unknown or unparsable links are returned cleaned or as-is."""
+    url = (url or "").strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    host = _host(parts.netloc)
+    if not host:
+        return url
+
+    parts = parts._replace(netloc=host)
+    func = _lookup(host)
+    if func is not None:
+        canonical = func(parts)
+        if canonical:
+            return canonical
+    return _generic(parts, host)
+
+
+# --- Platforms ---
+
+_YT_ID = r"([A-Za-z0-9_-]{11})"
+_YT_PATH = re.compile(rf"^/(?:shorts|embed|live|v|e)/{_YT_ID}")
+
+
+@canonicalizer("youtube.com", "youtu.be", "youtube-nocookie.com")
+def _youtube(parts: SplitResult) -> Optional[str]:
+    query = _query(parts)
+    video_id = None
+    if parts.netloc == "youtu.be":
+        match = re.match(rf"^/{_YT_ID}", parts.path)
+        video_id = match and match.group(1)
+    elif parts.path.rstrip("/") == "/watch":
+        video_id = query.get("v")
+    else:
+        match = _YT_PATH.match(parts.path)
+        video_id = match and match.group(1)
+
+    if video_id and re.fullmatch(_YT_ID, video_id):
+        return f"https://www.youtube.com/watch?v={video_id}"
+    if parts.path.rstrip("/") == "/playlist" and query.get("list"):
+        return f"https://www.youtube.com/playlist?list={query['list']}"
+    return None
+
+
+_IG_POST = re.compile(r"^/(?:[A-Za-z0-9_.]+/)?(?:p|reel|reels|tv)/([A-Za-z0-9_-]+)")
+_IG_STORY = re.compile(r"^/stories/([A-Za-z0-9_.]+)/(\d+)")
+
+
+@canonicalizer("instagram.com", "instagr.am")
+def _instagram(parts: SplitResult) -> Optional[str]:
+    match = _IG_POST.match(parts.path)
+    if match:
+        # Posts, reels and IGTV share one shortcode namespace.
+        return f"https://www.instagram.com/p/{match.group(1)}/"
+    match = _IG_STORY.match(parts.path)
+    if match:
+        return f"https://www.instagram.com/stories/{match.group(1).lower()}/{match.group(2)}/"
+    return None
+
+
+_REDDIT_POST = re.compile(r"^/(?:r/[^/]+/)?comments/([a-z0-9]+)", re.IGNORECASE)
+
+
+@canonicalizer("reddit.com", "redd.it")
+def _reddit(parts: SplitResult) -> Optional[str]:
+    if parts.netloc == "redd.it":
+        match = re.match(r"^/([a-z0-9]+)/?$", parts.path, re.IGNORECASE)
+    else:
+        match = _REDDIT_POST.match(parts.path)
+    if match:
+        return f"https://www.reddit.com/comments/{match.group(1).lower()}"
+    return None
+
+
+@canonicalizer("twitter.com", "x.com", "fxtwitter.com", "vxtwitter.com", "fixupx.com", "fixvx.com")
+def _twitter(parts: SplitResult) -> Optional[str]:
+    # /user/status/ID, /i/status/ID, /i/web/status/ID, plus /photo/1 or /video/1 suffixes.
+    match = re.search(r"/status(?:es)?/(\d+)", parts.path)
+    if match:
+        return f"https://x.com/i/status/{match.group(1)}"
+    return None
+
+
+_FB_VIDEO = re.compile(r"^/(?:[^/]+/videos/(?:[^/]+/)?|reel/)(\d+)")
+
+
+@canonicalizer("facebook.com", "fb.com")
+def _facebook(parts: SplitResult) -> Optional[str]:
+    query = _query(parts)
+    path = parts.path.rstrip("/")
+    video_id = None
+    if path in ("/watch", "/video.php", "/watch/live") and query.get("v", "").isdigit():
+        video_id = query["v"]
+    else:
+        match = _FB_VIDEO.match(parts.path)
+        video_id = match and match.group(1)
+    if video_id:
+        # Reels are videos; both resolve through the same numeric id.
+        return f"https://www.facebook.com/watch/?v={video_id}"
+    if path in ("/story.php", "/permalink.php") and query.get("story_fbid") and query.get("id"):
+        return f"https://www.facebook.com/permalink.php?story_fbid={query['story_fbid']}&id={query['id']}"
+    return None
+
+
+_PIN = re.compile(r"^/pin/(?:[^/]*--)?(\d+)")
+
+
+# Country domains; subdomains such as in.pinterest.com match pinterest.com.
+@canonicalizer(
+    "pinterest.com", "pinterest.ca", "pinterest.co.uk", "pinterest.com.au", "pinterest.com.mx",
+    "pinterest.de", "pinterest.es", "pinterest.fr", "pinterest.it", "pinterest.jp", "pinterest.nz",
+)
+def _pinterest(parts: SplitResult) -> Optional[str]:
+    match = _PIN.match(parts.path)
+    if match:
+        return f"https://www.pinterest.com/pin/{match.group(1)}/"
+    return None
+
+
+@canonicalizer("soundcloud.com")
+def _soundcloud(parts: SplitResult) -> Optional[str]:
+    if parts.netloc != "soundcloud.com":
+        # on.soundcloud.com short links need a redirect to resolve.
+        return None
+    segments = [s for s in parts.path.split("/") if s]
+    if len(segments) >= 2:
+        # /artist/track, /artist/sets/playlist; paths are case-insensitive.
+        return "https://soundcloud.com/" + "/".join(segments[:3 if segments[1] == "sets" else 2]).lower()
+    return None
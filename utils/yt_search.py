@@ -0,0 +1,126 @@
+"""
+YouTube Search Resolver
+-----------------------
+Turns a search query (or a video link) into YouTube results without
+blocking the event loop: yt-dlp runs in a worker thread, results are
+cached per normalized query for YT_SEARCH_TTL seconds, and identical
+searches arriving while one is running wait for it instead of starting
+their own. Shared by `.ytsearch`, `.song`, `.vsong` and `.youtube`.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import config
+
+logger = logging.getLogger("Astra.YtSearch")
+
+YDL_OPTS = {"quiet": True, "no_warnings": True, "extract_flat": True}
+
+
+def normalize_query(query: str) -> str:
+    """Case- and whitespace-insensitive form of a search query."""
+    return re.sub(r"\s+", " ", query or "").strip().casefold()
+
+
+def _result(entry: Dict[str, Any]) -> Dict[str, Any]:
+    video_id = entry.get("id")
+    duration = entry.get("duration")
+    return {
+        "id": video_id,
+        "title": entry.get("title") or "Unknown",
+        "duration": int(duration) if duration else None,
+        "duration_string": entry.get("duration_string")
+        or (f"{int(duration) // 60}:{int(duration) % 60:02d}" if duration else "N/A"),
+        "url": entry.get("webpage_url") or f"https://www.youtube.com/watch?v={video_id}",
+        "views": entry.get("view_count"),
+    }
+
+
+def _extract(target: str) -> List[Dict[str, Any]]:
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(YDL_OPTS) as ydl:
+        info = ydl.extract_info(target, download=False) or {}
+    entries = info.get("entries") if "entries" in info else [info]
+    return [_result(entry) for entry in entries or [] if entry and entry.get("id")]
+
+
+class YouTubeSearch:
+    """Off-loop YouTube search with a TTL cache and in-flight deduplication."""
+
+    def __init__(self):
+        # key -> (expires_at, limit searched, results), least recently used first.
+        self._cache: "OrderedDict[str, Tuple[float, int, List[Dict[str, Any]]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, int], asyncio.Future] = {}
+
+    def _cached(self, key: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        hit = self._cache.get(key)
+        if hit is None:
+            return None
+        expires_at, searched, results = hit
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        # A longer result list answers shorter requests too.
+        if searched < limit:
+            return None
+        self._cache.move_to_end(key)
+        return results[:limit]
+
+    def _store(self, key: str, limit: int, future: asyncio.Future):
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            logger.debug(f"YouTube lookup failed for {key!r}: {future.exception()}")
+            return
+        results = future.result()
+        # Empty answers are not cached; they are often transient.
+        if not results or self._cached(key, limit + 1) is not None:
+            return
+        self._cache[key] = (time.monotonic() + config.YT_SEARCH_TTL, limit, results)
+        self._cache.move_to_end(key)
+        while len(self._cache) > max(1, config.YT_SEARCH_CACHE_SIZE):
+            self._cache.popitem(last=False)
+
+    async def _resolve(self, key: str, limit: int, target: str) -> List[Dict[str, Any]]:
+        results = self._cached(key, limit)
+        if results is None:
+            flight = (key, limit)
+            future = self._in_flight.get(flight)
+            if future is None:
+                future = self._in_flight[flight] = asyncio.ensure_future(asyncio.to_thread(_extract, target))
+
+                def _landed(done: asyncio.Future):
+                    self._in_flight.pop(flight, None)
+                    self._store(key, limit, done)
+
+                future.add_done_callback(_landed)
+            # Shielded so one cancelled caller does not fail the others.
+            results = await asyncio.shield(future)
+        return [dict(r) for r in results[:limit]]
+
+    async def search(self, query: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        Top `limit` results for `query` as dicts with id, title, duration
+        (seconds or None), duration_string, url and views.
+        """
+        normalized = normalize_query(query)
+        if not normalized:
+            return []
+        return await self._resolve(f"search:{normalized}", limit, f"ytsearch{limit}:{normalized}")
+
+    async def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """Title/duration of a video link (first entry for playlists), or None."""
+        from utils.url_canon import canonicalize
+
+        results = await self._resolve(f"url:{canonicalize(url)}", 1, url)
+        return results[0] if results else None
+
+
+# Singleton Export
+yt_search = YouTubeSearch()
@@ -0,0 +1,160 @@
+"""
+yt-dlp Worker Pool
+------------------
+Keeps up to YTDLP_WORKERS long-lived Python processes (`utils.ytdlp_worker`)
+with yt_dlp already imported, so a media request costs one extraction and
+one download instead of interpreter and extractor start-up. Jobs and their
+progress events travel as JSON lines over the worker's stdin/stdout.
+Workers are recycled after YTDLP_WORKER_MAX_JOBS jobs, and killed when a
+job is abandoned midway or the process misbehaves.
+"""
+
+import asyncio
+import json
+import logging
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import config
+from utils.media_exceptions import MediaException
+
+logger = logging.getLogger("Astra.YtdlpPool")
+
+# A freshly spawned worker must finish importing yt_dlp within this time.
+SPAWN_TIMEOUT = 60
+
+
+class DownloadFailed(MediaException):
+    """A yt-dlp job failed; the message carries yt-dlp's warnings and error."""
+
+
+class _Worker:
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.jobs = 0
+        self._stderr = asyncio.create_task(self._drain_stderr())
+
+    async def _drain_stderr(self):
+        # Keeps the pipe from filling up; failures are reported through the protocol.
+        async for line in self.process.stderr:
+            logger.debug(f"[worker {self.process.pid}] {line.decode(errors='ignore').rstrip()}")
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    async def send(self, job: Dict[str, Any]):
+        self.process.stdin.write(json.dumps(job).encode() + b"\n")
+        await self.process.stdin.drain()
+        self.jobs += 1
+
+    async def receive(self) -> Dict[str, Any]:
+        line = await self.process.stdout.readline()
+        if not line:
+            raise DownloadFailed("yt-dlp worker exited unexpectedly")
+        return json.loads(line)
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+        self._stderr.cancel()
+
+
+class YtdlpPool:
+    """Hands download jobs to warm yt-dlp worker processes."""
+
+    def __init__(self):
+        self._idle: List[_Worker] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, config.YTDLP_WORKERS))
+        return self._slots
+
+    async def _spawn(self) -> _Worker:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "utils.ytdlp_worker",
+            cwd=config.BASE_DIR,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        worker = _Worker(process)
+        try:
+            ready = await asyncio.wait_for(worker.receive(), SPAWN_TIMEOUT)
+        except BaseException:
+            worker.kill()
+            raise
+        if ready.get("event") != "ready":
+            worker.kill()
+            raise DownloadFailed(f"yt-dlp worker failed to start: {ready}")
+        logger.debug(f"Spawned yt-dlp worker {process.pid}")
+        return worker
+
+    def _checkout(self) -> Optional[_Worker]:
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            worker.kill()
+        return None
+
+    def _checkin(self, worker: _Worker, reusable: bool):
+        if reusable and worker.alive and worker.jobs < config.YTDLP_WORKER_MAX_JOBS:
+            self._idle.append(worker)
+        else:
+            worker.kill()
+
+    async def download(
+        self,
+        url: str,
+        mode: str,
+        cookies_file: Optional[str] = None,
+        cookies_browser: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Runs one download, yielding the worker's `metadata`, `progress` and
+        final `done` events. Raises DownloadFailed if yt-dlp fails.
+        """
+        async with self._semaphore():
+            worker = self._checkout() or await self._spawn()
+            reusable = False
+            try:
+                await worker.send(
+                    {"url": url, "mode": mode, "cookies_file": cookies_file, "cookies_browser": cookies_browser}
+                )
+                while True:
+                    event = await worker.receive()
+                    kind = event.get("event")
+                    if kind == "error":
+                        reusable = True
+                        raise DownloadFailed(event.get("message") or "yt-dlp failed")
+                    yield event
+                    if kind == "done":
+                        reusable = True
+                        return
+            finally:
+                # A job left unfinished (cancelled, bad output) would desync the pipe.
+                self._checkin(worker, reusable)
+
+    async def warm_up(self):
+        """Starts one idle worker ahead of the first request."""
+        if self._idle:
+            return
+        try:
+            async with self._semaphore():
+                self._idle.append(await self._spawn())
+        except Exception as e:
+            logger.warning(f"yt-dlp worker warm-up failed: {e}")
+
+    def shutdown(self):
+        for worker in self._idle:
+            worker.kill()
+        self._idle = []
+
+
+# Singleton Export
+ytdlp_pool = YtdlpPool()
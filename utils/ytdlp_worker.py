@@ -0,0 +1,172 @@
+"""
+yt-dlp Worker Process
+---------------------
+Long-lived download worker driven by `utils.ytdlp_pool`. It imports
+yt_dlp once and then serves jobs read as JSON lines from stdin, answering
+with JSON event lines on stdout:
+
+    {"event": "metadata", "metadata": {...}}   after extraction
+    {"event": "progress", "downloaded": .., "total": .., "speed": .., "eta": ..}
+    {"event": "done", "files": [...]}          or
+    {"event": "error", "message": "..."}
+
+Each job extracts once and downloads from that same info dict. Anything
+yt-dlp or its postprocessors print goes to stderr, never to the protocol
+stream.
+
+Run standalone (for debugging) with:
+    python3 -m utils.ytdlp_worker
+"""
+
+import json
+import os
+import sys
+import time
+
+# Protocol stream: a private handle on the real stdout; stray prints go to stderr.
+_PROTOCOL = os.fdopen(os.dup(sys.stdout.fileno()), "w", buffering=1, encoding="utf-8")
+sys.stdout = sys.stderr
+
+import yt_dlp  # noqa: E402  (imported once, kept warm across jobs)
+
+TEMP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "temp")
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+)
+# Seconds between progress events for one job.
+PROGRESS_INTERVAL = 0.5
+
+
+def _emit(event: dict):
+    _PROTOCOL.write(json.dumps(event, default=str) + "\n")
+    _PROTOCOL.flush()
+
+
+class _Logger:
+    """Routes yt-dlp messages to stderr and keeps warnings/errors for the failure report."""
+
+    def __init__(self):
+        self.problems = []
+
+    def debug(self, msg):
+        pass
+
+    def info(self, msg):
+        pass
+
+    def warning(self, msg):
+        self.problems.append(msg)
+        print(msg, file=sys.stderr)
+
+    def error(self, msg):
+        self.problems.append(msg)
+        print(msg, file=sys.stderr)
+
+
+def _options(job: dict, prefix: str, logger: _Logger) -> dict:
+    last_progress = [0.0]
+
+    def on_progress(d):
+        if d.get("status") != "downloading":
+            return
+        now = time.monotonic()
+        if now - last_progress[0] < PROGRESS_INTERVAL:
+            return
+        last_progress[0] = now
+        _emit(
+            {
+                "event": "progress",
+                "downloaded": d.get("downloaded_bytes") or 0,
+                "total": d.get("total_bytes") or d.get("total_bytes_estimate") or 0,
+                "speed": d.get("speed") or 0,
+                "eta": d.get("eta"),
+            }
+        )
+
+    opts = {
+        "quiet": True,
+        "no_warnings": False,
+        "noprogress": True,
+        "logger": logger,
+        "progress_hooks": [on_progress],
+        "noplaylist": True,
+        "geo_bypass": True,
+        "nocheckcertificate": True,
+        "http_headers": {"Referer": "https://www.google.com/", "User-Agent": USER_AGENT},
+        "extractor_args": {"instagram": {"allow_direct_url": [""]}},
+        "buffersize": 1024 * 1024,
+        "concurrent_fragment_downloads": 5,
+        "updatetime": False,
+        "outtmpl": os.path.join(TEMP_DIR, f"{prefix}%(id)s.%(ext)s"),
+    }
+    if job.get("cookies_file"):
+        opts["cookiefile"] = job["cookies_file"]
+    elif job.get("cookies_browser"):
+        opts["cookiesfrombrowser"] = (job["cookies_browser"],)
+
+    if job.get("mode") == "audio":
+        opts["format"] = "ba/b"
+        opts["postprocessors"] = [
+            {"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": "0"}
+        ]
+    else:
+        # Force H.264/MP4 for maximum compatibility across all devices
+        opts["format"] = "bestvideo[ext=mp4][vcodec^=avc1]+bestaudio[ext=m4a]/best[ext=mp4][vcodec^=avc1]/best"
+        opts["format_sort"] = ["vcodec:h264", "res", "acodec:m4a"]
+        opts["merge_output_format"] = "mp4"
+        opts["postprocessor_args"] = {"ffmpeg": ["-movflags", "+faststart"]}
+    return opts
+
+
+def run_job(job: dict):
+    url = job["url"]
+    prefix = f"ytdl_{os.getpid()}_{time.time_ns()}_"
+    logger = _Logger()
+    try:
+        with yt_dlp.YoutubeDL(_options(job, prefix, logger)) as ydl:
+            info = ydl.extract_info(url, download=False)
+            _emit(
+                {
+                    "event": "metadata",
+                    "metadata": {
+                        "title": info.get("title") or "Unknown Title",
+                        "platform": info.get("extractor_key") or "Unknown",
+                        "uploader": info.get("uploader") or info.get("channel") or "",
+                        "url": info.get("webpage_url") or url,
+                    },
+                }
+            )
+            # Download from the info dict just extracted instead of extracting again.
+            ydl.process_ie_result(info, download=True)
+    except Exception as e:
+        _emit({"event": "error", "message": "\n".join(logger.problems + [str(e)])})
+        return
+
+    files = sorted(
+        os.path.join(TEMP_DIR, name)
+        for name in os.listdir(TEMP_DIR)
+        if name.startswith(prefix) and not name.endswith((".part", ".ytdl"))
+    )
+    if files:
+        _emit({"event": "done", "files": files})
+    else:
+        _emit({"event": "error", "message": "\n".join(logger.problems + ["No file found after download"])})
+
+
+def main():
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    _emit({"event": "ready"})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            _emit({"event": "error", "message": f"Bad job: {e}"})
+            continue
+        run_job(job)
+
+
+if __name__ == "__main__":
+    main()